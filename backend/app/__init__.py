@@ -4,7 +4,6 @@ from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS, cross_origin
 from config import config
-from app.scheduler import scheduler
 import cloudinary
 import cloudinary.uploader
 import os
@@ -13,9 +12,10 @@ db = SQLAlchemy()
 migrate = Migrate()
 jwt = JWTManager()
 
-def create_app(config_name='default'):
+def create_app(config_name='default', start_scheduler=True):
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    app.config['CONFIG_NAME'] = config_name
 
     # -------------------------------
     # Cloudinary Configuration
@@ -127,42 +127,17 @@ def create_app(config_name='default'):
     from app.utils.error_handlers import register_error_handlers
     register_error_handlers(app)
     
-    # Init Scheduler
-    scheduler.init_app(app)
-    scheduler.start()
-
-    from app.jobs import midnight_interest_job
-
-    # Wrap the job with app context
-    def job_wrapper():
-        with app.app_context():
-            print("Running daily interest jobs (DDS + FD)...")
-            midnight_interest_job()
-
-    scheduler.add_job(
-        id='dds_daily_interest',
-        func=job_wrapper,  # use wrapper
-        trigger='cron',
-        hour=0,
-        minute=1
-    )
-
-    from app.jobs import monthly_interest_job
-
-    def rd_job_wrapper():
-         with app.app_context():
-          print("Running monthly RD job...")
-          monthly_interest_job()
+    # Compile the email templates once per process instead of on every send
+    from app.services.email_templates import load_templates
+    load_templates()
+    
+    # `flask run-jobs` runs the scheduled jobs in a dedicated process
+    from app.scheduler import register_job_commands, init_scheduler
+    register_job_commands(app)
 
+    # Web workers, CLI commands and accrual worker processes leave the jobs to
+    # the job runner unless the scheduler is explicitly enabled in-process
+    if start_scheduler and app.config['SCHEDULER_IN_WEB']:
+        init_scheduler(app)
 
-    scheduler.add_job(
-        id='rd_monthly_job',
-        func=rd_job_wrapper,
-        trigger='cron',
-        day=30,
-        hour=0,
-        minute=1
-    )
-
-    
     return app
@@ -2,6 +2,8 @@ from flask import request
 from flask_jwt_extended import get_jwt_identity
 from app.services.account_service import AccountService
 from app.services.customer_service import CustomerService
+from app.services.account_type_catalog import AccountTypeCatalog
+from app.utils.pagination import get_cursor_params
 import logging
 
 logger = logging.getLogger(__name__)
@@ -72,8 +74,8 @@ class AccountController:
                         'data': None
                     }, 403
                 # For staff, only allow loan account creation (self-service)
-                from app.models import AccountType, Account
-                account_type = AccountType.query.get(int(data['account_type_id']))
+                from app.models import Account
+                account_type = AccountTypeCatalog.get(int(data['account_type_id']))
                 if not account_type or account_type.name != 'Loan':
                     return {
                         'success': False,
@@ -100,8 +102,7 @@ class AccountController:
                     return result, status_code
             
             # Check account type and extract type-specific parameters
-            from app.models import AccountType
-            account_type = AccountType.query.get(int(data['account_type_id']))
+            account_type = AccountTypeCatalog.get(int(data['account_type_id']))
             account_type_name = account_type.name if account_type else None
             
             # Extract common parameters
@@ -211,6 +212,7 @@ class AccountController:
             data = request.get_json(silent=True) or {}
             page = data.get('page') or request.args.get('page', 1, type=int)
             limit = data.get('limit') or request.args.get('limit', 10, type=int)
+            cursor, approximate_total = get_cursor_params(data)
             
             # Get filter parameters
             search = data.get('search') or request.args.get('search', '').strip()
@@ -238,7 +240,9 @@ class AccountController:
                 limit=limit,
                 search=search,
                 account_type_filter=account_type_filter,
-                status_filter=status_filter
+                status_filter=status_filter,
+                cursor=cursor,
+                approximate_total=approximate_total
             )
             
             status_code = 200 if result['success'] else 400
@@ -461,12 +465,22 @@ class AccountController:
                 }, 400
             
             reason = data.get('reason', f'Bulk interest rate update')
+            dry_run = data.get('dry_run', False)
+            if isinstance(dry_run, str) and dry_run.strip().lower() in ('true', 'false'):
+                dry_run = dry_run.strip().lower() == 'true'
+            if not isinstance(dry_run, bool):
+                return {
+                    'success': False,
+                    'message': 'dry_run must be true or false',
+                    'data': None
+                }, 400
             
             result = AccountService.bulk_update_account_type_interest_rate(
                 account_type_id=account_type_id,
                 new_rate=new_rate,
                 updated_by=user_id,
-                reason=reason
+                reason=reason,
+                dry_run=dry_run
             )
             
             status_code = 200 if result['success'] else 400
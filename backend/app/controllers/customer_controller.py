@@ -1,7 +1,9 @@
 from flask import request
 from flask_jwt_extended import get_jwt_identity
 from app.services.customer_service import CustomerService
-from app.models import User, Customer, UserPermission
+from app.models import User
+from app.services.permission_service import PermissionService
+from app.utils.pagination import get_cursor_params
 import logging
 import re
 logger = logging.getLogger(__name__)
@@ -17,24 +19,8 @@ def validate_phone(phone: str) -> bool:
     return len(digits_only) == 10
 
 def get_user_role_and_id(user_id):
-    """Get user role and ID from both users and customers tables"""
-    try:
-        # Convert string ID to integer for database query
-        user_id_int = int(user_id)
-        
-        # First check users table (for admin)
-        user = User.query.get(user_id_int)
-        if user:
-            return user.role, user_id_int
-        
-        # If not found in users table, check customers table (for staff/manager)
-        customer = Customer.query.get(user_id_int)
-        if customer:
-            return customer.role, user_id_int
-        return None, None
-    except (ValueError, TypeError) as e:
-        logger.error(f'Error in get_user_role_and_id: {e}')
-        return None, None
+    """Get user role and ID (the request's principal, or users then customers table)"""
+    return CustomerService.get_user_role_and_id(user_id)
 
 class CustomerController:
     @staticmethod
@@ -99,15 +85,9 @@ class CustomerController:
                 pass
             elif user_role == 'manager':
                 # Check if manager has create permission
-                from app.models import UserPermission
-                permission = UserPermission.query.filter_by(
-                    user_id=user_id_int,
-                    user_type='customer',
-                    module='customers_management',
-                    can_create=True
-                ).first()
+                has_permission = PermissionService.manager_can(user_id_int, 'customers_management', 'create')
                 
-                if not permission:
+                if not has_permission:
                     return {
                         'success': False,
                         'message': 'Access denied - No permission to create customers',
@@ -195,6 +175,7 @@ class CustomerController:
             
             page = data.get('page') or request.args.get('page', 1, type=int)
             limit = data.get('limit') or request.args.get('limit', 10, type=int)
+            cursor, approximate_total = get_cursor_params(data)
             
             # Get search and filter parameters
             search = data.get('search') or request.args.get('search', '').strip()
@@ -237,7 +218,9 @@ class CustomerController:
                 limit,
                 search=search,
                 sort_by=sort_by,
-                sort_order=sort_order
+                sort_order=sort_order,
+                cursor=cursor,
+                approximate_total=approximate_total
             )
             
             status_code = 200 if result['success'] else 400
@@ -1,9 +1,13 @@
-from flask import request
+from flask import request, Response, stream_with_context
 from flask_jwt_extended import get_jwt_identity
 from app.services.transaction_service import TransactionService
+from app.services.export_service import TransactionExportService, EXPORT_FORMATS
 from app.services.payment_simulation_service import PaymentSimulationService
 from app.services.customer_service import CustomerService
+from app.services.permission_service import PermissionService
 from app.utils.decorators import admin_required, manager_required
+from app.utils.pagination import get_cursor_params
+from app.utils.identity import current_principal, PRINCIPAL_USER
 import logging
 
 logger = logging.getLogger(__name__)
@@ -102,6 +106,48 @@ class TransactionController:
                 'data': None
             }, 500
     
+    @staticmethod
+    def create_transactions_batch():
+        """Post a batch of deposits/withdrawals (Admin/Manager only)"""
+        try:
+            data = request.get_json() or {}
+            current_user_id = get_jwt_identity()
+            user_role, user_id = CustomerService.get_user_role_and_id(current_user_id)
+            
+            if not user_role or not user_id:
+                return {
+                    'success': False,
+                    'message': 'User not found or invalid',
+                    'data': None
+                }, 401
+            
+            postings = data.get('transactions')
+            if not isinstance(postings, list):
+                return {
+                    'success': False,
+                    'message': 'Missing required field: transactions (a list)',
+                    'data': None
+                }, 400
+            
+            result = TransactionService.create_transactions_batch(
+                postings=postings,
+                created_by=user_id,
+                user_role=user_role,
+                user_id=user_id,
+                atomic=bool(data.get('atomic', False))
+            )
+            
+            status_code = 201 if result['success'] else 400
+            return result, status_code
+            
+        except Exception as e:
+            logger.error(f'Error in create_transactions_batch controller: {e}')
+            return {
+                'success': False,
+                'message': 'Failed to post transaction batch',
+                'data': None
+            }, 500
+    
     @staticmethod
     def create_edit_request():
         """Submit a transaction edit request (Staff/Manager)"""
@@ -454,6 +500,7 @@ class TransactionController:
             data = request.get_json(silent=True) or {}
             page = data.get('page') or request.args.get('page', 1, type=int)
             limit = data.get('limit') or request.args.get('limit', 10, type=int)
+            cursor, approximate_total = get_cursor_params(data)
             transaction_type = data.get('type') or request.args.get('type')
             start_date = data.get('start_date') or request.args.get('start_date')
             end_date = data.get('end_date') or request.args.get('end_date')
@@ -496,7 +543,9 @@ class TransactionController:
                 limit=limit,
                 transaction_type=transaction_type,
                 start_date=start_date,
-                end_date=end_date
+                end_date=end_date,
+                cursor=cursor,
+                approximate_total=approximate_total
             )
             
             status_code = 200 if result['success'] else 400
@@ -522,15 +571,9 @@ class TransactionController:
                 pass  # No restrictions
             # Manager needs transaction view permission
             elif user_role == 'manager':
-                from app.models import UserPermission
-                permission = UserPermission.query.filter_by(
-                    user_id=user_id,
-                    user_type='customer',
-                    module='transactions',
-                    can_view=True
-                ).first()
+                has_permission = PermissionService.manager_can(user_id, 'transactions', 'view')
                 
-                if not permission:
+                if not has_permission:
                     return {
                         'success': False,
                         'message': 'Access denied. You do not have permission to view transactions.',
@@ -548,6 +591,7 @@ class TransactionController:
             data = request.get_json(silent=True) or {}
             page = data.get('page') or request.args.get('page', 1, type=int)
             limit = data.get('limit') or request.args.get('limit', 10, type=int)
+            cursor, approximate_total = get_cursor_params(data)
             transaction_type = data.get('type') or request.args.get('type')
             account_id = data.get('account_id') or request.args.get('account_id')
             customer_id = data.get('customer_id') or request.args.get('customer_id')
@@ -585,7 +629,9 @@ class TransactionController:
                 end_date=end_date,
                 search=search,
                 user_role=user_role,
-                user_id=user_id
+                user_id=user_id,
+                cursor=cursor,
+                approximate_total=approximate_total
             )
             
             status_code = 200 if result['success'] else 400
@@ -611,6 +657,7 @@ class TransactionController:
             account_id = data.get('account_id') or request.args.get('account_id')
             start_date = data.get('start_date') or request.args.get('start_date')
             end_date = data.get('end_date') or request.args.get('end_date')
+            period = data.get('period') or request.args.get('period')
             
             # Convert date strings to datetime objects
             if start_date:
@@ -634,7 +681,8 @@ class TransactionController:
             result = TransactionService.get_transaction_summary(
                 account_id=account_id,
                 start_date=start_date,
-                end_date=end_date
+                end_date=end_date,
+                period=period
             )
             
             status_code = 200 if result['success'] else 400
@@ -648,6 +696,85 @@ class TransactionController:
                 'data': None
             }, 500
     
+    @staticmethod
+    def export_transactions():
+        """Stream transactions for an account, customer or manager as CSV or NDJSON"""
+        try:
+            current_user_id = get_jwt_identity()
+            user_role, user_id = CustomerService.get_user_role_and_id(current_user_id)
+            
+            if not user_role or not user_id:
+                return {
+                    'success': False,
+                    'message': 'User not found or invalid',
+                    'data': None
+                }, 401
+            
+            # Get parameters from request body (POST) or query string (fallback)
+            data = request.get_json(silent=True) or {}
+            scope = data.get('scope') or request.args.get('scope', 'account')
+            scope_id = data.get('id') or request.args.get('id')
+            export_format = (data.get('format') or request.args.get('format', 'csv')).lower()
+            transaction_type = data.get('type') or request.args.get('type')
+            start_date = data.get('start_date') or request.args.get('start_date')
+            end_date = data.get('end_date') or request.args.get('end_date')
+            
+            if export_format not in EXPORT_FORMATS:
+                return {
+                    'success': False,
+                    'message': f"format must be one of: {', '.join(EXPORT_FORMATS)}",
+                    'data': None
+                }, 400
+            
+            # Managers export their own book by default
+            if scope == 'manager' and not scope_id and user_role == 'manager':
+                scope_id = user_id
+            try:
+                scope_id = int(scope_id)
+            except (TypeError, ValueError):
+                return {
+                    'success': False,
+                    'message': 'A numeric id is required for the export scope',
+                    'data': None
+                }, 400
+            
+            # Convert date strings to datetime objects
+            if start_date:
+                from datetime import datetime
+                start_date = datetime.fromisoformat(start_date)
+            if end_date:
+                from datetime import datetime
+                end_date = datetime.fromisoformat(end_date)
+            
+            error, status_code = TransactionExportService.check_access(scope, scope_id, user_role, user_id)
+            if error:
+                return {
+                    'success': False,
+                    'message': error,
+                    'data': None
+                }, status_code
+            
+            query = TransactionExportService.build_query(
+                scope, scope_id,
+                transaction_type=transaction_type,
+                start_date=start_date,
+                end_date=end_date
+            )
+            filename = f'transactions_{scope}_{scope_id}.{export_format}'
+            return Response(
+                stream_with_context(TransactionExportService.stream(query, export_format)),
+                mimetype=EXPORT_FORMATS[export_format],
+                headers={'Content-Disposition': f'attachment; filename={filename}'}
+            )
+            
+        except Exception as e:
+            logger.error(f'Error in export_transactions controller: {e}')
+            return {
+                'success': False,
+                'message': 'Failed to export transactions',
+                'data': None
+            }, 500
+    
     @staticmethod
     def process_loan_repayment():
         """Process loan repayment"""
@@ -754,43 +881,44 @@ class TransactionController:
                 'data': None
             }, 500
     
+    @staticmethod
+    def _bulk_interest_access(user_role, user_id):
+        """None if the caller may run bulk interest, else the (response, status) to return"""
+        if user_role == 'admin':
+            return None  # Admin can always bulk calculate
+        if user_role == 'manager':
+            # Check if manager has permission
+            if PermissionService.manager_can(user_id, 'transactions', 'create'):  # Using can_create as permission to calculate interest
+                return None
+            return {
+                'success': False,
+                'message': 'Access denied. You do not have permission to calculate interest.',
+                'data': None
+            }, 403
+        return {
+            'success': False,
+            'message': 'Access denied. Only admins and managers can bulk calculate interest.',
+            'data': None
+        }, 403
+    
     @staticmethod
     def bulk_calculate_interest_savings():
-        """Bulk calculate interest for all Savings accounts (Admin/Manager only)"""
+        """Queue interest for all Savings accounts (Admin/Manager only); poll the run for progress"""
         try:
-            from app.utils.decorators import admin_required
-            from app.models import UserPermission
-            
             current_user_id = get_jwt_identity()
             user_role, user_id = CustomerService.get_user_role_and_id(current_user_id)
             
-            if user_role == 'admin':
-                pass  # Admin can always bulk calculate
-            elif user_role == 'manager':
-                # Check if manager has permission
-                permission = UserPermission.query.filter_by(
-                    user_id=user_id,
-                    user_type='customer',
-                    module='transactions',
-                    can_create=True  # Using can_create as permission to calculate interest
-                ).first()
-                
-                if not permission:
-                    return {
-                        'success': False,
-                        'message': 'Access denied. You do not have permission to calculate interest.',
-                        'data': None
-                    }, 403
-            else:
-                return {
-                    'success': False,
-                    'message': 'Access denied. Only admins and managers can bulk calculate interest.',
-                    'data': None
-                }, 403
+            denied = TransactionController._bulk_interest_access(user_role, user_id)
+            if denied:
+                return denied
             
-            result = TransactionService.bulk_calculate_interest_for_savings(created_by=user_id)
+            principal = current_principal()
+            result = TransactionService.bulk_calculate_interest_for_savings(
+                created_by=user_id,
+                creator_type=principal.type if principal else PRINCIPAL_USER
+            )
             
-            status_code = 200 if result['success'] else 400
+            status_code = 202 if result['success'] else 400
             return result, status_code
             
         except Exception as e:
@@ -800,3 +928,27 @@ class TransactionController:
                 'message': 'Failed to bulk calculate interest',
                 'data': None
             }, 500
+    
+    @staticmethod
+    def get_savings_interest_run(run_id=None):
+        """Progress of a bulk Savings interest run, or of the latest one (Admin/Manager only)"""
+        try:
+            current_user_id = get_jwt_identity()
+            user_role, user_id = CustomerService.get_user_role_and_id(current_user_id)
+            
+            denied = TransactionController._bulk_interest_access(user_role, user_id)
+            if denied:
+                return denied
+            
+            result = TransactionService.get_savings_interest_run(run_id)
+            
+            status_code = 200 if result['success'] else 404
+            return result, status_code
+            
+        except Exception as e:
+            logger.error(f'Error in get_savings_interest_run controller: {e}')
+            return {
+                'success': False,
+                'message': 'Failed to get interest run',
+                'data': None
+            }, 500
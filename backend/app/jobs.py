@@ -1,11 +1,42 @@
-from app.services.daily_interest import calculate_dds_daily_interest
-from app.services.fd_interest import calculate_fd_interest
-from app.services.rd_interest import calculate_rd_monthly_interest
+from datetime import date
+from flask import current_app
+from app.services.accrual_runner import run_accrual
+from app.services.dashboard_service import DashboardService
+from app.services.email_outbox import drain_outbox
+from app.services.emi_service import EMIService
+from app.services.savings_interest import process_runs
 
 def midnight_interest_job():
-    calculate_dds_daily_interest()
-    calculate_fd_interest()
+    today = date.today()
+    dds_summary = run_accrual('dds', today=today)
+    print("DDS interest summary:", dds_summary)
+    fd_summary = run_accrual('fd', target_date=today)
+    print("FD interest summary:", fd_summary)
 
 # MONTHLY dispatcher only
 def monthly_interest_job():
-    calculate_rd_monthly_interest()
+    today = date.today()
+    # RD interest is only calculated on the 30th
+    if today.day != 30:
+        return
+    rd_summary = run_accrual('rd', today=today)
+    print("RD interest summary:", rd_summary)
+
+# Email outbox delivery (every EMAIL_OUTBOX_POLL_SECONDS)
+def email_outbox_job():
+    drain_outbox(workers=current_app.config['EMAIL_OUTBOX_WORKERS'])
+
+# Dashboard summary deltas written by the posting triggers (every DASHBOARD_FOLD_SECONDS)
+def dashboard_summary_job():
+    DashboardService.fold_summary_deltas()
+
+# Nightly EMI overdue flags for reports and dashboards
+def emi_overdue_job():
+    changed = EMIService.flag_overdue_installments(date.today())
+    print("EMI overdue flags updated:", changed)
+
+# Bulk Savings interest runs queued through the API (every INTEREST_RUN_POLL_SECONDS)
+def savings_interest_job():
+    executed = process_runs()
+    if executed:
+        print("Savings interest runs completed:", executed)
@@ -9,7 +9,11 @@ from .emi_installment import EMIInstallment
 from .transaction_edit_requests import TransactionEditRequest
 from .account_interest_log import AccountInterestLog
 from .rd_installment import RDInstallment
+from .interest_accrual_checkpoint import InterestAccrualCheckpoint
+from .dashboard_summary import DashboardSummary, DashboardSummaryDelta
+from .email_outbox import EmailOutbox
+from .interest_run import InterestRun
 
 
 
-__all__ = ['User', 'Customer', 'Account', 'AccountType', 'UserPermission', 'Transaction', 'AccountParameterUpdate', 'EMIInstallment', 'TransactionEditRequest', 'AccountInterestLog','RDInstallment']
+__all__ = ['User', 'Customer', 'Account', 'AccountType', 'UserPermission', 'Transaction', 'AccountParameterUpdate', 'EMIInstallment', 'TransactionEditRequest', 'AccountInterestLog','RDInstallment', 'InterestAccrualCheckpoint', 'DashboardSummary', 'DashboardSummaryDelta', 'EmailOutbox', 'InterestRun']
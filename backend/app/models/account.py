@@ -62,6 +62,16 @@ class Account(db.Model):
     creator = db.relationship('User', backref='created_accounts', lazy=True)
     # account_type relationship is created by AccountType.accounts backref
     
+    __table_args__ = (
+        # Upcoming-maturity feed reads active accounts in maturity order
+        db.Index('idx_accounts_active_maturity', 'maturity_date',
+                 postgresql_where=db.text("status = 'active' AND maturity_date IS NOT NULL")),
+        db.Index('idx_accounts_status_type', 'status', 'account_type_id'),
+        db.Index('idx_accounts_customer', 'customer_id'),
+        # Account list order / cursor; the key expression of app.utils.pagination.cursor_key
+        db.Index('idx_accounts_cursor', db.text("coalesce(created_at, '1970-01-01 00:00:00.000000')"), 'id'),
+    )
+    
     def get_effective_interest_rate(self):
         """Get effective interest rate (custom or snapshot)"""
         if self.use_custom_parameters and self.custom_interest_rate is not None:
@@ -164,8 +174,22 @@ class Account(db.Model):
         
         return True, "Valid transaction"
     
-    def to_dict(self):
-        """Convert account to dictionary"""
+    def to_dict(self, loan_stats=None):
+        """Convert account to dictionary
+
+        loan_stats: prefetched {'paid_emis_count', 'next_emi_due_date'} for this
+        account (see app.utils.serializers); looked up per account when omitted.
+        """
+        paid_emis_count = 0
+        next_payment_date = None
+        if self.account_type and self.account_type.name == 'Loan':
+            if loan_stats is not None:
+                paid_emis_count = loan_stats.get('paid_emis_count', 0)
+                next_payment_date = loan_stats.get('next_emi_due_date') or self._estimate_next_payment_date()
+            else:
+                paid_emis_count = self.get_paid_emis_count()
+                next_payment_date = self.get_next_payment_date()
+
         return {
             'id': self.id,
             'customer_id': self.customer_id,
@@ -205,8 +229,8 @@ class Account(db.Model):
             'last_payment_date': self.last_payment_date.isoformat() if self.last_payment_date else None,
             'emi_due_day': self.emi_due_day,
             # Calculated loan fields for frontend
-            'paid_emis_count': self.get_paid_emis_count() if self.account_type and self.account_type.name == 'Loan' else 0,
-            'next_payment_date': self.get_next_payment_date().isoformat() if (self.account_type and self.account_type.name == 'Loan' and self.get_next_payment_date()) else None
+            'paid_emis_count': paid_emis_count,
+            'next_payment_date': next_payment_date.isoformat() if next_payment_date else None
         }
     
     def calculate_maturity_amount(self):
@@ -280,6 +304,10 @@ class Account(db.Model):
             return next_emi.due_date
         
         # Fallback to old calculation if no installments exist (for backward compatibility)
+        return self._estimate_next_payment_date()
+    
+    def _estimate_next_payment_date(self):
+        """Next payment date from the repayment frequency, for loans without EMI installments"""
         if not self.snapshot_repayment_frequency:
             return None
         
@@ -352,11 +380,10 @@ class Account(db.Model):
         ).order_by(EMIInstallment.emi_number.asc()).all()
         
         if installments:
-            # Update overdue status before returning
+            # Overdue as of today; the stored flag is only refreshed nightly
             today = datetime.now().date()
             schedule = []
             for installment in installments:
-                installment.update_overdue_status()
                 schedule.append({
                     'emi_number': installment.emi_number,
                     'payment_date': installment.due_date.isoformat() if installment.due_date else None,
@@ -367,15 +394,9 @@ class Account(db.Model):
                     'is_paid': installment.is_paid,
                     'paid_amount': round(installment.paid_amount, 2) if installment.is_paid and installment.paid_amount else 0,
                     'paid_date': installment.paid_date.isoformat() if installment.paid_date else None,
-                    'is_overdue': installment.is_overdue
+                    'is_overdue': installment.is_overdue_on(today)
                 })
             
-            # Commit overdue status updates
-            try:
-                db.session.commit()
-            except:
-                pass
-            
             return schedule
         
         # Fallback to old calculation if no installments exist (for backward compatibility)
@@ -396,15 +417,15 @@ class Account(db.Model):
         if not principal or principal <= 0 or not emi_amount or emi_amount <= 0 or not term_months or term_months <= 0:
             return []
         
-        # Generate schedule using old method (for backward compatibility)
-        schedule = []
-        remaining_principal = principal
+        # Same engine that writes the installments table (app.services.amortization)
+        from app.services.amortization import amortize, due_dates
+        start_date = self.start_date or datetime.now().date()
+        due_day = self.emi_due_day if self.emi_due_day is not None else start_date.day
         monthly_rate = interest_rate / 100 / 12 if interest_rate else 0
-        current_date = self.start_date or datetime.now().date()
-        due_day = self.emi_due_day if self.emi_due_day is not None else current_date.day
+        amortization = amortize(principal, emi_amount, monthly_rate, term_months)
+        payment_dates = due_dates(start_date, self.snapshot_repayment_frequency or 'monthly', due_day, term_months)[0].tolist()
         
         from app.models import Transaction
-        from calendar import monthrange
         
         repayments = Transaction.query.filter_by(
             account_id=self.id,
@@ -424,62 +445,12 @@ class Account(db.Model):
             all_payments.append({'date': payment_date, 'amount': amount})
         all_payments.sort(key=lambda x: x['date'])
         payment_index = 0
+        today = datetime.now().date()
         
-        for emi_number in range(1, term_months + 1):
-            interest_component = remaining_principal * monthly_rate
-            principal_component = emi_amount - interest_component
-            
-            if emi_number == term_months:
-                principal_component = remaining_principal
-                emi_amount_adjusted = principal_component + interest_component
-            else:
-                emi_amount_adjusted = emi_amount
-            
-            # Calculate payment date
-            if emi_number == 1:
-                if self.snapshot_repayment_frequency == 'monthly':
-                    if current_date.month == 12:
-                        payment_date = date(current_date.year + 1, 1, 1)
-                    else:
-                        payment_date = date(current_date.year, current_date.month + 1, 1)
-                    last_day = monthrange(payment_date.year, payment_date.month)[1]
-                    payment_date = payment_date.replace(day=min(due_day, last_day))
-                elif self.snapshot_repayment_frequency == 'quarterly':
-                    if current_date.month <= 9:
-                        payment_date = date(current_date.year, current_date.month + 3, 1)
-                    else:
-                        payment_date = date(current_date.year + 1, current_date.month - 9, 1)
-                    last_day = monthrange(payment_date.year, payment_date.month)[1]
-                    payment_date = payment_date.replace(day=min(due_day, last_day))
-                elif self.snapshot_repayment_frequency == 'weekly':
-                    payment_date = current_date + timedelta(days=7)
-                else:
-                    payment_date = current_date + timedelta(days=30)
-            else:
-                prev_date_obj = datetime.strptime(schedule[-1]['payment_date'], '%Y-%m-%d').date() if isinstance(schedule[-1]['payment_date'], str) else schedule[-1]['payment_date']
-                if self.snapshot_repayment_frequency == 'monthly':
-                    if prev_date_obj.month == 12:
-                        payment_date = date(prev_date_obj.year + 1, 1, 1)
-                    else:
-                        payment_date = date(prev_date_obj.year, prev_date_obj.month + 1, 1)
-                    last_day = monthrange(payment_date.year, payment_date.month)[1]
-                    payment_date = payment_date.replace(day=min(due_day, last_day))
-                elif self.snapshot_repayment_frequency == 'quarterly':
-                    if prev_date_obj.month <= 9:
-                        payment_date = date(prev_date_obj.year, prev_date_obj.month + 3, 1)
-                    else:
-                        payment_date = date(prev_date_obj.year + 1, prev_date_obj.month - 9, 1)
-                    last_day = monthrange(payment_date.year, payment_date.month)[1]
-                    payment_date = payment_date.replace(day=min(due_day, last_day))
-                elif self.snapshot_repayment_frequency == 'weekly':
-                    payment_date = prev_date_obj + timedelta(days=7)
-                else:
-                    if prev_date_obj.month == 12:
-                        payment_date = date(prev_date_obj.year + 1, 1, 1)
-                    else:
-                        payment_date = date(prev_date_obj.year, prev_date_obj.month + 1, 1)
-                    last_day = monthrange(payment_date.year, payment_date.month)[1]
-                    payment_date = payment_date.replace(day=min(due_day, last_day))
+        schedule = []
+        for index in range(int(amortization.count[0])):
+            payment_date = payment_dates[index]
+            emi_amount_adjusted = float(amortization.emi_amount[0, index])
             
             is_paid = False
             paid_amount = 0
@@ -494,24 +465,18 @@ class Account(db.Model):
                         paid_date = payment['date']
                         payment_index += 1
             
-            new_balance = remaining_principal - principal_component
-            
             schedule.append({
-                'emi_number': emi_number,
-                'payment_date': payment_date.isoformat() if isinstance(payment_date, date) else payment_date,
+                'emi_number': index + 1,
+                'payment_date': payment_date.isoformat(),
                 'emi_amount': round(emi_amount_adjusted, 2),
-                'principal_component': round(principal_component, 2),
-                'interest_component': round(interest_component, 2),
-                'remaining_principal': round(new_balance, 2),
+                'principal_component': round(float(amortization.principal_component[0, index]), 2),
+                'interest_component': round(float(amortization.interest_component[0, index]), 2),
+                'remaining_principal': round(float(amortization.remaining_principal_before[0, index] - amortization.principal_component[0, index]), 2),
                 'is_paid': is_paid,
                 'paid_amount': round(paid_amount, 2) if is_paid else 0,
                 'paid_date': paid_date.isoformat() if paid_date else None,
-                'is_overdue': not is_paid and payment_date < datetime.now().date() if isinstance(payment_date, date) else False
+                'is_overdue': not is_paid and payment_date < today
             })
-            
-            remaining_principal = new_balance
-            if remaining_principal <= 0:
-                break
         
         return schedule
     
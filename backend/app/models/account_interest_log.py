@@ -3,13 +3,24 @@ from app import db
 class AccountInterestLog(db.Model):
     __tablename__ = "account_interest_logs"
 
+    # Accrual kinds - at most one log per account, date and kind
+    KIND_DDS_DAILY = 'dds_daily'
+    KIND_FD_DAILY = 'fd_daily'
+    KIND_RD_MONTHLY = 'rd_monthly'
+
     id = db.Column(db.Integer, primary_key=True)
     account_id = db.Column(db.Integer, db.ForeignKey("accounts.id"), nullable=False)
     interest_amount = db.Column(db.Numeric(12, 2), nullable=False)
     balance_before = db.Column(db.Numeric(12, 2), nullable=False)
     balance_after = db.Column(db.Numeric(12, 2), nullable=False)
     calculated_date = db.Column(db.Date, nullable=False)  # The date the interest is applied
+    kind = db.Column(db.String(20), nullable=False)  # dds_daily, fd_daily, rd_monthly
     created_at = db.Column(db.DateTime, server_default=db.func.now())
 
     # <-- add this relationship
-    account = db.relationship("Account", backref="interest_logs", lazy="joined")
\ No newline at end of file
+    account = db.relationship("Account", backref="interest_logs", lazy="joined")
+
+    # Re-runs and concurrent runs of an accrual job must not log (or credit) twice
+    __table_args__ = (
+        db.UniqueConstraint('account_id', 'calculated_date', 'kind', name='uq_interest_log_account_date_kind'),
+    )
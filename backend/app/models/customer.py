@@ -13,6 +13,7 @@ class Customer(db.Model):
     role = db.Column(db.String(20), nullable=False, default='staff')  # staff or manager
     password_hash = db.Column(db.String(255), nullable=False)
     is_active = db.Column(db.Boolean, nullable=False, default=True)  # <-- new field
+    permissions_version = db.Column(db.Integer, nullable=False, default=1, server_default='1')  # Bumped when a manager's UserPermission rows change
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     last_update_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)  # For admin updates
     last_update_by_manager_id = db.Column(db.Integer, db.ForeignKey('customers.id'), nullable=True)  # For manager updates
@@ -32,6 +33,12 @@ class Customer(db.Model):
     address_pincode = db.Column(db.String(10), nullable=True)
     # Note: creator and last_updater backrefs are defined in User model
     
+    __table_args__ = (
+        db.Index('idx_customers_manager_role', 'assigned_manager_id', 'role'),
+        # Customer list order / cursor; the key expression of app.utils.pagination.cursor_key
+        db.Index('idx_customers_cursor', db.text("coalesce(created_at, '1970-01-01 00:00:00.000000')"), 'id'),
+    )
+    
     def set_password(self, password):
         """Hash and set password"""
         self.password_hash = generate_password_hash(password)
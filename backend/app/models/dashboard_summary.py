@@ -0,0 +1,53 @@
+from app import db
+
+
+class DashboardSummary(db.Model):
+    """
+    Running dashboard totals per account type and assigned manager.
+
+    Maintained by database triggers on accounts, transactions and customers
+    (see migrations add_dashboard_summaries and add_dashboard_summary_deltas),
+    so every write path - ORM or bulk SQL - records its change in the same
+    transaction. The triggers append DashboardSummaryDelta rows rather than
+    updating these rows, so concurrent postings never wait on a shared summary
+    row; the job process folds the deltas in (DashboardService.
+    fold_summary_deltas), and readers add any not yet folded. Rebuild with
+    DashboardService.rebuild_summaries() if it is ever suspected to drift.
+    """
+    __tablename__ = 'dashboard_summaries'
+
+    # manager_id for customers without an assigned manager
+    UNASSIGNED = 0
+
+    id = db.Column(db.Integer, primary_key=True)
+    account_type_id = db.Column(db.Integer, db.ForeignKey('account_types.id', ondelete='CASCADE'), nullable=False)
+    manager_id = db.Column(db.Integer, nullable=False, default=UNASSIGNED)  # customers.assigned_manager_id
+    active_accounts = db.Column(db.Integer, nullable=False, default=0)
+    total_balance = db.Column(db.Numeric, nullable=False, default=0)  # Balance of active accounts
+    total_deposits = db.Column(db.Numeric, nullable=False, default=0)  # Completed deposit/interest/loan_disbursal
+    total_withdrawals = db.Column(db.Numeric, nullable=False, default=0)  # Completed withdrawal/penalty/loan_repayment
+    pending_transactions = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('account_type_id', 'manager_id', name='uq_dashboard_summary_type_manager'),
+    )
+
+    def __repr__(self):
+        return f'<DashboardSummary type={self.account_type_id} manager={self.manager_id}>'
+
+
+class DashboardSummaryDelta(db.Model):
+    """A change to one DashboardSummary row, written by the triggers and not yet folded in"""
+    __tablename__ = 'dashboard_summary_deltas'
+
+    id = db.Column(db.BigInteger, primary_key=True)
+    account_type_id = db.Column(db.Integer, db.ForeignKey('account_types.id', ondelete='CASCADE'), nullable=False)
+    manager_id = db.Column(db.Integer, nullable=False, default=DashboardSummary.UNASSIGNED)
+    active_accounts = db.Column(db.Integer, nullable=False, default=0)
+    total_balance = db.Column(db.Numeric, nullable=False, default=0)
+    total_deposits = db.Column(db.Numeric, nullable=False, default=0)
+    total_withdrawals = db.Column(db.Numeric, nullable=False, default=0)
+    pending_transactions = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<DashboardSummaryDelta type={self.account_type_id} manager={self.manager_id}>'
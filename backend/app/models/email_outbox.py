@@ -0,0 +1,43 @@
+from app import db
+from datetime import datetime
+
+class EmailOutbox(db.Model):
+    """
+    Outgoing email, written in the same database transaction as the change it
+    reports and delivered later by the outbox worker (app.services.email_outbox)
+    """
+    __tablename__ = 'email_outbox'
+
+    id = db.Column(db.Integer, primary_key=True)
+    to_email = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    html_body = db.Column(db.Text, nullable=True)  # Cleared once delivered or dead (may hold credentials)
+    text_body = db.Column(db.Text, nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, sending, sent, skipped, dead
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # Retry time, or lease expiry while sending
+    claim_token = db.Column(db.String(32), nullable=True)  # Runner holding the lease while sending
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    # The worker polls for due messages
+    __table_args__ = (
+        db.Index('idx_email_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'to_email': self.to_email,
+            'subject': self.subject,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None
+        }
+
+    def __repr__(self):
+        return f'<EmailOutbox {self.id} {self.status} to {self.to_email}>'
@@ -1,5 +1,5 @@
 from app import db
-from datetime import datetime, date
+from datetime import datetime
 from sqlalchemy import CheckConstraint
 
 class EMIInstallment(db.Model):
@@ -20,7 +20,7 @@ class EMIInstallment(db.Model):
     paid_amount = db.Column(db.Float, nullable=True)  # Actual amount paid (may differ from emi_amount)
     paid_date = db.Column(db.Date, nullable=True)  # When payment was made
     transaction_id = db.Column(db.Integer, db.ForeignKey('transactions.id'), nullable=True)  # Link to transaction
-    is_overdue = db.Column(db.Boolean, default=False, nullable=False)  # Calculated field
+    is_overdue = db.Column(db.Boolean, default=False, nullable=False)  # Set nightly by EMIService.flag_overdue_installments
     
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -33,14 +33,14 @@ class EMIInstallment(db.Model):
     # Unique constraint: one EMI installment per account per EMI number
     __table_args__ = (
         db.UniqueConstraint('account_id', 'emi_number', name='uq_account_emi_number'),
+        # Overdue-EMI feed: unpaid installments in due date order
+        db.Index('idx_emi_paid_due_date', 'is_paid', 'due_date'),
+        db.Index('idx_emi_account_paid_due_date', 'account_id', 'is_paid', 'due_date'),
     )
     
-    def update_overdue_status(self):
-        """Update overdue status based on current date and due date"""
-        if not self.is_paid and self.due_date:
-            self.is_overdue = date.today() > self.due_date
-        else:
-            self.is_overdue = False
+    def is_overdue_on(self, day):
+        """Whether this installment is overdue on `day` (does not touch is_overdue)"""
+        return not self.is_paid and self.due_date is not None and day > self.due_date
     
     def mark_as_paid(self, paid_amount, paid_date, transaction_id=None):
         """Mark this EMI installment as paid"""
@@ -0,0 +1,44 @@
+from app import db
+from datetime import datetime
+
+class InterestAccrualCheckpoint(db.Model):
+    """Progress marker for a chunked interest accrual run, so a crashed run can resume"""
+    __tablename__ = 'interest_accrual_checkpoints'
+
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.String(36), nullable=False, unique=True)
+    job_name = db.Column(db.String(30), nullable=False)  # e.g. 'fd_daily'
+    run_date = db.Column(db.Date, nullable=False)  # Date interest is being accrued up to
+    first_account_id = db.Column(db.Integer, nullable=False, default=1)  # Start of the id range this run covers
+    last_account_id = db.Column(db.Integer, nullable=False, default=0)  # Last account committed (range end once completed)
+    accounts_processed = db.Column(db.Integer, nullable=False, default=0)
+    accounts_skipped = db.Column(db.Integer, nullable=False, default=0)
+    total_interest = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    status = db.Column(db.String(20), nullable=False, default='running')  # running, completed
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # One checkpoint per job, accrual date and range start; shard runs of the same
+    # date share the job name, so a restart with different shards can resume
+    # from whatever [first_account_id, last_account_id] spans are already done
+    __table_args__ = (
+        db.UniqueConstraint('job_name', 'run_date', 'first_account_id', name='uq_accrual_checkpoint_job_date_first'),
+    )
+
+    def to_dict(self):
+        return {
+            'run_id': self.run_id,
+            'job_name': self.job_name,
+            'run_date': self.run_date.isoformat() if self.run_date else None,
+            'first_account_id': self.first_account_id,
+            'last_account_id': self.last_account_id,
+            'accounts_processed': self.accounts_processed,
+            'accounts_skipped': self.accounts_skipped,
+            'total_interest': float(self.total_interest or 0),
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def __repr__(self):
+        return f'<InterestAccrualCheckpoint {self.job_name} {self.run_date} @ {self.last_account_id}>'
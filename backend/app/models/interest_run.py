@@ -0,0 +1,54 @@
+from app import db
+from datetime import datetime
+
+class InterestRun(db.Model):
+    """
+    A bulk interest run requested through the API and carried out by the job
+    process (app.services.savings_interest), with its progress and outcome
+    """
+    __tablename__ = 'interest_runs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_name = db.Column(db.String(30), nullable=False)  # e.g. 'savings'
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, completed, failed
+    run_date = db.Column(db.Date, nullable=False)  # Date interest is calculated up to
+    requested_by = db.Column(db.Integer, nullable=False)  # Recorded as created_by on the interest transactions
+    requested_by_type = db.Column(db.String(20), nullable=False, default='user')  # user, customer
+    last_account_id = db.Column(db.Integer, nullable=False, default=0)  # Last account committed, for resuming
+    accounts_total = db.Column(db.Integer, nullable=True)  # Accounts due when the run started
+    accounts_processed = db.Column(db.Integer, nullable=False, default=0)
+    accounts_skipped = db.Column(db.Integer, nullable=False, default=0)  # Due, but no interest to credit
+    total_interest = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Heartbeat while running
+
+    # The job process polls for queued (and abandoned) runs
+    __table_args__ = (
+        db.Index('idx_interest_runs_status_created_at', 'status', 'created_at'),
+    )
+
+    def to_dict(self):
+        done = self.accounts_processed + self.accounts_skipped
+        return {
+            'id': self.id,
+            'job_name': self.job_name,
+            'status': self.status,
+            'run_date': self.run_date.isoformat() if self.run_date else None,
+            'requested_by': self.requested_by,
+            'accounts_total': self.accounts_total,
+            'accounts_processed': self.accounts_processed,
+            'accounts_skipped': self.accounts_skipped,
+            'progress': round(100 * done / self.accounts_total, 1) if self.accounts_total else (100.0 if self.status == 'completed' else 0.0),
+            'total_interest': float(self.total_interest or 0),
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def __repr__(self):
+        return f'<InterestRun {self.id} {self.job_name} {self.status}>'
@@ -7,3 +7,7 @@ class RDInstallment(db.Model):
     account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), nullable=False)
     amount = db.Column(db.Float, nullable=False)
     deposit_date = db.Column(db.Date, nullable=False)
+
+    __table_args__ = (
+        db.Index('idx_rd_installments_account_date', 'account_id', 'deposit_date'),
+    )
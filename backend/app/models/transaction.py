@@ -22,6 +22,13 @@ class Transaction(db.Model):
     # Relationships
     account = db.relationship('Account', backref='transactions', lazy=True)
     
+    __table_args__ = (
+        db.Index('idx_transactions_account_created', 'account_id', 'created_at'),
+        db.Index('idx_transactions_status', 'status'),
+        # Transaction list order / cursor; the key expression of app.utils.pagination.cursor_key
+        db.Index('idx_transactions_cursor', db.text("coalesce(created_at, '1970-01-01 00:00:00.000000')"), 'id'),
+    )
+    
     @property
     def creator(self):
         """Get creator object based on creator_type"""
@@ -21,6 +21,10 @@ class UserPermission(db.Model):
     creator = db.relationship('User', foreign_keys=[created_by], backref='created_permissions')
     last_updater = db.relationship('User', foreign_keys=[last_update_by], backref='updated_permissions')
     
+    __table_args__ = (
+        db.Index('idx_user_permissions_user_module', 'user_id', 'user_type', 'module'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
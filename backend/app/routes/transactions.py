@@ -2,7 +2,7 @@ from flask import Blueprint
 from flask_jwt_extended import jwt_required
 from app.controllers.transaction_controller import TransactionController
 from app.services.payment_simulation_service import PaymentSimulationService
-from app.utils.decorators import admin_required
+from app.utils.decorators import admin_required, manager_or_admin_required
 
 transaction_bp = Blueprint('transactions', __name__)
 
@@ -13,6 +13,13 @@ def create_transaction():
     """Create a new transaction"""
     return TransactionController.create_transaction()
 
+@transaction_bp.route('/batch', methods=['POST'])
+@jwt_required()
+@manager_or_admin_required
+def create_transactions_batch():
+    """Post a batch of deposits/withdrawals in one go (Admin/Manager only)"""
+    return TransactionController.create_transactions_batch()
+
 @transaction_bp.route('/edit-request', methods=['POST'])
 @jwt_required()
 def create_edit_request():
@@ -71,6 +78,12 @@ def get_transaction_summary():
     """Get transaction summary statistics"""
     return TransactionController.get_transaction_summary()
 
+@transaction_bp.route('/export', methods=['POST'])
+@jwt_required()
+def export_transactions():
+    """Stream an account, customer or manager transaction export (CSV / NDJSON)"""
+    return TransactionController.export_transactions()
+
 
 @transaction_bp.route('/loan-repayment', methods=['POST'])
 @jwt_required()
@@ -90,6 +103,18 @@ def bulk_calculate_interest_savings():
     """Bulk calculate interest for all Savings accounts (Admin/Manager only)"""
     return TransactionController.bulk_calculate_interest_savings()
 
+@transaction_bp.route('/bulk-calculate-interest-savings/runs/latest', methods=['POST'])
+@jwt_required()
+def get_latest_savings_interest_run():
+    """Progress of the latest bulk Savings interest run (Admin/Manager only)"""
+    return TransactionController.get_savings_interest_run()
+
+@transaction_bp.route('/bulk-calculate-interest-savings/runs/<int:run_id>', methods=['POST'])
+@jwt_required()
+def get_savings_interest_run(run_id):
+    """Progress of a bulk Savings interest run (Admin/Manager only)"""
+    return TransactionController.get_savings_interest_run(run_id)
+
 # Payment simulation routes (for testing without payment gateway)
 @transaction_bp.route('/simulate-deposit', methods=['POST'])
 @jwt_required()
@@ -1,3 +1,243 @@
+import logging
+import sys
+import time
+import zlib
+import click
 from flask_apscheduler import APScheduler
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
 
 scheduler = APScheduler()
+
+
+def _lock_key(name):
+    """Stable 32-bit advisory lock key for a name (same value in every process)"""
+    return zlib.crc32(f'minibank:{name}'.encode())
+
+
+# Held for as long as a process is the job runner
+LEADER_LOCK_KEY = _lock_key('scheduler-leader')
+
+# Seconds between leadership checks (and acquisition retries while on standby)
+DEFAULT_HEARTBEAT_SECONDS = 30
+
+
+class AdvisoryLock:
+    """
+    PostgreSQL session-level advisory lock on a dedicated connection.
+
+    The lock lives exactly as long as the connection, so a runner that crashes
+    or loses its database connection gives up the lock automatically and a
+    standby process can take over.
+    """
+
+    def __init__(self, engine, key):
+        self.engine = engine
+        self.key = key
+        self.connection = None
+
+    def try_acquire(self):
+        """Take the lock without waiting. Returns True if this process now holds it."""
+        if self.connection is not None:
+            return True
+        connection = self.engine.connect().execution_options(isolation_level='AUTOCOMMIT')
+        try:
+            acquired = connection.execute(
+                text('SELECT pg_try_advisory_lock(:key)'), {'key': self.key}
+            ).scalar()
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return False
+        self.connection = connection
+        return True
+
+    def is_held(self):
+        """Check that the lock connection is still alive (the lock goes with it)"""
+        if self.connection is None:
+            return False
+        try:
+            self.connection.execute(text('SELECT 1'))
+            return True
+        except Exception as e:
+            logger.error(f'Lost connection holding advisory lock {self.key}: {e}')
+            self._close()
+            return False
+
+    def release(self):
+        if self.connection is None:
+            return
+        try:
+            self.connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': self.key})
+        except Exception as e:
+            logger.warning(f'Could not release advisory lock {self.key}: {e}')
+        finally:
+            self._close()
+
+    def _close(self):
+        try:
+            self.connection.invalidate()
+            self.connection.close()
+        except Exception:
+            pass
+        self.connection = None
+
+    def __enter__(self):
+        return self.try_acquire()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+def _locked_job(app, job_id, func):
+    """
+    Wrap a job so it runs in an app context and only in the process that wins
+    the job's advisory lock. Another process firing the same job at the same
+    time skips it instead of running it twice.
+    """
+    from app import db
+
+    def wrapper():
+        with app.app_context():
+            with AdvisoryLock(db.engine, _lock_key(f'job:{job_id}')) as acquired:
+                if not acquired:
+                    logger.info(f'Job {job_id} is already running in another process, skipping')
+                    return
+                print(f"Running scheduled job {job_id}...")
+                func()
+
+    return wrapper
+
+
+def _app_job(app, func):
+    """Wrap a job that is safe to run in several processes at once so it runs in an app context"""
+    def wrapper():
+        with app.app_context():
+            func()
+
+    return wrapper
+
+
+def init_scheduler(app):
+    """Start APScheduler in this process and register the interest, EMI and email jobs"""
+    from app.jobs import (
+        midnight_interest_job, monthly_interest_job, emi_overdue_job, savings_interest_job, email_outbox_job,
+        dashboard_summary_job
+    )
+
+    scheduler.init_app(app)
+    scheduler.start()
+
+    # Daily interest jobs (DDS + FD)
+    scheduler.add_job(
+        id='dds_daily_interest',
+        func=_locked_job(app, 'dds_daily_interest', midnight_interest_job),
+        trigger='cron',
+        hour=0,
+        minute=1
+    )
+
+    # Monthly RD job
+    scheduler.add_job(
+        id='rd_monthly_job',
+        func=_locked_job(app, 'rd_monthly_job', monthly_interest_job),
+        trigger='cron',
+        day=30,
+        hour=0,
+        minute=1
+    )
+
+    # Nightly EMI overdue flags (one UPDATE over the unpaid installments)
+    scheduler.add_job(
+        id='emi_overdue_flags',
+        func=_locked_job(app, 'emi_overdue_flags', emi_overdue_job),
+        trigger='cron',
+        hour=0,
+        minute=5
+    )
+
+    # Savings interest runs requested through the API; claimed with SKIP LOCKED
+    scheduler.add_job(
+        id='savings_interest_runs',
+        func=_app_job(app, savings_interest_job),
+        trigger='interval',
+        seconds=app.config['INTEREST_RUN_POLL_SECONDS']
+    )
+
+    # Email outbox; claims rows with SKIP LOCKED, so no job lock is needed
+    scheduler.add_job(
+        id='email_outbox',
+        func=_app_job(app, email_outbox_job),
+        trigger='interval',
+        seconds=app.config['EMAIL_OUTBOX_POLL_SECONDS']
+    )
+
+    # Dashboard summary deltas; each delta row is deleted (and folded) exactly once
+    scheduler.add_job(
+        id='dashboard_summary_fold',
+        func=_app_job(app, dashboard_summary_job),
+        trigger='interval',
+        seconds=app.config['DASHBOARD_FOLD_SECONDS']
+    )
+
+
+def register_job_commands(app):
+    """Register `flask run-jobs` (the dedicated job process), `flask drain-outbox` and `flask generate-emi-schedules`"""
+
+    @app.cli.command('drain-outbox')
+    def drain_outbox_command():
+        """Deliver all due emails in the outbox once and exit."""
+        from app.services.email_outbox import drain_outbox
+
+        summary = drain_outbox(workers=app.config['EMAIL_OUTBOX_WORKERS'])
+        print(f"Email outbox: {summary}")
+
+    @app.cli.command('generate-emi-schedules')
+    @click.option('--regenerate', is_flag=True,
+                  help='Rebuild existing schedules that have no paid installment yet.')
+    def generate_emi_schedules_command(regenerate):
+        """Generate EMI installments for every active loan account that lacks them."""
+        from app.services.emi_service import EMIService
+
+        result = EMIService.generate_emi_installments_bulk(regenerate=regenerate)
+        print(f"EMI schedules: {result['message']} ({result['data']})" if result['success'] else result['message'])
+
+    @app.cli.command('run-jobs')
+    @click.option('--heartbeat', default=DEFAULT_HEARTBEAT_SECONDS, show_default=True,
+                  help='Seconds between leadership checks.')
+    def run_jobs(heartbeat):
+        """Run the interest job scheduler (only one process in the cluster is active)."""
+        from app import db
+
+        leader = AdvisoryLock(db.engine, LEADER_LOCK_KEY)
+        announced = False
+        while True:
+            try:
+                if leader.try_acquire():
+                    break
+            except Exception as e:
+                logger.error(f'Could not reach the database for scheduler leadership: {e}')
+            if not announced:
+                print("Another process is running the jobs, waiting on standby...")
+                announced = True
+            time.sleep(heartbeat)
+
+        print("Acquired scheduler leadership, starting jobs")
+        if not scheduler.running:  # already started when SCHEDULER_IN_WEB is set
+            init_scheduler(app)
+        try:
+            while leader.is_held():
+                time.sleep(heartbeat)
+        except KeyboardInterrupt:
+            print("Stopping job runner...")
+            return
+        finally:
+            scheduler.shutdown(wait=False)
+            leader.release()
+
+        # Exit non-zero so the process manager restarts us as a standby
+        print("Lost scheduler leadership, exiting")
+        sys.exit(1)
@@ -1,10 +1,16 @@
 from app import db
 from app.models import Account, AccountType, Customer, User, AccountParameterUpdate, Transaction, RDInstallment
+from app.utils.serializers import serialize_accounts
+from app.utils.pagination import keyset_page, cursor_pagination
+from app.services.ledger import lock_account
+from app.services.permission_service import PermissionService
+from app.services.account_type_catalog import AccountTypeCatalog
+from app.services.daily_interest import EFFECTIVE_RATE_SQL
 from datetime import datetime, timedelta
+from sqlalchemy import text
 from sqlalchemy.orm import joinedload
 import logging
 import os
-import threading
 from app.services.premature_account_service import calculate_premature_closure
 from app.services.premature_account_service import calculate_fd_maturity
 from app.services.premature_account_service import calculate_fd_premature
@@ -16,6 +22,53 @@ from app.services.premature_account_service import calculate_rd_premature_closur
 
 logger = logging.getLogger(__name__)
 
+# Active accounts of one type with their current effective interest rate
+_RATED_ACCOUNTS_SQL = f"""
+    SELECT a.id, a.balance, {EFFECTIVE_RATE_SQL} AS old_rate
+    FROM accounts a
+    JOIN account_types t ON t.id = a.account_type_id
+    WHERE a.account_type_id = :account_type_id
+      AND a.status = 'active'
+"""
+
+# One round trip: lock the type's active accounts, switch the ones whose rate
+# differs to the new custom rate, and log each change from the UPDATE's
+# RETURNING rows (old rate included) with a single INSERT ... SELECT
+BULK_RATE_CHANGE_SQL = text(f"""
+    WITH rated AS (
+        {_RATED_ACCOUNTS_SQL}
+        FOR UPDATE OF a
+    ),
+    changed AS (
+        UPDATE accounts a
+        SET use_custom_parameters = true,
+            custom_interest_rate = :new_rate,
+            updated_at = (now() AT TIME ZONE 'utc')
+        FROM rated
+        WHERE a.id = rated.id
+          AND rated.old_rate IS DISTINCT FROM :new_rate
+        RETURNING a.id, rated.old_rate
+    ),
+    logged AS (
+        INSERT INTO account_parameter_updates
+            (account_id, updated_by, parameter_name, old_value, new_value, reason, created_at)
+        SELECT id, :updated_by, 'interest_rate', old_rate::text, :new_value, :reason, (now() AT TIME ZONE 'utc')
+        FROM changed
+        RETURNING account_id
+    )
+    SELECT (SELECT COUNT(*) FROM rated) AS total_accounts,
+           (SELECT COUNT(*) FROM logged) AS updated_count
+""")
+
+# Dry run of BULK_RATE_CHANGE_SQL: what would change, and the change in a year's
+# simple interest on current balances
+BULK_RATE_PREVIEW_SQL = text(f"""
+    SELECT COUNT(*) AS total_accounts,
+           COUNT(*) FILTER (WHERE rated.old_rate IS DISTINCT FROM :new_rate) AS updated_count,
+           COALESCE(SUM(rated.balance * (:new_rate - rated.old_rate) / 100.0), 0) AS annual_interest_delta
+    FROM ({_RATED_ACCOUNTS_SQL}) rated
+""")
+
 class AccountService:
     @staticmethod
     def is_leap_year(year):
@@ -52,7 +105,7 @@ class AccountService:
                 }
             
             # Validate account type exists and is active
-            account_type = AccountType.query.get(account_type_id)
+            account_type = AccountTypeCatalog.get(account_type_id)
             if not account_type or not account_type.is_active:
                 return {
                     'success': False,
@@ -381,6 +434,11 @@ class AccountService:
                     account.balance = -loan_principal
             
             db.session.add(account)
+            db.session.flush()
+            
+            # Queue the welcome-to-your-account email with the account itself
+            AccountService._queue_account_creation_email(account, account_type, customer, interest_rate_to_use)
+            
             db.session.commit()
 
             # Create first RD installment if initial deposit is provided
@@ -472,82 +530,6 @@ class AccountService:
                     # Rollback only the transaction creation attempt
                     db.session.rollback()
             
-            # Send account creation email notification (non-blocking background thread)
-            # Import Flask app to create application context in thread
-            from flask import current_app
-            
-            # Capture the app instance before starting the thread
-            app = current_app._get_current_object()
-            
-            def send_account_email_async():
-                # Push Flask application context for the thread
-                with app.app_context():
-                    try:
-                        from app.services.email_service import EmailService
-                        from datetime import date
-                        
-                        # Prepare account details for email
-                        account_details = {
-                            'balance': account.balance if account.balance >= 0 else abs(account.balance),
-                            'interest_rate': interest_rate_to_use
-                        }
-                        
-                        # Add account-specific details
-                        if account_type.name == 'Loan':
-                            if account.snapshot_emi_amount:
-                                account_details['emi_amount'] = account.snapshot_emi_amount
-                            if account.snapshot_loan_term_months:
-                                account_details['term_months'] = account.snapshot_loan_term_months
-                            if account.emi_due_day:
-                                account_details['emi_due_day'] = account.emi_due_day
-                        
-                        elif account_type.name == 'RD':
-                            if account.snapshot_min_contribution_amount:
-                                account_details['contribution_amount'] = account.snapshot_min_contribution_amount
-                            if account.rd_contribution_day:
-                                account_details['contribution_day'] = account.rd_contribution_day
-                            if account.snapshot_lock_in_period_days:
-                                account_details['term_days'] = account.snapshot_lock_in_period_days
-                        
-                        elif account_type.name == 'FD':
-                            if account.snapshot_lock_in_period_days:
-                                account_details['term_days'] = account.snapshot_lock_in_period_days
-                            if account.maturity_date:
-                                if isinstance(account.maturity_date, date):
-                                    account_details['maturity_date'] = account.maturity_date.strftime('%Y-%m-%d')
-                                else:
-                                    account_details['maturity_date'] = str(account.maturity_date)
-                        
-                        elif account_type.name == 'DDS':
-                            if account.snapshot_lock_in_period_days:
-                                account_details['term_days'] = account.snapshot_lock_in_period_days
-                            if account.maturity_date:
-                                if isinstance(account.maturity_date, date):
-                                    account_details['maturity_date'] = account.maturity_date.strftime('%Y-%m-%d')
-                                else:
-                                    account_details['maturity_date'] = str(account.maturity_date)
-                        
-                        frontend_url = os.environ.get('FRONTEND_URL', 'https://mini-bank-project.vercel.app')
-                        login_url = f"{frontend_url}/login"
-                        
-                        EmailService.send_account_creation_email(
-                            customer_email=customer.email,
-                            customer_name=customer.name,
-                            account_type=account_type.name,
-                            account_id=account.id,
-                            account_details=account_details,
-                            login_url=login_url
-                        )
-                        logger.info(f'Account creation email sent to {customer.email} for account {account.id}')
-                    except Exception as email_error:
-                        # Don't fail account creation if email fails
-                        logger.error(f'Error sending account creation email to {customer.email}: {email_error}')
-            
-            # Start email sending in background thread
-            email_thread = threading.Thread(target=send_account_email_async, daemon=True)
-            email_thread.start()
-            logger.info(f'Account creation email sending started in background thread for account {account.id}')
-            
             return {
                 'success': True,
                 'message': 'Account created successfully',
@@ -563,6 +545,60 @@ class AccountService:
                 'data': None
             }
     
+    @staticmethod
+    def _queue_account_creation_email(account, account_type, customer, interest_rate):
+        """Queue the account creation email in the current DB transaction"""
+        from app.services.email_service import EmailService
+        from datetime import date
+        
+        if not customer.email:
+            logger.warning(f'Customer {customer.id} has no email, skipping account creation email')
+            return
+        
+        # Prepare account details for email
+        account_details = {
+            'balance': account.balance if account.balance >= 0 else abs(account.balance),
+            'interest_rate': interest_rate
+        }
+        
+        # Add account-specific details
+        if account_type.name == 'Loan':
+            if account.snapshot_emi_amount:
+                account_details['emi_amount'] = account.snapshot_emi_amount
+            if account.snapshot_loan_term_months:
+                account_details['term_months'] = account.snapshot_loan_term_months
+            if account.emi_due_day:
+                account_details['emi_due_day'] = account.emi_due_day
+        
+        elif account_type.name == 'RD':
+            if account.snapshot_min_contribution_amount:
+                account_details['contribution_amount'] = account.snapshot_min_contribution_amount
+            if account.rd_contribution_day:
+                account_details['contribution_day'] = account.rd_contribution_day
+            if account.snapshot_lock_in_period_days:
+                account_details['term_days'] = account.snapshot_lock_in_period_days
+        
+        elif account_type.name in ['FD', 'DDS']:
+            if account.snapshot_lock_in_period_days:
+                account_details['term_days'] = account.snapshot_lock_in_period_days
+            if account.maturity_date:
+                if isinstance(account.maturity_date, date):
+                    account_details['maturity_date'] = account.maturity_date.strftime('%Y-%m-%d')
+                else:
+                    account_details['maturity_date'] = str(account.maturity_date)
+        
+        frontend_url = os.environ.get('FRONTEND_URL', 'https://mini-bank-project.vercel.app')
+        
+        EmailService.send_account_creation_email(
+            customer_email=customer.email,
+            customer_name=customer.name,
+            account_type=account_type.name,
+            account_id=account.id,
+            account_details=account_details,
+            login_url=f"{frontend_url}/login",
+            queue=True
+        )
+    
     @staticmethod
     def activate_loan_account(account_id, loan_amount, created_by, loan_term_months=None):
         """Activate an existing loan account by setting loan parameters and balance"""
@@ -663,8 +699,8 @@ class AccountService:
             }
     
     @staticmethod
-    def get_accounts(user_role, user_id=None, page=1, limit=10, search='', account_type_filter='', status_filter=''):
-        """Get accounts with pagination and filters based on user role"""
+    def get_accounts(user_role, user_id=None, page=1, limit=10, search='', account_type_filter='', status_filter='', cursor=None, approximate_total=False):
+        """Get accounts with pagination and filters based on user role (cursor mode when cursor is not None)"""
         try:
             if user_role == 'admin':
                 # Admin can see all accounts
@@ -696,6 +732,16 @@ class AccountService:
             # Sort by creation date (oldest first)
             query = query.order_by(Account.created_at.asc())
             
+            # Cursor mode: seek past the last row seen instead of counting and offsetting
+            if cursor is not None:
+                accounts, next_cursor = keyset_page(query, Account, cursor, limit, descending=False)
+                return {
+                    'success': True,
+                    'message': 'Accounts retrieved successfully',
+                    'data': serialize_accounts(accounts),
+                    'pagination': cursor_pagination(query, next_cursor, limit, approximate_total)
+                }
+            
             # Get total count for pagination
             total_count = query.count()
             
@@ -711,7 +757,7 @@ class AccountService:
             return {
                 'success': True,
                 'message': 'Accounts retrieved successfully',
-                'data': [account.to_dict() for account in accounts],
+                'data': serialize_accounts(accounts),
                 'pagination': {
                     'current_page': page,
                     'total_pages': total_pages,
@@ -722,6 +768,8 @@ class AccountService:
                 }
             }
             
+        except ValueError as e:
+            return {'success': False, 'message': str(e), 'data': None}
         except Exception as e:
             logger.error(f'Error getting accounts: {e}')
             return {
@@ -832,7 +880,7 @@ class AccountService:
     def get_customer_accounts(customer_id, user_role, user_id=None):
         """Get all accounts for a specific customer"""
         try:
-            from app.models import Customer, UserPermission
+            from app.models import Customer
             
             # Check if user can access this customer's accounts
             if user_role == 'staff':
@@ -844,14 +892,9 @@ class AccountService:
                     }
             elif user_role == 'manager':
                 # Check if manager has permission to view customers
-                permission = UserPermission.query.filter_by(
-                    user_id=user_id,
-                    user_type='customer',
-                    module='customers_management',
-                    can_view=True
-                ).first()
+                has_permission = PermissionService.manager_can(user_id, 'customers_management', 'view')
                 
-                if not permission:
+                if not has_permission:
                     return {
                         'success': False,
                         'message': 'Access denied - No permission',
@@ -871,8 +914,7 @@ class AccountService:
             accounts = Account.query.options(joinedload(Account.account_type)).filter_by(customer_id=customer_id).order_by(Account.created_at.asc()).all()
 
             account_list = []
-            for acc in accounts:
-                acc_dict = acc.to_dict()
+            for acc, acc_dict in zip(accounts, serialize_accounts(accounts)):
                 if acc.account_type:
                     acc_dict['account_type'] = {
                         'name': acc.account_type.name.lower(),       # lowercase for internal use
@@ -950,58 +992,71 @@ class AccountService:
             }
     
     @staticmethod
-    def bulk_update_account_type_interest_rate(account_type_id, new_rate, updated_by, reason=None):
-        """Bulk update interest rate for all active accounts of a specific type"""
+    def bulk_update_account_type_interest_rate(account_type_id, new_rate, updated_by, reason=None, dry_run=False):
+        """
+        Bulk update interest rate for all active accounts of a specific type.
+        
+        Runs as one set-based statement (BULK_RATE_CHANGE_SQL). With dry_run the
+        accounts are only counted and the projected change in annual interest
+        is returned; nothing is written.
+        """
         try:
-            accounts = Account.query.filter_by(
-                account_type_id=account_type_id,
-                status='active'
-            ).all()
+            account_type = AccountTypeCatalog.get(account_type_id)
+            if not account_type:
+                return {
+                    'success': False,
+                    'message': 'Account type not found',
+                    'data': None
+                }
+            
+            params = {'account_type_id': account_type_id, 'new_rate': float(new_rate)}
             
-            if not accounts:
+            if dry_run:
+                row = db.session.execute(BULK_RATE_PREVIEW_SQL, params).one()
+                db.session.rollback()
+                if not row.total_accounts:
+                    return {
+                        'success': False,
+                        'message': 'No active accounts found for this account type',
+                        'data': None
+                    }
+                return {
+                    'success': True,
+                    'message': f'Dry run: interest rate would be updated for {row.updated_count} accounts',
+                    'data': {
+                        'dry_run': True,
+                        'updated_count': row.updated_count,
+                        'total_accounts': row.total_accounts,
+                        'annual_interest_delta': round(float(row.annual_interest_delta), 2)
+                    }
+                }
+            
+            row = db.session.execute(BULK_RATE_CHANGE_SQL, {
+                **params,
+                'updated_by': updated_by,
+                'new_value': str(new_rate),
+                'reason': reason or f'Bulk update for {account_type.name}'
+            }).one()
+            
+            if not row.total_accounts:
+                db.session.rollback()
                 return {
                     'success': False,
                     'message': 'No active accounts found for this account type',
                     'data': None
                 }
             
-            updated_count = 0
-            for account in accounts:
-                # Get current value
-                old_value = account.get_effective_interest_rate()
-                
-                # Skip if already has this value
-                if old_value == new_rate:
-                    continue
-                
-                # Log the change
-                update_log = AccountParameterUpdate(
-                    account_id=account.id,
-                    updated_by=updated_by,
-                    parameter_name='interest_rate',
-                    old_value=str(old_value),
-                    new_value=str(new_rate),
-                    reason=reason or f'Bulk update for {account.account_type.name if account.account_type else "account type"}'
-                )
-                
-                # Update account
-                if not account.use_custom_parameters:
-                    account.use_custom_parameters = True
-                
-                account.custom_interest_rate = new_rate
-                db.session.add(update_log)
-                updated_count += 1
-            
             db.session.commit()
             
-            logger.info(f'Bulk updated interest rate for {updated_count} accounts: {account_type_id} -> {new_rate}%')
+            logger.info(f'Bulk updated interest rate for {row.updated_count} accounts: {account_type_id} -> {new_rate}%')
             
             return {
                 'success': True,
-                'message': f'Interest rate updated for {updated_count} accounts',
+                'message': f'Interest rate updated for {row.updated_count} accounts',
                 'data': {
-                    'updated_count': updated_count,
-                    'total_accounts': len(accounts)
+                    'dry_run': False,
+                    'updated_count': row.updated_count,
+                    'total_accounts': row.total_accounts
                 }
             }
             
@@ -1018,8 +1073,8 @@ class AccountService:
     def break_fixed_deposit_account(account_id, created_by, user_role, user_id=None):
         """Break FD/RD/DDS account and transfer balance to Savings account"""
         try:
-            # Get the account to break
-            account = Account.query.get(account_id)
+            # Get the account to break (locked: its balance is read and zeroed below)
+            account = lock_account(account_id)
             if not account:
                 return {
                     'success': False,
@@ -1065,7 +1120,7 @@ class AccountService:
                 }
             
             # Get customer's Savings account (find or create if doesn't exist)
-            savings_account_type = AccountType.query.filter_by(name='Savings').first()
+            savings_account_type = AccountTypeCatalog.by_name('Savings')
             if not savings_account_type:
                 return {
                     'success': False,
@@ -1078,7 +1133,7 @@ class AccountService:
                 customer_id=account.customer_id,
                 account_type_id=savings_account_type.id,
                 status='active'
-            ).first()
+            ).with_for_update().populate_existing().first()
             
             # If no Savings account exists, create one
             if not savings_account:
@@ -1244,69 +1299,48 @@ class AccountService:
                 creator_type='user'
             )
             db.session.add(deposit_transaction)
+            db.session.flush()
             
-            db.session.commit()
+            # Queue both notifications in the same transaction as the transfer
+            customer = account.customer
+            if customer and customer.email:
+                from app.services.email_service import EmailService
+                
+                # Email 1: Withdrawal from broken account
+                EmailService.send_transaction_notification_email(
+                    customer_email=customer.email,
+                    customer_name=customer.name,
+                    transaction_type='withdrawal',
+                    amount=current_balance,  # Original balance before penalty
+                    account_type=account_type_name,
+                    account_number=f"ACC{account.id:06d}",
+                    balance_before=fd_balance_before,
+                    balance_after=0.0,
+                    reference_number=withdrawal_transaction.reference_number,
+                    description=f'{account_type_name} account broken - Amount ₹{transfer_amount:,.2f} transferred to Savings account' + (f' (Early withdrawal penalty: ₹{(current_balance - transfer_amount):,.2f} applied)' if current_balance > transfer_amount else ''),
+                    transaction_date=withdrawal_transaction.created_at.strftime('%B %d, %Y at %I:%M %p'),
+                    queue=True
+                )
+                
+                # Email 2: Deposit to Savings account
+                EmailService.send_transaction_notification_email(
+                    customer_email=customer.email,
+                    customer_name=customer.name,
+                    transaction_type='deposit',
+                    amount=transfer_amount,
+                    account_type='Savings',
+                    account_number=f"ACC{savings_account.id:06d}",
+                    balance_before=savings_balance_before,
+                    balance_after=savings_balance_before + transfer_amount,
+                    reference_number=deposit_transaction.reference_number,
+                    description=f'Balance transfer from broken {account_type_name} account (ID: {account_id})',
+                    transaction_date=deposit_transaction.created_at.strftime('%B %d, %Y at %I:%M %p'),
+                    queue=True
+                )
+            else:
+                logger.warning(f'Customer email not found for account {account_id}, skipping email notifications')
             
-            # Store values needed for email before starting thread (to avoid session issues)
-            customer_email = account.customer.email if account.customer and account.customer.email else None
-            customer_name = account.customer.name if account.customer else None
-            broken_account_number = f"ACC{account.id:06d}"
-            savings_account_number = f"ACC{savings_account.id:06d}"
-            withdrawal_ref = withdrawal_transaction.reference_number
-            deposit_ref = deposit_transaction.reference_number
-            withdrawal_date = withdrawal_transaction.created_at.strftime('%B %d, %Y at %I:%M %p') if withdrawal_transaction.created_at else None
-            deposit_date = deposit_transaction.created_at.strftime('%B %d, %Y at %I:%M %p') if deposit_transaction.created_at else None
-            final_savings_balance = savings_balance_before + transfer_amount
-            
-            # Send email notifications for both transactions (non-blocking background thread)
-            def send_break_account_emails_async():
-                try:
-                    if customer_email and customer_name:
-                        from app.services.email_service import EmailService
-                        
-                        # Email 1: Withdrawal from broken account
-                        EmailService.send_transaction_notification_email(
-                            customer_email=customer_email,
-                            customer_name=customer_name,
-                            transaction_type='withdrawal',
-                            amount=current_balance,  # Original balance before penalty
-                            account_type=account_type_name,
-                            account_number=broken_account_number,
-                            balance_before=fd_balance_before,
-                            balance_after=0.0,
-                            reference_number=withdrawal_ref,
-                            description=f'{account_type_name} account broken - Amount ₹{transfer_amount:,.2f} transferred to Savings account' + (f' (Early withdrawal penalty: ₹{(current_balance - transfer_amount):,.2f} applied)' if current_balance > transfer_amount else ''),
-                            transaction_date=withdrawal_date
-                        )
-                        
-                        # Email 2: Deposit to Savings account
-                        EmailService.send_transaction_notification_email(
-                            customer_email=customer_email,
-                            customer_name=customer_name,
-                            transaction_type='deposit',
-                            amount=transfer_amount,
-                            account_type='Savings',
-                            account_number=savings_account_number,
-                            balance_before=savings_balance_before,
-                            balance_after=final_savings_balance,
-                            reference_number=deposit_ref,
-                            description=f'Balance transfer from broken {account_type_name} account (ID: {account_id})',
-                            transaction_date=deposit_date
-                        )
-                        
-                        logger.info(f'Break account email notifications sent to {customer_email} for account {account_id}')
-                    else:
-                        logger.warning(f'Customer email not found for account {account_id}, skipping email notifications')
-                except Exception as email_error:
-                    # Don't fail account break if email fails
-                    logger.error(f'Error sending break account email notifications: {email_error}')
-                    import traceback
-                    logger.error(f'Email error traceback: {traceback.format_exc()}')
-            
-            # Start email sending in background thread
-            email_thread = threading.Thread(target=send_break_account_emails_async, daemon=True)
-            email_thread.start()
-            logger.info(f'Break account email notifications started in background thread for account {account_id}')
+            db.session.commit()
             
             logger.info(f'Successfully broke {account_type_name} account {account_id} and transferred {transfer_amount} to Savings account {savings_account.id}')
             
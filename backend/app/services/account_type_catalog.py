@@ -0,0 +1,122 @@
+"""
+Account type catalog.
+
+Account types change a few times a year but are looked up on nearly every
+request. The catalog loads all of them in one query into a per-process cache
+keyed by id, name and display_name, and hands out copies attached to the
+caller's session with Session.merge(load=False), which emits no SQL. Because
+the copy lands in the session's identity map, a later account.account_type
+lazy load for the same type is answered from it as well.
+
+Changes are picked up cluster-wide by polling a fingerprint of the table
+(row count, max id and the sum of AccountType.version, which every change
+bumps) at most every ACCOUNT_TYPE_CATALOG_POLL_SECONDS. The process that made
+a change calls invalidate() and reloads immediately.
+"""
+import threading
+import time
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+from app import db
+from app.models import AccountType
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AccountTypeCatalog:
+    _lock = threading.Lock()
+    # (by_id, by_name, by_display_name) of detached AccountType rows, or None
+    _catalog = None
+    _fingerprint = None
+    _checked_at = 0.0
+
+    @staticmethod
+    def _read_fingerprint(session):
+        return tuple(session.query(
+            func.count(AccountType.id), func.max(AccountType.id), func.coalesce(func.sum(AccountType.version), 0)
+        ).one())
+
+    @staticmethod
+    def _load():
+        """Read every account type on a private session and keep them detached"""
+        with Session(db.engine) as session:
+            fingerprint = AccountTypeCatalog._read_fingerprint(session)
+            account_types = session.query(AccountType).order_by(AccountType.id).all()
+            session.expunge_all()
+
+        by_name = {}
+        for account_type in account_types:
+            # Lowest id wins, as filter_by(name=...).first() effectively did
+            by_name.setdefault(account_type.name, account_type)
+        AccountTypeCatalog._catalog = (
+            {account_type.id: account_type for account_type in account_types},
+            by_name,
+            {account_type.display_name: account_type for account_type in account_types}
+        )
+        AccountTypeCatalog._fingerprint = fingerprint
+        AccountTypeCatalog._checked_at = time.monotonic()
+        logger.info(f'Account type catalog loaded: {len(account_types)} types')
+        return AccountTypeCatalog._catalog
+
+    @staticmethod
+    def _current():
+        """The catalog, reloaded first if it is missing or the table has changed"""
+        poll_seconds = current_app.config['ACCOUNT_TYPE_CATALOG_POLL_SECONDS']
+        catalog = AccountTypeCatalog._catalog
+        if catalog is not None and time.monotonic() - AccountTypeCatalog._checked_at < poll_seconds:
+            return catalog
+        with AccountTypeCatalog._lock:
+            catalog = AccountTypeCatalog._catalog
+            if catalog is None:
+                return AccountTypeCatalog._load()
+            if time.monotonic() - AccountTypeCatalog._checked_at < poll_seconds:
+                return catalog
+            with Session(db.engine) as session:
+                fingerprint = AccountTypeCatalog._read_fingerprint(session)
+            if fingerprint != AccountTypeCatalog._fingerprint:
+                return AccountTypeCatalog._load()
+            AccountTypeCatalog._checked_at = time.monotonic()
+            return catalog
+
+    @staticmethod
+    def _attach(account_type):
+        """The caller's session copy of a cached type (no SQL)"""
+        if account_type is None:
+            return None
+        existing = db.session.identity_map.get(identity_key(AccountType, account_type.id))
+        if existing is not None:
+            return existing
+        return db.session.merge(account_type, load=False)
+
+    @staticmethod
+    def get(account_type_id):
+        """Account type by id, or None"""
+        by_id, _, _ = AccountTypeCatalog._current()
+        return AccountTypeCatalog._attach(by_id.get(account_type_id))
+
+    @staticmethod
+    def by_name(name):
+        """First account type (lowest id) with this name ('Savings', 'RD', ...), or None"""
+        _, by_name, _ = AccountTypeCatalog._current()
+        return AccountTypeCatalog._attach(by_name.get(name))
+
+    @staticmethod
+    def by_display_name(display_name):
+        _, _, by_display_name = AccountTypeCatalog._current()
+        return AccountTypeCatalog._attach(by_display_name.get(display_name))
+
+    @staticmethod
+    def preload():
+        """Put every account type in the current session, so account.account_type needs no query"""
+        by_id, _, _ = AccountTypeCatalog._current()
+        for account_type in by_id.values():
+            AccountTypeCatalog._attach(account_type)
+
+    @staticmethod
+    def invalidate():
+        """Reload on next use; call after committing a change to account_types"""
+        with AccountTypeCatalog._lock:
+            AccountTypeCatalog._catalog = None
@@ -1,5 +1,6 @@
 from app import db
 from app.models import AccountType, User
+from app.services.account_type_catalog import AccountTypeCatalog
 import logging
 import json
 from datetime import datetime
@@ -77,6 +78,7 @@ class AccountTypeService:
             
             db.session.add(account_type)
             db.session.commit()
+            AccountTypeCatalog.invalidate()
             
             logger.info(f'Account type created: {name} with interest rate {interest_rate}%')
             
@@ -246,6 +248,7 @@ class AccountTypeService:
             account_type.version += 1
             
             db.session.commit()
+            AccountTypeCatalog.invalidate()
             
             logger.info(f'Account type updated: {account_type.name} (version {account_type.version})')
             
@@ -278,7 +281,10 @@ class AccountTypeService:
                 }
             
             account_type.is_active = False
+            # Other processes' catalogs notice the change through the version sum
+            account_type.version += 1
             db.session.commit()
+            AccountTypeCatalog.invalidate()
             
             logger.info(f'Account type deactivated: {account_type.name}')
             
@@ -302,7 +308,7 @@ class AccountTypeService:
     def validate_transaction(account_type_id, transaction_type, amount):
         """Validate transaction based on account type rules"""
         try:
-            account_type = AccountType.query.get(account_type_id)
+            account_type = AccountTypeCatalog.get(account_type_id)
             
             if not account_type:
                 return {
@@ -335,7 +341,7 @@ class AccountTypeService:
     def calculate_maturity_amount(account_type_id, principal, start_date, end_date=None):
         """Calculate maturity amount for RD/FD/DDS accounts"""
         try:
-            account_type = AccountType.query.get(account_type_id)
+            account_type = AccountTypeCatalog.get(account_type_id)
             
             if not account_type:
                 return {
@@ -0,0 +1,130 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+import logging
+from flask import current_app
+from sqlalchemy import text
+from app import db
+
+logger = logging.getLogger(__name__)
+
+# Account type name prefix each accrual job works on
+JOB_TYPE_PREFIXES = {
+    'dds': 'DDS%',
+    'fd': 'FD%',
+    'rd': 'RD%'
+}
+
+# Split the eligible accounts into equally sized, contiguous id ranges
+SHARD_RANGES_SQL = text("""
+    SELECT MIN(id) AS first_id, MAX(id) AS last_id
+    FROM (
+        SELECT a.id, NTILE(:shards) OVER (ORDER BY a.id) AS shard
+        FROM accounts a
+        JOIN account_types t ON t.id = a.account_type_id
+        WHERE a.status = 'active'
+          AND t.name ILIKE :type_prefix
+    ) s
+    GROUP BY shard
+    ORDER BY shard
+""")
+
+
+def _get_accrual_function(job_name):
+    from app.services.daily_interest import calculate_dds_daily_interest
+    from app.services.fd_interest import calculate_fd_interest
+    from app.services.rd_interest import calculate_rd_monthly_interest
+    return {
+        'dds': calculate_dds_daily_interest,
+        'fd': calculate_fd_interest,
+        'rd': calculate_rd_monthly_interest
+    }[job_name]
+
+
+def get_shard_ranges(job_name, shards):
+    """Return [(first_id, last_id), ...] covering the job's eligible accounts"""
+    rows = db.session.execute(SHARD_RANGES_SQL, {
+        'shards': shards,
+        'type_prefix': JOB_TYPE_PREFIXES[job_name]
+    }).all()
+    return [(row.first_id, row.last_id) for row in rows]
+
+
+def _run_shard(config_name, job_name, id_range, job_kwargs):
+    """Worker process entry point: accrue one shard with its own engine and session"""
+    from app import create_app
+    app = create_app(config_name, start_scheduler=False)
+    with app.app_context():
+        try:
+            report = _get_accrual_function(job_name)(id_range=id_range, **job_kwargs)
+            return {'id_range': id_range, 'success': True, 'report': report}
+        except Exception as e:
+            logger.error(f'{job_name} accrual shard {id_range} failed: {e}')
+            return {'id_range': id_range, 'success': False, 'error': str(e)}
+        finally:
+            db.session.remove()
+            db.engine.dispose()
+
+
+def _merge_shard_results(job_name, results):
+    summary = {
+        'job': job_name,
+        'shards': len(results),
+        'failed_shards': [],
+        'accounts_processed': 0,
+        'accounts_skipped': 0,
+        'total_interest': 0.0
+    }
+    for result in results:
+        if not result['success']:
+            summary['failed_shards'].append({'id_range': result['id_range'], 'error': result['error']})
+            continue
+        report = result['report']
+        if not report:
+            continue  # Job had nothing to do (e.g. RD outside its run day)
+        summary['accounts_processed'] += report['accounts_processed']
+        summary['accounts_skipped'] += report['accounts_skipped']
+        summary['total_interest'] += report['total_interest']
+    summary['total_interest'] = round(summary['total_interest'], 2)
+    return summary
+
+
+def run_accrual(job_name, workers=None, **job_kwargs):
+    """
+    Run an accrual job ('dds', 'fd' or 'rd') across a pool of worker processes.
+
+    Eligible accounts are split into contiguous id ranges, one per worker. Each
+    worker commits its own chunks, so a failing shard is reported without
+    undoing the others. Returns one summary merged from all shards.
+    """
+    workers = workers or current_app.config.get('INTEREST_ACCRUAL_WORKERS', 1)
+
+    if workers <= 1:
+        report = _get_accrual_function(job_name)(**job_kwargs)
+        return _merge_shard_results(job_name, [{'id_range': None, 'success': True, 'report': report}])
+
+    shard_ranges = get_shard_ranges(job_name, workers)
+    # Don't hold a pooled connection while the workers run
+    db.session.remove()
+    if not shard_ranges:
+        return _merge_shard_results(job_name, [])
+
+    config_name = current_app.config.get('CONFIG_NAME', 'default')
+    results = []
+    # spawn: workers start clean instead of inheriting this process's engine and scheduler
+    with ProcessPoolExecutor(max_workers=len(shard_ranges),
+                             mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = {
+            pool.submit(_run_shard, config_name, job_name, id_range, job_kwargs): id_range
+            for id_range in shard_ranges
+        }
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                # Worker process died (e.g. killed) before reporting back
+                results.append({'id_range': futures[future], 'success': False, 'error': str(e)})
+
+    summary = _merge_shard_results(job_name, results)
+    if summary['failed_shards']:
+        logger.error(f"{job_name} accrual: {len(summary['failed_shards'])} of {summary['shards']} shards failed")
+    return summary
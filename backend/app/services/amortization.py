@@ -0,0 +1,102 @@
+"""
+EMI amortization engine.
+
+Computes whole repayment schedules as NumPy arrays, for one loan or a batch
+of loans at once: row i of every array is loan i, column k is installment
+k + 1. Schedules of different lengths share one (loans, max term) grid and
+`count` says how many columns of each row are real installments.
+
+The arithmetic is the same as the original month-by-month loop:
+interest = outstanding * monthly rate, principal = EMI - interest, the last
+installment of the term clears whatever principal is left, and a schedule
+ends early once the outstanding principal reaches zero. The outstanding
+principal before installment k is taken from the closed form of that
+recurrence, P(1+r)^k - EMI((1+r)^k - 1)/r, instead of being carried forward.
+"""
+from typing import NamedTuple
+import numpy as np
+
+# Months, or days, between installments per repayment frequency.
+# Anything else is treated as monthly.
+FREQUENCY_MONTHS = {'monthly': 1, 'quarterly': 3}
+FREQUENCY_DAYS = {'weekly': 7, 'daily': 1}
+
+
+class Schedule(NamedTuple):
+    emi_amount: np.ndarray
+    principal_component: np.ndarray
+    interest_component: np.ndarray
+    remaining_principal_before: np.ndarray
+    remaining_principal_after: np.ndarray
+    # Installments per loan; columns at or beyond it are padding
+    count: np.ndarray
+
+
+def amortize(principal, emi_amount, monthly_rate, term_months):
+    """Schedules for loans given as scalars or equal-length 1-d arrays"""
+    principal = np.atleast_1d(np.asarray(principal, dtype=float))
+    emi_amount = np.atleast_1d(np.asarray(emi_amount, dtype=float))
+    monthly_rate = np.atleast_1d(np.asarray(monthly_rate, dtype=float))
+    term_months = np.atleast_1d(np.asarray(term_months, dtype=int))
+    principal, emi_amount, monthly_rate, term_months = np.broadcast_arrays(
+        principal, emi_amount, monthly_rate, term_months
+    )
+
+    max_term = int(term_months.max()) if term_months.size else 0
+    # Installments already paid before each column, 0 .. max_term - 1
+    paid = np.arange(max_term, dtype=float)[None, :]
+    rate = monthly_rate[:, None]
+    growth = np.power(1 + rate, paid)
+    # ((1+r)^k - 1) / r, which is k for interest-free loans
+    safe_rate = np.where(rate == 0, 1.0, rate)
+    annuity = np.where(rate == 0, paid, (growth - 1) / safe_rate)
+
+    before = principal[:, None] * growth - emi_amount[:, None] * annuity
+    interest = before * rate
+    principal_part = emi_amount[:, None] - interest
+    emi = np.broadcast_to(emi_amount[:, None], before.shape).copy()
+
+    # Last installment of the term clears the outstanding principal
+    last = paid == (term_months[:, None] - 1)
+    principal_part = np.where(last, before, principal_part)
+    emi = np.where(last, before + interest, emi)
+    after = before - principal_part
+
+    # Stop after the first installment that pays the loan off, or at the term
+    in_term = paid < term_months[:, None]
+    paid_off = (after <= 0) & in_term
+    count = np.where(paid_off.any(axis=1), paid_off.argmax(axis=1) + 1, term_months)
+
+    return Schedule(
+        emi_amount=emi,
+        principal_component=principal_part,
+        interest_component=interest,
+        remaining_principal_before=before,
+        remaining_principal_after=np.maximum(after, 0),
+        count=count
+    )
+
+
+def due_dates(start_date, frequency, due_day, periods):
+    """
+    Due dates (datetime64[D], loans x periods) of installments 1 .. periods.
+
+    Monthly and quarterly installments fall on due_day, or the month's last day
+    when it is shorter; weekly and daily ones are counted from start_date.
+    """
+    start = np.atleast_1d(np.asarray(start_date, dtype='datetime64[D]'))
+    frequency = np.atleast_1d(np.asarray(frequency, dtype=object))
+    due_day = np.atleast_1d(np.asarray(due_day, dtype=int))
+    start, frequency, due_day = np.broadcast_arrays(start, frequency, due_day)
+
+    month_step = np.array([FREQUENCY_MONTHS.get(f, 0 if f in FREQUENCY_DAYS else 1) for f in frequency], dtype=int)
+    day_step = np.array([FREQUENCY_DAYS.get(f, 0) for f in frequency], dtype=int)
+    k = np.arange(1, periods + 1)[None, :]
+
+    months = start.astype('datetime64[M]')[:, None] + (k * month_step[:, None]).astype('timedelta64[M]')
+    first_days = months.astype('datetime64[D]')
+    month_lengths = ((months + np.timedelta64(1, 'M')).astype('datetime64[D]') - first_days).astype(int)
+    monthly = first_days + (np.minimum(due_day[:, None], month_lengths) - 1).astype('timedelta64[D]')
+    daily = start[:, None] + (k * day_step[:, None]).astype('timedelta64[D]')
+
+    return np.where((month_step > 0)[:, None], monthly, daily)
@@ -1,6 +1,7 @@
 from app import db
 from app.models import User, Customer
 from flask_jwt_extended import create_access_token
+from app.utils.identity import identity_claims, PRINCIPAL_USER, PRINCIPAL_CUSTOMER
 import logging
 
 logger = logging.getLogger(__name__)
@@ -55,7 +56,9 @@ class AuthService:
             user = User.query.filter_by(email=email).first()
             if user and user.check_password(password):
                 # Create JWT token for admin
-                access_token = create_access_token(identity=str(user.id))
+                access_token = create_access_token(
+                    identity=str(user.id), additional_claims=identity_claims(PRINCIPAL_USER, user)
+                )
                 logger.info(f'Admin user logged in: {email}')
                 return {
                     'success': True,
@@ -81,7 +84,9 @@ class AuthService:
                 if customer.role == 'manager':
                     if customer.check_password(password):
                         # Create JWT token for manager
-                        access_token = create_access_token(identity=str(customer.id))
+                        access_token = create_access_token(
+                            identity=str(customer.id), additional_claims=identity_claims(PRINCIPAL_CUSTOMER, customer)
+                        )
                         logger.info(f'Manager logged in: {email}')
                         return {
                             'success': True,
@@ -1,10 +1,14 @@
 from app import db
-from app.models import Customer, User, Account, AccountType, UserPermission, Transaction
+from app.models import Customer, User, Account, Transaction
+from app.utils.serializers import serialize_accounts, serialize_customers
+from app.utils.pagination import keyset_page, cursor_pagination
+from app.utils.identity import current_principal, invalidate_principal, PRINCIPAL_CUSTOMER
+from app.services.permission_service import PermissionService
+from app.services.account_type_catalog import AccountTypeCatalog
 from datetime import datetime
 from sqlalchemy.orm import joinedload
 import logging
 import os
-import threading
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +27,13 @@ class CustomerService:
             if not user_id_int:
                 return None, None
             
+            # The current request's principal is already resolved (no queries)
+            principal = current_principal()
+            if principal and principal.id == user_id_int:
+                if not principal.is_active:
+                    return None, None
+                return principal.role, principal.id
+            
             # First check users table (for admin)
             user = User.query.get(user_id_int)
             if user:
@@ -61,6 +72,7 @@ class CustomerService:
                 customer.last_update_by = last_update_by
                 customer.last_update_by_manager_id = None
             db.session.commit()
+            invalidate_principal(PRINCIPAL_CUSTOMER, customer.id)
             
             status_text = 'activated' if is_active else 'deactivated'
             return {
@@ -131,7 +143,7 @@ class CustomerService:
             if role == 'staff':
                 try:
                     # Get Savings account type
-                    savings_account_type = AccountType.query.filter_by(name='Savings').first()
+                    savings_account_type = AccountTypeCatalog.by_name('Savings')
                     if savings_account_type:
                         # Check if Savings is already in account_types to avoid duplication
                         savings_already_included = 'savings' in account_types if account_types else False
@@ -197,7 +209,7 @@ class CustomerService:
                             
                             # Get the account type ID from the AccountType table
                             db_name = name_mapping.get(account_type_name, account_type_name)
-                            account_type = AccountType.query.filter_by(name=db_name).first()
+                            account_type = AccountTypeCatalog.by_name(db_name)
                             logger.info(f'Looking for account type: {db_name}, found: {account_type}')
                             if account_type:
                                 # For RD accounts, start_date and maturity_date will be set on first deposit
@@ -258,44 +270,25 @@ class CustomerService:
                     logger.error(f'Error in account creation process: {accounts_error}')
                     raise accounts_error
             
-            db.session.commit()
-            
-            logger.info(f'Staff created: {email} with role: {role} and account types: {account_types}')
-            
-            # Send welcome email with credentials (non-blocking background thread)
+            # Queue the welcome email with credentials in the same transaction
             # Send welcome email for both managers and staff customers
             if role in ['manager', 'staff']:
-                # Import Flask app to create application context in thread
-                from flask import current_app
+                from app.services.email_service import EmailService
+                frontend_url = os.environ.get('FRONTEND_URL', 'https://mini-bank-project.vercel.app')
                 
-                # Capture the app instance before starting the thread
-                app = current_app._get_current_object()
+                EmailService.send_customer_welcome_email(
+                    customer_email=email,
+                    customer_name=name,
+                    customer_id=customer.id,
+                    password=password_to_use,  # Plain password - only sent once at creation (only for managers)
+                    role=role,  # Pass role to determine email template
+                    login_url=f"{frontend_url}/login",
+                    queue=True
+                )
             
-            def send_welcome_email_async():
-                # Push Flask application context for the thread
-                with app.app_context():
-                    try:
-                        from app.services.email_service import EmailService
-                        frontend_url = os.environ.get('FRONTEND_URL', 'https://mini-bank-project.vercel.app')
-                        login_url = f"{frontend_url}/login"
-                        
-                        EmailService.send_customer_welcome_email(
-                            customer_email=email,
-                            customer_name=name,
-                            customer_id=customer.id,
-                                password=password_to_use,  # Plain password - only sent once at creation (only for managers)
-                                role=role,  # Pass role to determine email template
-                            login_url=login_url
-                        )
-                        logger.info(f'Welcome email sent to {email}')
-                    except Exception as email_error:
-                        # Don't fail customer creation if email fails
-                        logger.error(f'Error sending welcome email to {email}: {email_error}')
+            db.session.commit()
             
-            # Start email sending in background thread
-            email_thread = threading.Thread(target=send_welcome_email_async, daemon=True)
-            email_thread.start()
-            logger.info(f'Welcome email sending started in background thread for {email}')
+            logger.info(f'Staff created: {email} with role: {role} and account types: {account_types}')
             
             return {
                 'success': True,
@@ -313,8 +306,8 @@ class CustomerService:
             }
     
     @staticmethod
-    def get_customers(user_role, user_id=None, page=1, limit=10, search='', sort_by='created_at', sort_order='asc'):
-        """Get customers with pagination, search, and filters based on user role"""
+    def get_customers(user_role, user_id=None, page=1, limit=10, search='', sort_by='created_at', sort_order='asc', cursor=None, approximate_total=False):
+        """Get customers with pagination, search, and filters based on user role (cursor mode when cursor is not None)"""
         try:
             logger.info(f'get_customers called with: user_role={user_role}, user_id={user_id}, page={page}, limit={limit}, search={search}, sort_by={sort_by}, sort_order={sort_order}')
             if user_role == 'admin':
@@ -322,14 +315,9 @@ class CustomerService:
                 query = Customer.query.filter(Customer.role == 'staff')
             elif user_role == 'manager':
                 # Check if manager has permission to view customers
-                permission = UserPermission.query.filter_by(
-                    user_id=user_id,
-                    user_type='customer',
-                    module='customers_management',
-                    can_view=True
-                ).first()
+                has_permission = PermissionService.manager_can(user_id, 'customers_management', 'view')
                 
-                if not permission:
+                if not has_permission:
                     # Manager doesn't have permission, return empty
                     return {
                         'success': True,
@@ -381,20 +369,47 @@ class CustomerService:
             else:
                 query = query.order_by(sort_column.desc())
             
-            # Get total count for pagination
-            total_count = query.count()
-            
-            # Calculate pagination
-            offset = (page - 1) * limit
-            customers = query.offset(offset).limit(limit).all()
+            if cursor is not None:
+                # Cursor mode: seek past the last row seen instead of counting and offsetting
+                if sort_by != 'created_at':
+                    return {
+                        'success': False,
+                        'message': 'Cursor pagination is only available when sorting by created_at',
+                        'data': None
+                    }
+                customers, next_cursor = keyset_page(query, Customer, cursor, limit, descending=sort_order != 'asc')
+                pagination = cursor_pagination(query, next_cursor, limit, approximate_total)
+            else:
+                # Get total count for pagination
+                total_count = query.count()
+                
+                # Calculate pagination
+                offset = (page - 1) * limit
+                customers = query.offset(offset).limit(limit).all()
+                
+                # Calculate pagination info
+                total_pages = (total_count + limit - 1) // limit  # Ceiling division
+                pagination = {
+                    'current_page': page,
+                    'total_pages': total_pages,
+                    'total_count': total_count,
+                    'limit': limit,
+                    'has_next': page < total_pages,
+                    'has_prev': page > 1
+                }
             
             # Get account data for each customer
             # Eager load accounts and account_type to avoid N+1 queries
-            customers = Customer.query.options(joinedload(Customer.accounts).joinedload(Account.account_type)).filter(Customer.id.in_([c.id for c in customers])).all()
+            page_ids = [c.id for c in customers]
+            customers = Customer.query.options(joinedload(Customer.accounts).joinedload(Account.account_type)).filter(Customer.id.in_(page_ids)).all()
+            customers.sort(key=lambda c: page_ids.index(c.id))  # Keep the requested sort order
+            
+            # Serialize the whole page (customers and their active accounts) in bulk
+            active_accounts = [acc for customer in customers for acc in customer.accounts if acc.status == 'active']
+            account_dicts = dict(zip((acc.id for acc in active_accounts), serialize_accounts(active_accounts)))
             
             customers_data = []
-            for customer in customers:
-                customer_dict = customer.to_dict()
+            for customer, customer_dict in zip(customers, serialize_customers(customers)):
                 
                 # Include actual account data
                 accounts = []
@@ -409,7 +424,7 @@ class CustomerService:
                 for acc in customer.accounts:
                     if acc.status == 'active':
                         try:
-                            account_dict = acc.to_dict()
+                            account_dict = account_dicts[acc.id]
                             # Ensure account_type is set correctly
                             if acc.account_type:
                                 account_dict['account_type'] = name_mapping.get(acc.account_type.name, acc.account_type.name.lower())
@@ -429,25 +444,15 @@ class CustomerService:
                 
                 customers_data.append(customer_dict)
             
-            # Calculate pagination info
-            total_pages = (total_count + limit - 1) // limit  # Ceiling division
-            has_next = page < total_pages
-            has_prev = page > 1
-            
             return {
                 'success': True,
                 'message': 'Customers retrieved successfully',
                 'data': customers_data,
-                'pagination': {
-                    'current_page': page,
-                    'total_pages': total_pages,
-                    'total_count': total_count,
-                    'limit': limit,
-                    'has_next': has_next,
-                    'has_prev': has_prev
-                }
+                'pagination': pagination
             }
             
+        except ValueError as e:
+            return {'success': False, 'message': str(e), 'data': None}
         except Exception as e:
             logger.error(f'Error getting customers: {e}')
             return {
@@ -475,14 +480,9 @@ class CustomerService:
                 pass
             elif user_role == 'manager':
                 # Check if manager has permission
-                permission = UserPermission.query.filter_by(
-                    user_id=user_id,
-                    user_type='customer',
-                    module='customers_management',
-                    can_view=True
-                ).first()
+                has_permission = PermissionService.manager_can(user_id, 'customers_management', 'view')
                 
-                if not permission:
+                if not has_permission:
                     return {
                         'success': False,
                         'message': 'Access denied - No permission',
@@ -511,6 +511,8 @@ class CustomerService:
             # Sort accounts by creation date (oldest first)
             sorted_accounts = sorted(customer.accounts, key=lambda x: x.created_at)
             logger.info(f'Customer {customer_id} has {len(sorted_accounts)} total accounts')
+            active_accounts = [acc for acc in sorted_accounts if acc.status == 'active']
+            account_dicts = dict(zip((acc.id for acc in active_accounts), serialize_accounts(active_accounts)))
             accounts = []
             # Map database names back to frontend lowercase values for account type
             name_mapping = {
@@ -523,7 +525,7 @@ class CustomerService:
                 logger.info(f'Processing account {acc.id}: status={acc.status}, account_type={acc.account_type.name if acc.account_type else None}')
                 if acc.status == 'active':
                     try:
-                        account_dict = acc.to_dict()
+                        account_dict = account_dicts[acc.id]
                         # Ensure account_type is set correctly
                         if acc.account_type:
                             account_dict['account_type'] = name_mapping.get(acc.account_type.name, acc.account_type.name.lower())
@@ -579,16 +581,11 @@ class CustomerService:
                 pass
             elif user_role == 'manager':
                 # Check if manager has permission
-                permission = UserPermission.query.filter_by(
-                    user_id=user_id,
-                    user_type='customer',
-                    module='customers_management',
-                    can_update=True
-                ).first()
+                has_permission = PermissionService.manager_can(user_id, 'customers_management', 'update')
                 
-                logger.info(f'Manager {user_id} updating customer {customer_id}. Has permission: {permission is not None}, Customer assigned_manager_id: {customer.assigned_manager_id}')
+                logger.info(f'Manager {user_id} updating customer {customer_id}. Has permission: {has_permission}, Customer assigned_manager_id: {customer.assigned_manager_id}')
                 
-                if not permission:
+                if not has_permission:
                     logger.warning(f'Manager {user_id} does not have update permission for customers_management')
                     return {
                         'success': False,
@@ -754,7 +751,7 @@ class CustomerService:
                 if account_types:
                     for account_type_name in account_types:
                         db_name = name_mapping_db.get(account_type_name, account_type_name)
-                        account_type = AccountType.query.filter_by(name=db_name).first()
+                        account_type = AccountTypeCatalog.by_name(db_name)
                         if account_type:
                             new_account_type_ids.add(account_type.id)
                 
@@ -822,7 +819,7 @@ class CustomerService:
                 for account_type_name in account_types:
                     # Get the account type ID from the AccountType table
                     db_name = name_mapping_db.get(account_type_name, account_type_name)
-                    account_type = AccountType.query.filter_by(name=db_name).first()
+                    account_type = AccountTypeCatalog.by_name(db_name)
                     if account_type and account_type.id in account_types_to_add:
                         # For RD accounts, start_date and maturity_date will be set on first deposit
                         # For FD accounts, set start_date and maturity_date on creation
@@ -875,6 +872,7 @@ class CustomerService:
                         logger.info(f'Created new account {account_type.name} for customer {customer.id} during update')
             
             db.session.commit()
+            invalidate_principal(PRINCIPAL_CUSTOMER, customer.id)
             
             logger.info(f'Customer updated: {email} with account types: {account_types}')
             
@@ -911,14 +909,9 @@ class CustomerService:
                 pass
             elif user_role == 'manager':
                 # Check if manager has permission
-                permission = UserPermission.query.filter_by(
-                    user_id=user_id,
-                    user_type='customer',
-                    module='customers_management',
-                    can_delete=True
-                ).first()
+                has_permission = PermissionService.manager_can(user_id, 'customers_management', 'delete')
                 
-                if not permission:
+                if not has_permission:
                     return {
                         'success': False,
                         'message': 'Access denied - No permission',
@@ -1029,6 +1022,7 @@ class CustomerService:
             # Finally delete the customer
             db.session.delete(customer)
             db.session.commit()
+            invalidate_principal(PRINCIPAL_CUSTOMER, customer_id)
             
             logger.info(f'Customer deleted: {customer.email}')
             
@@ -1060,4 +1054,5 @@ class CustomerService:
         customer.is_active = True
         customer.last_update_by = admin_id
         db.session.commit()
+        invalidate_principal(PRINCIPAL_CUSTOMER, customer.id)
         return {'success': True, 'message': 'Staff approved and accounts created', 'data': customer.to_dict()}
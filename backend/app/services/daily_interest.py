@@ -1,75 +1,138 @@
-from datetime import date, timedelta
+from datetime import date
+from sqlalchemy import text
 from app import db
-from app.models import Account
-from app.models import AccountType
 from app.models import AccountInterestLog
-def days_in_year(year):
-    return 366 if (year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)) else 365
-
-def calculate_dds_daily_interest():
-    today = date.today()
-
-    accounts = (
-    db.session.query(Account)
-    .join(AccountType, Account.account_type)  # join relationship
-    .filter(
-        Account.status == 'active',
-        AccountType.name.ilike('DDS%')  # starts with 'DDS', case-insensitive
-    )
-    .all()
-    )
-    print("Active accounts:", len(accounts))
-
-    for account in accounts:
-        if not account.account_type:
-            continue
-        
-        print("Processing account:", account.id, account.account_type.name)
-
-
-        interest_rate = account.get_effective_interest_rate()
-
-        if not interest_rate or interest_rate <= 0:
-            continue
+import logging
 
-        # Determine start date
-        last_date = account.last_interest_calculated_date
-        start_date = last_date + timedelta(days=1) if last_date else account.start_date
+logger = logging.getLogger(__name__)
 
-        # If start_date is today, still calculate 1 day of interest
-        if not start_date:
-            print(f"Skipping account {account.id}: no start date")
-            continue
+# Number of accounts accrued (and committed) per statement
+DEFAULT_CHUNK_SIZE = 5000
+# Upper bound used when no account id range is given
+MAX_ACCOUNT_ID = 2**31 - 1
 
-        days = (today - start_date).days
-        if days < 0:
-            print(f"Skipping account {account.id}: start_date in the future")
-            continue
 
-        # For first day, ensure at least 1 day
-        if days == 0:
-            days = 1
-
-        year_days = days_in_year(today.year)
-        daily_rate = (interest_rate / 100) / year_days
-        interest = account.balance * daily_rate * days
-
-        print(f"Adding interest {interest:.2f} to account {account.id} for {days} days")
-
-        balance_before = account.balance
-
-        # Update account
-        account.balance += round(interest, 2)
-        account.last_interest_calculated_date = today
+def days_in_year(year):
+    return 366 if (year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)) else 365
 
-        # Log the interest
-        log = AccountInterestLog(
-        account_id=account.id,
-        interest_amount=round(interest, 2),
-        balance_before=balance_before,
-        balance_after=account.balance,
-        calculated_date=today
-        )
-        db.session.add(log)        
 
-    db.session.commit()
+# Effective interest rate for an account row `a` joined to its type `t`.
+# Mirrors Account.get_effective_interest_rate(): custom -> snapshot -> account type.
+EFFECTIVE_RATE_SQL = """
+    COALESCE(
+        CASE WHEN a.use_custom_parameters THEN a.custom_interest_rate END,
+        a.snapshot_interest_rate,
+        t.interest_rate,
+        0
+    )
+"""
+
+# One round trip per chunk: pick the next page of DDS accounts by id, compute
+# interest for the eligible ones, write the logs, credit the balances and
+# report back what happened. Only accounts whose log row was actually inserted
+# are credited, so a re-run for the same day is a no-op.
+DDS_ACCRUAL_CHUNK_SQL = text(f"""
+    WITH chunk AS (
+        SELECT a.id,
+               a.balance,
+               {EFFECTIVE_RATE_SQL} AS rate,
+               COALESCE(a.last_interest_calculated_date + 1, a.start_date) AS accrue_from
+        FROM accounts a
+        JOIN account_types t ON t.id = a.account_type_id
+        WHERE a.status = 'active'
+          AND t.name ILIKE 'DDS%'
+          AND a.id > :after_id
+          AND a.id <= :until_id
+        ORDER BY a.id
+        LIMIT :chunk_size
+    ),
+    accrued AS (
+        SELECT id,
+               balance,
+               ROUND(
+                   (balance * (rate / 100.0) / :year_days
+                    * GREATEST(:today - accrue_from, 1))::numeric,
+                   2
+               ) AS interest
+        FROM chunk
+        WHERE rate > 0
+          AND accrue_from IS NOT NULL
+          AND accrue_from <= :today
+    ),
+    logged AS (
+        INSERT INTO account_interest_logs
+            (account_id, interest_amount, balance_before, balance_after, calculated_date, kind)
+        SELECT id, interest, balance, balance + interest, :today, :kind
+        FROM accrued
+        ON CONFLICT (account_id, calculated_date, kind) DO NOTHING
+        RETURNING account_id, interest_amount
+    ),
+    credited AS (
+        UPDATE accounts a
+        SET balance = a.balance + logged.interest_amount::double precision,
+            last_interest_calculated_date = :today,
+            updated_at = (now() AT TIME ZONE 'utc')
+        FROM logged
+        WHERE a.id = logged.account_id
+        RETURNING a.id
+    )
+    SELECT (SELECT MAX(id) FROM chunk) AS last_id,
+           (SELECT COUNT(*) FROM chunk) AS scanned,
+           (SELECT COUNT(*) FROM credited) AS processed,
+           (SELECT COALESCE(SUM(interest_amount), 0) FROM logged) AS total_interest
+""")
+
+
+def calculate_dds_daily_interest(today=None, chunk_size=DEFAULT_CHUNK_SIZE, id_range=None):
+    """
+    Accrue daily interest on every active DDS account.
+
+    Interest is computed and credited in the database, one chunk of accounts
+    per statement, and each chunk is committed on its own so a large book
+    never holds one long transaction. id_range=(first_id, last_id) limits the
+    run to one shard of accounts. Returns a report of the run.
+    """
+    today = today or date.today()
+    first_id, last_id = id_range or (1, MAX_ACCOUNT_ID)
+    year_days = days_in_year(today.year)
+
+    report = {
+        'run_date': today.isoformat(),
+        'accounts_processed': 0,
+        'accounts_skipped': 0,
+        'total_interest': 0.0,
+        'chunks': 0
+    }
+
+    after_id = first_id - 1
+    while True:
+        try:
+            row = db.session.execute(DDS_ACCRUAL_CHUNK_SQL, {
+                'after_id': after_id,
+                'until_id': last_id,
+                'chunk_size': chunk_size,
+                'today': today,
+                'year_days': year_days,
+                'kind': AccountInterestLog.KIND_DDS_DAILY
+            }).one()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f'DDS interest accrual failed after account {after_id}: {e}')
+            raise
+
+        if not row.scanned:
+            break
+
+        report['chunks'] += 1
+        report['accounts_processed'] += row.processed
+        report['accounts_skipped'] += row.scanned - row.processed
+        report['total_interest'] += float(row.total_interest)
+        after_id = row.last_id
+
+    report['total_interest'] = round(report['total_interest'], 2)
+    logger.info(
+        f"DDS interest accrued for {report['accounts_processed']} accounts "
+        f"({report['accounts_skipped']} skipped), total {report['total_interest']}"
+    )
+    return report
@@ -1,10 +1,198 @@
 from app import db
-from app.models import Customer, Account, AccountType, Transaction
-from datetime import datetime, timedelta
+from app.models import Customer, Account, AccountType, Transaction, DashboardSummary, DashboardSummaryDelta, EMIInstallment
+from datetime import timedelta, date
+from sqlalchemy import select, text, union_all
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Rows shown in the upcoming-maturity and overdue-EMI dashboard feeds
+DASHBOARD_FEED_LIMIT = 5
+MATURING_ACCOUNT_TYPES = ['FD', 'RD', 'DDS']
+
+# Recompute every summary row from the base tables (same rules as the triggers
+# that maintain them, see migration add_dashboard_summaries)
+REBUILD_SUMMARIES_SQL = text("""
+    INSERT INTO dashboard_summaries
+        (account_type_id, manager_id, active_accounts, total_balance,
+         total_deposits, total_withdrawals, pending_transactions)
+    SELECT account_type_id, manager_id, SUM(active), SUM(balance),
+           SUM(deposits), SUM(withdrawals), SUM(pending)
+    FROM (
+        SELECT a.account_type_id,
+               COALESCE(c.assigned_manager_id, 0) AS manager_id,
+               CASE WHEN a.status = 'active' THEN 1 ELSE 0 END AS active,
+               CASE WHEN a.status = 'active' THEN a.balance::numeric ELSE 0 END AS balance,
+               0::numeric AS deposits,
+               0::numeric AS withdrawals,
+               0 AS pending
+        FROM accounts a
+        JOIN customers c ON c.id = a.customer_id
+        UNION ALL
+        SELECT a.account_type_id,
+               COALESCE(c.assigned_manager_id, 0),
+               0,
+               0::numeric,
+               CASE WHEN t.status = 'completed'
+                     AND t.transaction_type IN ('deposit', 'interest', 'loan_disbursal')
+                    THEN t.amount::numeric ELSE 0 END,
+               CASE WHEN t.status = 'completed'
+                     AND t.transaction_type IN ('withdrawal', 'penalty', 'loan_repayment')
+                    THEN t.amount::numeric ELSE 0 END,
+               CASE WHEN t.status = 'pending' THEN 1 ELSE 0 END
+        FROM transactions t
+        JOIN accounts a ON a.id = t.account_id
+        JOIN customers c ON c.id = a.customer_id
+    ) contribution
+    GROUP BY account_type_id, manager_id
+""")
+
+# Move the triggers' pending deltas into the summary rows. Deltas committed
+# after the DELETE's snapshot stay for the next fold.
+FOLD_SUMMARY_DELTAS_SQL = text("""
+    WITH folded AS (
+        DELETE FROM dashboard_summary_deltas
+        RETURNING account_type_id, manager_id, active_accounts, total_balance,
+                  total_deposits, total_withdrawals, pending_transactions
+    )
+    INSERT INTO dashboard_summaries AS s
+        (account_type_id, manager_id, active_accounts, total_balance,
+         total_deposits, total_withdrawals, pending_transactions)
+    SELECT account_type_id, manager_id, SUM(active_accounts), SUM(total_balance),
+           SUM(total_deposits), SUM(total_withdrawals), SUM(pending_transactions)
+    FROM folded
+    GROUP BY account_type_id, manager_id
+    ORDER BY account_type_id, manager_id
+    ON CONFLICT (account_type_id, manager_id) DO UPDATE
+    SET active_accounts = s.active_accounts + EXCLUDED.active_accounts,
+        total_balance = s.total_balance + EXCLUDED.total_balance,
+        total_deposits = s.total_deposits + EXCLUDED.total_deposits,
+        total_withdrawals = s.total_withdrawals + EXCLUDED.total_withdrawals,
+        pending_transactions = s.pending_transactions + EXCLUDED.pending_transactions
+""")
+
+SUMMARY_COLUMNS = (
+    'account_type_id', 'manager_id', 'active_accounts', 'total_balance',
+    'total_deposits', 'total_withdrawals', 'pending_transactions'
+)
+
+
+def _summary_totals(manager_id=None):
+    """
+    Account and transaction totals from dashboard_summaries plus the deltas not
+    yet folded into them, optionally for one manager
+    """
+    parts = []
+    for model in (DashboardSummary, DashboardSummaryDelta):
+        part = select(*[getattr(model, column) for column in SUMMARY_COLUMNS])
+        if manager_id is not None:
+            part = part.where(model.manager_id == manager_id)
+        parts.append(part)
+    summary = union_all(*parts).subquery()
+
+    query = db.session.query(
+        AccountType.name,
+        db.func.sum(summary.c.active_accounts),
+        db.func.sum(summary.c.total_balance),
+        db.func.sum(summary.c.total_deposits),
+        db.func.sum(summary.c.total_withdrawals),
+        db.func.sum(summary.c.pending_transactions)
+    ).select_from(summary).join(AccountType, AccountType.id == summary.c.account_type_id)
+
+    totals = {
+        'account_type_counts': {},
+        'active_accounts': 0,
+        'total_balance': 0.0,
+        'total_deposits': 0.0,
+        'total_withdrawals': 0.0,
+        'pending_transactions': 0
+    }
+    for name, active, balance, deposits, withdrawals, pending in query.group_by(AccountType.name):
+        totals['account_type_counts'][name] = int(active or 0)
+        totals['active_accounts'] += int(active or 0)
+        totals['total_balance'] += float(balance or 0)
+        totals['total_deposits'] += float(deposits or 0)
+        totals['total_withdrawals'] += float(withdrawals or 0)
+        totals['pending_transactions'] += int(pending or 0)
+    return totals
+
+
+def _scope_to_manager(query, manager_id):
+    """Restrict an Account query to the staff customers assigned to a manager"""
+    if manager_id is None:
+        return query
+    return query.filter(
+        Customer.role == 'staff',
+        Customer.assigned_manager_id == manager_id
+    )
+
+
+def _upcoming_maturities(manager_id=None, limit=DASHBOARD_FEED_LIMIT):
+    """Next FD/RD/DDS maturities, read in date order (idx_accounts_active_maturity)"""
+    today = date.today()
+    query = db.session.query(
+        Account.id,
+        Account.balance,
+        Account.maturity_date,
+        AccountType.name.label('type_name'),
+        Customer.name.label('customer_name')
+    ).join(AccountType, Account.account_type_id == AccountType.id).join(
+        Customer, Account.customer_id == Customer.id
+    ).filter(
+        Account.status == 'active',
+        Account.maturity_date >= today,
+        AccountType.name.in_(MATURING_ACCOUNT_TYPES)
+    )
+    rows = _scope_to_manager(query, manager_id).order_by(
+        Account.maturity_date, Account.id
+    ).limit(limit).all()
+
+    return [{
+        'id': row.id,
+        'customer_name': row.customer_name or 'Unknown',
+        'amount': row.balance,
+        'date': row.maturity_date.strftime('%b %d, %Y'),
+        'type': row.type_name
+    } for row in rows]
+
+
+def _overdue_emis(manager_id=None, limit=DASHBOARD_FEED_LIMIT):
+    """Oldest unpaid EMIs past their due date (idx_emi_paid_due_date)"""
+    today = date.today()
+    query = db.session.query(
+        EMIInstallment.id,
+        EMIInstallment.account_id,
+        EMIInstallment.emi_number,
+        EMIInstallment.due_date,
+        EMIInstallment.emi_amount,
+        EMIInstallment.paid_amount,
+        AccountType.name.label('type_name'),
+        Customer.name.label('customer_name')
+    ).join(Account, EMIInstallment.account_id == Account.id).join(
+        AccountType, Account.account_type_id == AccountType.id
+    ).join(
+        Customer, Account.customer_id == Customer.id
+    ).filter(
+        EMIInstallment.is_paid.is_(False),
+        EMIInstallment.due_date < today,
+        Account.status == 'active'
+    )
+    rows = _scope_to_manager(query, manager_id).order_by(
+        EMIInstallment.due_date, EMIInstallment.id
+    ).limit(limit).all()
+
+    return [{
+        'id': row.id,
+        'account_id': row.account_id,
+        'emi_number': row.emi_number,
+        'customer': row.customer_name or 'Unknown',
+        'type': row.type_name,
+        'amount': round((row.emi_amount or 0) - (row.paid_amount or 0), 2),
+        'due_date': row.due_date.isoformat(),
+        'daysOverdue': (today - row.due_date).days
+    } for row in rows]
+
+
 class DashboardService:
     @staticmethod
     def get_dashboard_data(user_role, user_id=None):
@@ -22,6 +210,36 @@ class DashboardService:
             logger.error(f'Error getting dashboard data: {e}')
             return {'success': False, 'message': 'Failed to get dashboard data', 'data': None}
 
+    @staticmethod
+    def fold_summary_deltas():
+        """Fold the pending trigger deltas into dashboard_summaries; returns the summary rows touched"""
+        try:
+            rows = db.session.execute(FOLD_SUMMARY_DELTAS_SQL).rowcount
+            db.session.commit()
+            return rows
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f'Error folding dashboard summary deltas: {e}')
+            return 0
+
+    @staticmethod
+    def rebuild_summaries():
+        """Recompute dashboard_summaries from scratch (repairs any drift)"""
+        try:
+            # Writers queue behind the lock and record their deltas on top of the rebuilt rows
+            db.session.execute(text('LOCK TABLE dashboard_summaries, dashboard_summary_deltas IN EXCLUSIVE MODE'))
+            db.session.execute(text('DELETE FROM dashboard_summary_deltas'))
+            db.session.execute(text('DELETE FROM dashboard_summaries'))
+            db.session.execute(REBUILD_SUMMARIES_SQL)
+            db.session.commit()
+            rows = DashboardSummary.query.count()
+            logger.info(f'Rebuilt {rows} dashboard summary rows')
+            return {'success': True, 'message': 'Dashboard summaries rebuilt', 'data': {'rows': rows}}
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f'Error rebuilding dashboard summaries: {e}')
+            return {'success': False, 'message': 'Failed to rebuild dashboard summaries', 'data': None}
+
     @staticmethod
     def get_admin_dashboard_data():
         """Get dashboard data for admin"""
@@ -29,58 +247,26 @@ class DashboardService:
             # Get customer counts
             total_customers = Customer.query.filter(Customer.role == 'staff').count()
             
-            # Get account data
-            accounts = Account.query.filter(Account.status == 'active').all()
-            active_accounts = len(accounts)
-            
-            # Calculate account type distribution
-            account_type_counts = {}
-            total_balance = 0
-            for account in accounts:
-                account_type_name = account.account_type.name if account.account_type else 'Unknown'
-                account_type_counts[account_type_name] = account_type_counts.get(account_type_name, 0) + 1
-                total_balance += account.balance or 0
+            # Account and transaction totals (O(#account types) summary rows)
+            totals = _summary_totals()
+            active_accounts = totals['active_accounts']
+            account_type_counts = totals['account_type_counts']
+            total_balance = totals['total_balance']
+            total_deposits = totals['total_deposits']
+            total_withdrawals = totals['total_withdrawals']
+            pending_transactions = totals['pending_transactions']
             
             # Get transaction data
             recent_transactions = Transaction.query.order_by(Transaction.created_at.desc()).limit(5).all()
             
-            # Calculate financial metrics
-            total_deposits = db.session.query(db.func.sum(Transaction.amount)).filter(
-                Transaction.transaction_type.in_(['deposit', 'interest', 'loan_disbursal']),
-                Transaction.status == 'completed'
-            ).scalar() or 0
-            
-            total_withdrawals = db.session.query(db.func.sum(Transaction.amount)).filter(
-                Transaction.transaction_type.in_(['withdrawal', 'penalty', 'loan_repayment']),
-                Transaction.status == 'completed'
-            ).scalar() or 0
-            
-            pending_transactions = Transaction.query.filter(Transaction.status == 'pending').count()
-            
             # Get recent customers
             recent_customers = Customer.query.filter(
                 Customer.role == 'staff'
             ).order_by(Customer.created_at.desc()).limit(5).all()
             
-            # Get upcoming maturities (FD/RD/DDS accounts)
-            upcoming_maturities = []
-            for account in accounts:
-                if account.maturity_date and account.account_type and account.account_type.name in ['FD', 'RD', 'DDS']:
-                    if account.maturity_date >= datetime.now().date():
-                        upcoming_maturities.append({
-                            'id': account.id,
-                            'customer_name': account.customer.name if account.customer else 'Unknown',
-                            'amount': account.balance,
-                            'date': account.maturity_date.strftime('%b %d, %Y'),
-                            'type': account.account_type.name
-                        })
-            
-            # Sort by maturity date and take first 5
-            upcoming_maturities.sort(key=lambda x: datetime.strptime(x['date'], '%b %d, %Y'))
-            upcoming_maturities = upcoming_maturities[:5]
-            
-            # Get overdue payments (mock data for now - would need loan schedule logic)
-            overdue_payments = []
+            # Get upcoming maturities (FD/RD/DDS accounts) and overdue EMIs
+            upcoming_maturities = _upcoming_maturities()
+            overdue_payments = _overdue_emis()
             
             return {
                 'success': True,
@@ -125,62 +311,23 @@ class DashboardService:
                 Customer.assigned_manager_id == manager_id
             ).count()
             
-            # Get accounts for assigned customers only
-            assigned_customer_ids = [
-                c.id for c in Customer.query.filter(
-                    Customer.role == 'staff',
-                    Customer.assigned_manager_id == manager_id
-                ).all()
-            ]
-            
-            if assigned_customer_ids:
-                accounts = Account.query.filter(
-                    Account.status == 'active',
-                    Account.customer_id.in_(assigned_customer_ids)
-                ).all()
-            else:
-                accounts = []
-            active_accounts = len(accounts)
-            
-            # Calculate account type distribution
-            account_type_counts = {}
-            total_balance = 0
-            for account in accounts:
-                account_type_name = account.account_type.name if account.account_type else 'Unknown'
-                account_type_counts[account_type_name] = account_type_counts.get(account_type_name, 0) + 1
-                total_balance += account.balance or 0
+            # Account and transaction totals for assigned customers (summary rows)
+            totals = _summary_totals(manager_id)
+            active_accounts = totals['active_accounts']
+            account_type_counts = totals['account_type_counts']
+            total_balance = totals['total_balance']
+            total_deposits = totals['total_deposits']
+            total_withdrawals = totals['total_withdrawals']
+            pending_transactions = totals['pending_transactions']
             
             # Get transaction data for assigned customers only
-            account_ids = [acc.id for acc in accounts]
-            if account_ids:
-                recent_transactions = Transaction.query.filter(
-                    Transaction.account_id.in_(account_ids)
-                ).order_by(Transaction.created_at.desc()).limit(5).all()
-            else:
-                recent_transactions = []
-            
-            # Calculate financial metrics for assigned customers only
-            if account_ids:
-                total_deposits = db.session.query(db.func.sum(Transaction.amount)).filter(
-                    Transaction.account_id.in_(account_ids),
-                    Transaction.transaction_type.in_(['deposit', 'interest', 'loan_disbursal']),
-                    Transaction.status == 'completed'
-                ).scalar() or 0
-                
-                total_withdrawals = db.session.query(db.func.sum(Transaction.amount)).filter(
-                    Transaction.account_id.in_(account_ids),
-                    Transaction.transaction_type.in_(['withdrawal', 'penalty', 'loan_repayment']),
-                    Transaction.status == 'completed'
-                ).scalar() or 0
-                
-                pending_transactions = Transaction.query.filter(
-                    Transaction.account_id.in_(account_ids),
-                    Transaction.status == 'pending'
-                ).count()
-            else:
-                total_deposits = 0
-                total_withdrawals = 0
-                pending_transactions = 0
+            recent_transactions = Transaction.query.join(Account, Transaction.account).join(
+                Customer, Account.customer_id == Customer.id
+            ).filter(
+                Customer.role == 'staff',
+                Customer.assigned_manager_id == manager_id,
+                Account.status == 'active'
+            ).order_by(Transaction.created_at.desc()).limit(5).all()
             
             # Get recent customers (assigned to this manager)
             recent_customers = Customer.query.filter(
@@ -188,25 +335,9 @@ class DashboardService:
                 Customer.assigned_manager_id == manager_id
             ).order_by(Customer.created_at.desc()).limit(5).all()
             
-            # Get upcoming maturities (FD/RD/DDS accounts) for assigned customers
-            upcoming_maturities = []
-            for account in accounts:
-                if account.maturity_date and account.account_type and account.account_type.name in ['FD', 'RD', 'DDS']:
-                    if account.maturity_date >= datetime.now().date():
-                        upcoming_maturities.append({
-                            'id': account.id,
-                            'customer_name': account.customer.name if account.customer else 'Unknown',
-                            'amount': account.balance,
-                            'date': account.maturity_date.strftime('%b %d, %Y'),
-                            'type': account.account_type.name
-                        })
-            
-            # Sort by maturity date and take first 5
-            upcoming_maturities.sort(key=lambda x: datetime.strptime(x['date'], '%b %d, %Y'))
-            upcoming_maturities = upcoming_maturities[:5]
-            
-            # Get overdue payments (mock data for now - would need loan schedule logic)
-            overdue_payments = []
+            # Get upcoming maturities (FD/RD/DDS accounts) and overdue EMIs for assigned customers
+            upcoming_maturities = _upcoming_maturities(manager_id)
+            overdue_payments = _overdue_emis(manager_id)
             
             return {
                 'success': True,
@@ -0,0 +1,271 @@
+"""
+Email outbox delivery.
+
+Services queue emails with EmailService.queue_email() (or queue=True on the
+send_* helpers) inside the same database transaction as the change they
+report, so a rolled-back change sends nothing and a committed one is never
+lost to a process restart. drain_outbox() runs in the job process: it claims
+due messages with FOR UPDATE SKIP LOCKED (several runners never claim the
+same row), sends them from a small thread pool over long-lived SMTP
+connections, and then records the outcome. Failed messages are retried with
+exponential backoff and dead-lettered after OUTBOX_MAX_ATTEMPTS.
+
+A claim is a lease: each batch is stamped with a claim token and the lease
+expiry, no message is started once its lease is nearly up, and outcomes are
+only recorded for rows that are still 'sending' under the same token. A batch
+that outlives its lease therefore never records over (or sends alongside) the
+runner that reclaimed its messages.
+"""
+import queue
+import smtplib
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+from app import db
+from app.models import EmailOutbox
+from app.services.email_service import EmailService
+import logging
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_MAX_ATTEMPTS = 6
+# A claimed message whose runner died is picked up again after the lease
+OUTBOX_LEASE_SECONDS = 300
+# No send is started with less than this left on the lease
+OUTBOX_LEASE_MARGIN_SECONDS = 30
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 3600
+
+
+def backoff_seconds(attempts):
+    """Delay before the next try after `attempts` failed deliveries"""
+    return min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS)
+
+
+class SMTPConnectionPool:
+    """
+    Up to `size` authenticated SMTP connections, reused across messages and
+    drains. A connection is checked with NOOP before reuse and replaced if the
+    server has dropped it; one that fails mid-send is discarded.
+    """
+
+    def __init__(self, config, size):
+        self.config = config
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _alive(self, connection):
+        try:
+            return connection.noop()[0] == 250
+        except smtplib.SMTPException:
+            return False
+        except OSError:
+            return False
+
+    @contextmanager
+    def connection(self):
+        with self._slots:
+            try:
+                connection = self._idle.get_nowait()
+                if not self._alive(connection):
+                    self._discard(connection)
+                    connection = EmailService.connect(self.config)
+            except queue.Empty:
+                connection = EmailService.connect(self.config)
+            try:
+                yield connection
+            except Exception:
+                self._discard(connection)
+                raise
+            self._idle.put(connection)
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close(self):
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                connection.quit()
+            except Exception:
+                self._discard(connection)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(config, size):
+    """Process-wide connection pool, so connections outlive a single drain"""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.config != config or _pool.size != size:
+            if _pool is not None:
+                _pool.close()
+            _pool = SMTPConnectionPool(config, size)
+        return _pool
+
+
+def claim_batch(limit=OUTBOX_BATCH_SIZE):
+    """
+    Mark up to `limit` due messages as sending under a new claim token and return
+    them (committed). Each message's next_attempt_at is its lease expiry.
+    """
+    now = datetime.utcnow()
+    claim_token = uuid.uuid4().hex
+    due = select(EmailOutbox.id).where(
+        EmailOutbox.status.in_(('pending', 'sending')),
+        EmailOutbox.next_attempt_at <= now
+    ).order_by(EmailOutbox.id).limit(limit).with_for_update(skip_locked=True)
+
+    rows = db.session.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(due.scalar_subquery()))
+        .values(
+            status='sending',
+            claim_token=claim_token,
+            next_attempt_at=now + timedelta(seconds=OUTBOX_LEASE_SECONDS)
+        )
+        .returning(
+            EmailOutbox.id, EmailOutbox.to_email, EmailOutbox.subject,
+            EmailOutbox.html_body, EmailOutbox.text_body, EmailOutbox.attempts,
+            EmailOutbox.claim_token, EmailOutbox.next_attempt_at
+        )
+        .execution_options(synchronize_session=False)
+    ).mappings().all()
+    db.session.commit()
+    return [dict(row) for row in rows]
+
+
+def _lease_expiring(message):
+    lease_expires_at = message.get('next_attempt_at')
+    if lease_expires_at is None:
+        return False
+    return datetime.utcnow() >= lease_expires_at - timedelta(seconds=OUTBOX_LEASE_MARGIN_SECONDS)
+
+
+def _send(pool, config, message):
+    """Send one claimed message; returns (error, permanent), or None if its lease ran out first"""
+    if _lease_expiring(message):
+        return None
+    try:
+        with pool.connection() as connection:
+            connection.send_message(EmailService.build_message(
+                config, message['to_email'], message['subject'], message['html_body'], message['text_body']
+            ))
+        return None, False
+    except smtplib.SMTPRecipientsRefused as e:
+        return f'Recipient refused: {e.recipients}', True
+    except Exception as e:
+        return f'{type(e).__name__}: {e}', False
+
+
+def deliver(messages, pool, config, workers):
+    """Send messages concurrently; returns {message_id: (error, permanent) or None if not sent}"""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        outcomes = executor.map(lambda message: _send(pool, config, message), messages)
+        return {message['id']: outcome for message, outcome in zip(messages, outcomes)}
+
+
+def record_results(outcomes, claim_token):
+    """
+    Mark messages sent, rescheduled or dead; returns counts. Only rows still
+    held under claim_token are updated; messages whose lease ran out before
+    they were sent are left for the runner that reclaims them.
+    """
+    now = datetime.utcnow()
+    counts = {'sent': 0, 'retried': 0, 'dead': 0, 'expired': 0}
+    held = EmailOutbox.query.filter(
+        EmailOutbox.id.in_(outcomes.keys()),
+        EmailOutbox.status == 'sending',
+        EmailOutbox.claim_token == claim_token
+    ).with_for_update()
+    recorded = 0
+    for message in held:
+        recorded += 1
+        if outcomes[message.id] is None:
+            counts['expired'] += 1
+            continue
+        error, permanent = outcomes[message.id]
+        message.attempts += 1
+        message.claim_token = None
+        if error is None:
+            message.status = 'sent'
+            message.sent_at = now
+            message.last_error = None
+            # Bodies can hold one-time credentials; nothing needs them once delivered
+            message.html_body = None
+            message.text_body = None
+            counts['sent'] += 1
+        elif permanent or message.attempts >= OUTBOX_MAX_ATTEMPTS:
+            message.status = 'dead'
+            message.last_error = error
+            # Kept out of the table like delivered bodies; the subject and error say what it was
+            message.html_body = None
+            message.text_body = None
+            logger.error(f'Email {message.id} to {message.to_email} dead-lettered after {message.attempts} attempts: {error}')
+            counts['dead'] += 1
+        else:
+            message.status = 'pending'
+            message.last_error = error
+            message.next_attempt_at = now + timedelta(seconds=backoff_seconds(message.attempts))
+            logger.warning(f'Email {message.id} to {message.to_email} failed (attempt {message.attempts}), retrying: {error}')
+            counts['retried'] += 1
+
+    lost = len(outcomes) - recorded
+    if lost:
+        logger.warning(f'Outbox lease {claim_token} expired; {lost} message(s) were reclaimed by another runner')
+    counts['expired'] += lost
+    db.session.commit()
+    return counts
+
+
+def _skip(messages):
+    """SMTP is not configured: log the messages and close them out, as send_email does"""
+    now = datetime.utcnow()
+    for message in EmailOutbox.query.filter(EmailOutbox.id.in_([m['id'] for m in messages])):
+        logger.warning(f'SMTP not configured. Skipping email to {message.to_email}: {message.subject}')
+        message.status = 'skipped'
+        message.claim_token = None
+        message.last_error = 'SMTP not configured'
+        message.sent_at = now
+        message.html_body = None
+        message.text_body = None
+    db.session.commit()
+    return len(messages)
+
+
+def drain_outbox(workers=2, batch_size=OUTBOX_BATCH_SIZE, max_batches=None):
+    """Deliver due outbox messages until none are left (or max_batches). Returns counts."""
+    config = EmailService.get_smtp_config()
+    summary = {'sent': 0, 'retried': 0, 'dead': 0, 'skipped': 0, 'expired': 0}
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        messages = claim_batch(batch_size)
+        if not messages:
+            break
+        batches += 1
+
+        if not EmailService.is_configured(config):
+            summary['skipped'] += _skip(messages)
+            continue
+
+        pool = get_pool(config, workers)
+        outcomes = deliver(messages, pool, config, workers)
+        for key, count in record_results(outcomes, messages[0]['claim_token']).items():
+            summary[key] += count
+
+    if batches:
+        logger.info(f'Email outbox drained: {summary}')
+    return summary
@@ -0,0 +1,88 @@
+"""
+Email templates.
+
+Each email has an HTML and a plain-text Jinja template in app/templates/email.
+load_templates() compiles all of them once (create_app calls it at startup)
+and keeps the compiled Template objects, so sending a message only renders a
+small context dict: no template parsing and no string building per send.
+HTML variants are autoescaped; text variants are not.
+"""
+import os
+import threading
+import logging
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, select_autoescape
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates', 'email')
+
+# Template name -> rendered as (html, text) from '<name>.html' and '<name>.txt'
+EMAIL_TEMPLATES = ('welcome_manager', 'welcome_staff', 'account_created', 'transaction')
+
+ACCOUNT_TYPE_NAMES = {
+    'Savings': 'Savings Account',
+    'RD': 'Recurring Deposit (RD) Account',
+    'FD': 'Fixed Deposit (FD) Account',
+    'DDS': 'Daily Deposit Scheme (DDS) Account',
+    'Loan': 'Loan Account'
+}
+
+TRANSACTION_TYPE_NAMES = {
+    'deposit': 'Deposit',
+    'withdrawal': 'Withdrawal',
+    'interest': 'Interest Credit',
+    'penalty': 'Penalty Charge',
+    'loan_disbursal': 'Loan Disbursal',
+    'loan_repayment': 'Loan Repayment'
+}
+
+_compiled = {}
+_lock = threading.Lock()
+
+
+def format_inr(value):
+    """Amount with thousands separators and two decimals (without the ₹ sign)"""
+    return f'{value:,.2f}'
+
+
+def account_display_name(account_type):
+    return ACCOUNT_TYPE_NAMES.get(account_type, f'{account_type} Account')
+
+
+def _environment():
+    environment = Environment(
+        loader=FileSystemLoader(TEMPLATE_DIR),
+        autoescape=select_autoescape(enabled_extensions=('html',), default_for_string=False),
+        undefined=StrictUndefined,
+        trim_blocks=True,
+        lstrip_blocks=True,
+        auto_reload=False,
+        cache_size=-1
+    )
+    environment.filters['inr'] = format_inr
+    # Same for every message; read once instead of per send
+    environment.globals['current_year'] = os.environ.get('CURRENT_YEAR', '2025')
+    return environment
+
+
+def load_templates():
+    """Compile every email template (HTML and text). Safe to call more than once."""
+    with _lock:
+        if _compiled:
+            return _compiled
+        environment = _environment()
+        compiled = {}
+        for name in EMAIL_TEMPLATES:
+            compiled[name] = (
+                environment.get_template(f'{name}.html'),
+                environment.get_template(f'{name}.txt')
+            )
+        _compiled.update(compiled)
+        logger.info(f'Compiled {len(compiled)} email templates')
+        return _compiled
+
+
+def render(name, **context):
+    """Render template `name`; returns (html_body, text_body)"""
+    html_template, text_template = (_compiled or load_templates())[name]
+    return html_template.render(context), text_template.render(context)
@@ -1,12 +1,82 @@
 from app import db
-from app.models import Account, EMIInstallment
-from datetime import datetime, date, timedelta
-from calendar import monthrange
+from app.models import Account, AccountType, EMIInstallment
+from app.services.amortization import amortize, due_dates
+from datetime import datetime, date
+from sqlalchemy import case, func, insert, update
+import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
 
 class EMIService:
+    @staticmethod
+    def _schedule_inputs(account):
+        """(principal, emi_amount, term_months, monthly_rate, frequency, due_day, start_date), or None if unusable"""
+        principal = account.snapshot_loan_principal or abs(account.balance) if account.balance < 0 else 0
+        emi_amount = account.snapshot_emi_amount
+        term_months = account.snapshot_loan_term_months
+        interest_rate = account.get_effective_interest_rate()
+        start_date = account.start_date or datetime.now().date()
+        
+        # Validate required fields
+        if not principal or principal <= 0:
+            logger.error(f'Invalid principal amount for account {account.id}: {principal}')
+            return None
+        if not emi_amount or emi_amount <= 0:
+            logger.error(f'Invalid EMI amount for account {account.id}: {emi_amount}')
+            return None
+        if not term_months or term_months <= 0:
+            logger.error(f'Invalid loan term for account {account.id}: {term_months}')
+            return None
+        
+        return (
+            principal,
+            emi_amount,
+            term_months,
+            interest_rate / 100 / 12 if interest_rate else 0,
+            account.snapshot_repayment_frequency or 'monthly',
+            account.emi_due_day if account.emi_due_day is not None else start_date.day,
+            start_date
+        )
+    
+    @staticmethod
+    def _insert_schedules(account_ids, inputs):
+        """Compute the schedules of many loans at once and write them with one INSERT. Returns the row count."""
+        if not account_ids:
+            return 0
+        principal, emi_amount, term_months, monthly_rate, frequency, due_day, start_date = zip(*inputs)
+        schedule = amortize(principal, emi_amount, monthly_rate, term_months)
+        dates = due_dates(start_date, frequency, due_day, schedule.emi_amount.shape[1])
+        
+        # Flatten the (loans x installments) grid down to the real installments
+        loans, columns = np.nonzero(np.arange(schedule.emi_amount.shape[1]) < schedule.count[:, None])
+        rows = [
+            {
+                'account_id': account_id,
+                'emi_number': emi_number,
+                'due_date': due_date,
+                'emi_amount': emi,
+                'principal_component': principal_component,
+                'interest_component': interest_component,
+                'remaining_principal_before': before,
+                'remaining_principal_after': after,
+                'is_paid': False,
+                'is_overdue': False
+            }
+            for account_id, emi_number, due_date, emi, principal_component, interest_component, before, after in zip(
+                np.asarray(account_ids)[loans].tolist(),
+                (columns + 1).tolist(),
+                dates[loans, columns].tolist(),
+                schedule.emi_amount[loans, columns].tolist(),
+                schedule.principal_component[loans, columns].tolist(),
+                schedule.interest_component[loans, columns].tolist(),
+                schedule.remaining_principal_before[loans, columns].tolist(),
+                schedule.remaining_principal_after[loans, columns].tolist()
+            )
+        ]
+        db.session.execute(insert(EMIInstallment), rows)
+        return len(rows)
+    
     @staticmethod
     def generate_emi_installments(account_id):
         """Generate all EMI installments for a loan account"""
@@ -26,89 +96,14 @@ class EMIService:
                 logger.info(f'EMI installments already exist for account {account_id}. Skipping generation.')
                 return True
             
-            # Get loan parameters
-            principal = account.snapshot_loan_principal or abs(account.balance) if account.balance < 0 else 0
-            emi_amount = account.snapshot_emi_amount
-            term_months = account.snapshot_loan_term_months
-            interest_rate = account.get_effective_interest_rate()
-            repayment_frequency = account.snapshot_repayment_frequency or 'monthly'
-            emi_due_day = account.emi_due_day
-            start_date = account.start_date or datetime.now().date()
-            
-            # Validate required fields
-            if not principal or principal <= 0:
-                logger.error(f'Invalid principal amount for account {account_id}: {principal}')
-                return False
-            if not emi_amount or emi_amount <= 0:
-                logger.error(f'Invalid EMI amount for account {account_id}: {emi_amount}')
+            inputs = EMIService._schedule_inputs(account)
+            if inputs is None:
                 return False
-            if not term_months or term_months <= 0:
-                logger.error(f'Invalid loan term for account {account_id}: {term_months}')
-                return False
-            
-            # Calculate monthly interest rate
-            monthly_rate = interest_rate / 100 / 12 if interest_rate else 0
-            
-            # Generate installments
-            installments = []
-            remaining_principal = principal
-            current_date = start_date
-            due_day = emi_due_day if emi_due_day is not None else start_date.day
-            
-            for emi_number in range(1, term_months + 1):
-                # Calculate interest and principal components
-                interest_component = remaining_principal * monthly_rate
-                principal_component = emi_amount - interest_component
-                
-                # Adjust for last EMI to ensure exact principal payment
-                if emi_number == term_months:
-                    principal_component = remaining_principal
-                    emi_amount_adjusted = principal_component + interest_component
-                else:
-                    emi_amount_adjusted = emi_amount
-                
-                # Calculate due date based on repayment frequency
-                if emi_number == 1:
-                    # First EMI due date
-                    due_date = EMIService._calculate_next_due_date(
-                        start_date, repayment_frequency, due_day, 1
-                    )
-                else:
-                    # Subsequent EMI due dates
-                    prev_due_date = installments[-1].due_date if installments else start_date
-                    due_date = EMIService._calculate_next_due_date(
-                        prev_due_date, repayment_frequency, due_day, 1
-                    )
-                
-                # Calculate remaining principal after this EMI
-                remaining_principal_after = remaining_principal - principal_component
-                
-                # Create installment
-                installment = EMIInstallment(
-                    account_id=account_id,
-                    emi_number=emi_number,
-                    due_date=due_date,
-                    emi_amount=emi_amount_adjusted,
-                    principal_component=principal_component,
-                    interest_component=interest_component,
-                    remaining_principal_before=remaining_principal,
-                    remaining_principal_after=max(0, remaining_principal_after),
-                    is_paid=False,
-                    is_overdue=False
-                )
-                
-                installments.append(installment)
-                remaining_principal = remaining_principal_after
-                
-                # Stop if principal is fully paid
-                if remaining_principal <= 0:
-                    break
             
-            # Bulk insert installments
-            db.session.add_all(installments)
+            generated = EMIService._insert_schedules([account_id], [inputs])
             db.session.commit()
             
-            logger.info(f'Generated {len(installments)} EMI installments for account {account_id}')
+            logger.info(f'Generated {generated} EMI installments for account {account_id}')
             return True
             
         except Exception as e:
@@ -117,63 +112,76 @@ class EMIService:
             return False
     
     @staticmethod
-    def _calculate_next_due_date(base_date, frequency, due_day, periods=1):
-        """Calculate next due date based on repayment frequency"""
-        from calendar import monthrange
+    def generate_emi_installments_bulk(account_ids=None, regenerate=False):
+        """
+        Generate EMI installments for many loan accounts in one pass.
         
-        if frequency == 'monthly':
-            # Add months
-            year = base_date.year
-            month = base_date.month
-            for _ in range(periods):
-                if month == 12:
-                    year += 1
-                    month = 1
-                else:
-                    month += 1
+        account_ids=None means every active loan account. Accounts that already
+        have installments are skipped; with regenerate=True their schedule is
+        rebuilt instead, unless an installment of it has been paid.
+        """
+        try:
+            query = Account.query.join(AccountType, Account.account_type_id == AccountType.id).filter(AccountType.name == 'Loan')
+            if account_ids is None:
+                query = query.filter(Account.status == 'active')
+            else:
+                query = query.filter(Account.id.in_(account_ids))
+            accounts = query.order_by(Account.id).all()
+            loan_ids = [account.id for account in accounts]
             
-            # Set to due day, handling months with fewer days
-            last_day = monthrange(year, month)[1]
-            day = min(due_day, last_day)
-            return date(year, month, day)
-        
-        elif frequency == 'quarterly':
-            # Add 3 months per period
-            year = base_date.year
-            month = base_date.month
-            for _ in range(periods):
-                if month <= 9:
-                    month += 3
-                else:
-                    year += 1
-                    month = month - 9
+            # account_id -> (installments, paid installments)
+            existing = {
+                account_id: (total, paid or 0)
+                for account_id, total, paid in db.session.query(
+                    EMIInstallment.account_id,
+                    func.count(EMIInstallment.id),
+                    func.sum(case((EMIInstallment.is_paid, 1), else_=0))
+                ).filter(EMIInstallment.account_id.in_(loan_ids)).group_by(EMIInstallment.account_id)
+            } if loan_ids else {}
             
-            last_day = monthrange(year, month)[1]
-            day = min(due_day, last_day)
-            return date(year, month, day)
-        
-        elif frequency == 'weekly':
-            # Add 7 days per period
-            return base_date + timedelta(days=7 * periods)
-        
-        elif frequency == 'daily':
-            # Add 1 day per period
-            return base_date + timedelta(days=periods)
-        
-        else:
-            # Default to monthly
-            year = base_date.year
-            month = base_date.month
-            for _ in range(periods):
-                if month == 12:
-                    year += 1
-                    month = 1
-                else:
-                    month += 1
+            skipped = [account_id for account_id, (_, paid) in existing.items() if paid or not regenerate]
+            replaced = sorted(account_id for account_id in existing if account_id not in skipped)
+            if replaced:
+                EMIInstallment.query.filter(EMIInstallment.account_id.in_(replaced)).delete(synchronize_session=False)
+            
+            scheduled_ids, inputs, invalid = [], [], []
+            for account in accounts:
+                if account.id in existing and account.id not in replaced:
+                    continue
+                account_inputs = EMIService._schedule_inputs(account)
+                if account_inputs is None:
+                    invalid.append(account.id)
+                    continue
+                scheduled_ids.append(account.id)
+                inputs.append(account_inputs)
             
-            last_day = monthrange(year, month)[1]
-            day = min(due_day, last_day)
-            return date(year, month, day)
+            generated = EMIService._insert_schedules(scheduled_ids, inputs)
+            db.session.commit()
+            
+            logger.info(
+                f'Bulk EMI generation: {generated} installments for {len(scheduled_ids)} accounts '
+                f'({len(replaced)} regenerated, {len(skipped)} skipped, {len(invalid)} invalid)'
+            )
+            return {
+                'success': True,
+                'message': f'Generated EMI schedules for {len(scheduled_ids)} accounts',
+                'data': {
+                    'accounts': len(scheduled_ids),
+                    'installments': generated,
+                    'regenerated': replaced,
+                    'skipped': sorted(skipped),
+                    'invalid': invalid
+                }
+            }
+            
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f'Error in bulk EMI generation: {e}')
+            return {
+                'success': False,
+                'message': 'Failed to generate EMI schedules',
+                'data': None
+            }
     
     @staticmethod
     def mark_emi_paid(account_id, payment_amount, transaction_id, payment_date=None):
@@ -232,9 +240,6 @@ class EMIService:
                         logger.info(f'Marked EMI #{emi.emi_number} as paid (partial amount: {partial_amount}) for account {account_id}')
                     break  # Stop if payment is insufficient
             
-            # Update overdue status for all unpaid installments
-            EMIService._update_overdue_status(account_id)
-            
             db.session.commit()
             
             if marked_count > 0:
@@ -247,22 +252,30 @@ class EMIService:
             return False
     
     @staticmethod
-    def _update_overdue_status(account_id):
-        """Update overdue status for all unpaid installments"""
+    def flag_overdue_installments(today=None):
+        """
+        Refresh is_overdue for every unpaid installment in one UPDATE.
+        
+        Only rows whose flag actually changes are written, so a nightly run
+        touches just the installments that fell due since the last one.
+        Paid installments are cleared by mark_as_paid. Returns the row count.
+        """
+        today = today or date.today()
+        overdue = EMIInstallment.due_date < today
         try:
-            unpaid_installments = EMIInstallment.query.filter_by(
-                account_id=account_id,
-                is_paid=False
-            ).all()
-            
-            today = date.today()
-            for installment in unpaid_installments:
-                installment.update_overdue_status()
-            
+            result = db.session.execute(
+                update(EMIInstallment)
+                .where(EMIInstallment.is_paid.is_(False), EMIInstallment.is_overdue != overdue)
+                .values(is_overdue=overdue, updated_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
             db.session.commit()
-            
+            logger.info(f'Flagged EMI overdue status as of {today}: {result.rowcount} installments changed')
+            return result.rowcount
         except Exception as e:
-            logger.error(f'Error updating overdue status for account {account_id}: {e}')
+            db.session.rollback()
+            logger.error(f'Error flagging overdue EMI installments: {e}')
+            raise
     
     @staticmethod
     def get_next_unpaid_emi(account_id):
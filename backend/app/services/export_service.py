@@ -0,0 +1,157 @@
+"""
+Streaming transaction exports (CSV / NDJSON).
+
+Exports read plain column tuples rather than ORM objects through a server-side
+cursor (yield_per), and are written out in small chunks as they arrive, so
+memory stays flat whether the export is one DDS account or a whole branch for
+the month. Rows are ordered by account and then time, so balance_after is the
+account's running balance at each line. Legacy rows without created_at are
+the oldest and come first, through the same coalesce(created_at, epoch) key
+as cursor pagination.
+"""
+import csv
+import io
+import json
+from app import db
+from app.models import Transaction, Account, AccountType, Customer
+from app.services.permission_service import PermissionService
+from app.utils.pagination import cursor_key
+import logging
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+EXPORT_SCOPES = ('account', 'customer', 'manager')
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_COLUMNS = [
+    ('transaction_id', Transaction.id),
+    ('created_at', Transaction.created_at),
+    ('account_id', Transaction.account_id),
+    ('account_type', AccountType.name),
+    ('customer_id', Customer.id),
+    ('customer_name', Customer.name),
+    ('transaction_type', Transaction.transaction_type),
+    ('payment_type', Transaction.payment_type),
+    ('status', Transaction.status),
+    ('reference_number', Transaction.reference_number),
+    ('description', Transaction.description),
+    ('amount', Transaction.amount),
+    ('balance_before', Transaction.balance_before),
+    ('running_balance', Transaction.balance_after),
+]
+EXPORT_FIELDS = [name for name, _ in EXPORT_COLUMNS]
+# Free-text CSV cells that a spreadsheet could read as a formula
+CSV_TEXT_FIELDS = ('customer_name', 'reference_number', 'description')
+FORMULA_PREFIXES = ('=', '+', '-', '@')
+
+
+class TransactionExportService:
+    @staticmethod
+    def check_access(scope, scope_id, user_role, user_id):
+        """Return (error_message, status_code) if the user may not export this scope, else (None, None)"""
+        if scope not in EXPORT_SCOPES:
+            return f"scope must be one of: {', '.join(EXPORT_SCOPES)}", 400
+        if user_role == 'admin':
+            return None, None
+        # Managers need the transaction view permission, as for the other transaction lists
+        if user_role == 'manager' and not PermissionService.manager_can(user_id, 'transactions', 'view'):
+            return 'Access denied. You do not have permission to view transactions.', 403
+
+        if scope == 'manager':
+            if user_role == 'manager' and scope_id == user_id:
+                return None, None
+            return 'Access denied. You can only export your own customers.', 403
+
+        if scope == 'account':
+            account = Account.query.get(scope_id)
+            customer = Customer.query.get(account.customer_id) if account else None
+        else:
+            customer = Customer.query.get(scope_id)
+        if not customer:
+            return f'{scope.capitalize()} not found', 404
+
+        if user_role == 'staff' and customer.id == user_id:
+            return None, None
+        if user_role == 'manager' and customer.assigned_manager_id == user_id:
+            return None, None
+        return 'Access denied. You can only export your own accounts.', 403
+
+    @staticmethod
+    def build_query(scope, scope_id, transaction_type=None, start_date=None, end_date=None):
+        """Column query for one export scope, ordered for running balances"""
+        query = db.session.query(*[column for _, column in EXPORT_COLUMNS]).select_from(Transaction).join(
+            Account, Transaction.account_id == Account.id
+        ).join(
+            Customer, Account.customer_id == Customer.id
+        ).join(
+            AccountType, Account.account_type_id == AccountType.id
+        )
+
+        if scope == 'account':
+            query = query.filter(Transaction.account_id == scope_id)
+        elif scope == 'customer':
+            query = query.filter(Account.customer_id == scope_id)
+        elif scope == 'manager':
+            query = query.filter(Customer.assigned_manager_id == scope_id)
+
+        if transaction_type:
+            query = query.filter(Transaction.transaction_type == transaction_type)
+        if start_date:
+            query = query.filter(Transaction.created_at >= start_date)
+        if end_date:
+            query = query.filter(Transaction.created_at <= end_date)
+
+        return query.order_by(Transaction.account_id, cursor_key(Transaction), Transaction.id)
+
+    @staticmethod
+    def _rows(query, chunk_size, escape_formulas=False):
+        """
+        Yield export rows as dicts from a server-side cursor. With escape_formulas,
+        free-text cells starting with =, +, - or @ are prefixed with ' so that
+        spreadsheets show them as text instead of evaluating them.
+        """
+        for row in query.execution_options(yield_per=chunk_size):
+            record = dict(zip(EXPORT_FIELDS, row))
+            record['created_at'] = record['created_at'].isoformat() if record['created_at'] else None
+            if escape_formulas:
+                for field in CSV_TEXT_FIELDS:
+                    value = record[field]
+                    if value and value.startswith(FORMULA_PREFIXES):
+                        record[field] = "'" + value
+            yield record
+
+    @staticmethod
+    def stream(query, export_format='csv', chunk_size=EXPORT_CHUNK_SIZE):
+        """
+        Generator of text chunks for a streaming response. Each chunk holds up to
+        chunk_size rows; nothing beyond one chunk is kept in memory.
+        """
+        buffer = io.StringIO()
+        writer = None
+        if export_format == 'csv':
+            writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+            writer.writeheader()
+
+        count = 0
+        try:
+            for record in TransactionExportService._rows(query, chunk_size, escape_formulas=writer is not None):
+                if writer:
+                    writer.writerow(record)
+                else:
+                    buffer.write(json.dumps(record))
+                    buffer.write('\n')
+                count += 1
+                if count % chunk_size == 0:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+        except Exception as e:
+            # Headers are already sent; log and end the stream short
+            logger.error(f'Error streaming transaction export after {count} rows: {e}')
+            raise
+        logger.info(f'Transaction export streamed {count} rows ({export_format})')
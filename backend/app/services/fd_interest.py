@@ -1,68 +1,230 @@
 from datetime import date, timedelta
+from decimal import Decimal
+import logging
+import uuid
+from sqlalchemy import case, func, or_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
 from app import db
-from app.models import Account, AccountType, AccountInterestLog
-from sqlalchemy.orm import joinedload
+from app.models import Account, AccountType, AccountInterestLog, InterestAccrualCheckpoint
+from app.services.daily_interest import MAX_ACCOUNT_ID
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = 'fd_daily'
+
+# Accounts committed (and checkpointed) together
+DEFAULT_CHUNK_SIZE = 2000
+# Rows buffered from the server while streaming one chunk
+STREAM_BATCH_SIZE = 500
 
 
 def days_in_year(year):
     return 366 if year % 4 == 0 and (year % 100 != 0 or year % 400 == 0) else 365
 
 
-def calculate_fd_interest():
-    today = date.today()
+def _effective_rate():
+    """SQL equivalent of Account.get_effective_interest_rate() (custom -> snapshot -> account type)"""
+    return func.coalesce(
+        case((Account.use_custom_parameters, Account.custom_interest_rate)),
+        Account.snapshot_interest_rate,
+        AccountType.interest_rate,
+        0
+    )
+
+
+def _resume_point(job_name, target_date, first_id):
+    """
+    Last account id up to which the accounts from first_id on are already done,
+    from all of this date's checkpoints, whichever shard ranges they were for
+    """
+    spans = db.session.query(
+        InterestAccrualCheckpoint.first_account_id,
+        InterestAccrualCheckpoint.last_account_id
+    ).filter_by(
+        job_name=job_name,
+        run_date=target_date
+    ).order_by(InterestAccrualCheckpoint.first_account_id).all()
+
+    covered = first_id - 1
+    for span_first, span_last in spans:
+        if span_first > covered + 1:
+            break
+        covered = max(covered, span_last)
+    return covered
+
 
-    accounts = (
-        db.session.query(Account)
-        .options(joinedload(Account.account_type))
-        .join(AccountType)
+def _get_or_create_checkpoint(job_name, target_date, first_id, resume_after):
+    """Load the checkpoint for this accrual date and range start, creating a fresh run if there is none"""
+    checkpoint = InterestAccrualCheckpoint.query.filter_by(
+        job_name=job_name,
+        run_date=target_date,
+        first_account_id=first_id
+    ).first()
+    if checkpoint:
+        checkpoint.last_account_id = max(checkpoint.last_account_id, resume_after)
+        return checkpoint
+
+    checkpoint = InterestAccrualCheckpoint(
+        run_id=str(uuid.uuid4()),
+        job_name=job_name,
+        run_date=target_date,
+        first_account_id=first_id,
+        last_account_id=resume_after,
+        accounts_processed=0,
+        accounts_skipped=0,
+        total_interest=0,
+        status='running'
+    )
+    db.session.add(checkpoint)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another process started the same run first - pick up its checkpoint
+        db.session.rollback()
+        checkpoint = InterestAccrualCheckpoint.query.filter_by(
+            job_name=job_name,
+            run_date=target_date,
+            first_account_id=first_id
+        ).one()
+    return checkpoint
+
+
+def _fetch_chunk(target_date, after_id, until_id, chunk_size):
+    """Stream the next page of FD accounts that still need interest up to target_date"""
+    query = (
+        db.session.query(
+            Account.id,
+            Account.balance,
+            _effective_rate().label('rate'),
+            Account.start_date,
+            Account.last_interest_calculated_date
+        )
+        .join(AccountType, Account.account_type_id == AccountType.id)
         .filter(
             Account.status == 'active',
             AccountType.name.ilike('FD%'),
-            Account.start_date <= today
+            Account.start_date <= target_date,
+            or_(
+                Account.last_interest_calculated_date.is_(None),
+                Account.last_interest_calculated_date < target_date
+            ),
+            Account.id > after_id,
+            Account.id <= until_id
         )
-        .all()
+        .order_by(Account.id)
+        .limit(chunk_size)
+        .yield_per(STREAM_BATCH_SIZE)
     )
+    return query
 
-    for account in accounts:
-        principal = account.balance
-        interest_rate = account.get_effective_interest_rate()  # Implement this in Account model
-
-        print("Processing account:", account.id, account.account_type.name)
-
-        if not principal or not interest_rate:
-            print(f"Skipping account {account.id}: missing principal or interest rate")
-            continue
-
-        # Determine start date based on last calculation
-        last_date = account.last_interest_calculated_date
-        start_date = (last_date + timedelta(days=1)) if last_date else account.start_date
-
-        # Skip if start_date is in the future
-        if start_date > today:
-            print(f"Skipping account {account.id}: start_date {start_date} in the future")
-            continue
-
-        # Number of days to calculate
-        total_days = (today - start_date).days + 1
-        if total_days <= 0:
-            print(f"Skipping account {account.id}: no days to calculate")
-            continue
-
-        year_days = days_in_year(start_date.year)
-        interest = (principal * interest_rate * total_days) / (100 * year_days)
-
-        # Log interest (do not add to balance)
-        log = AccountInterestLog(
-            account_id=account.id,
-            interest_amount=round(interest, 2),
-            balance_before=principal,
-            balance_after=principal,
-            calculated_date=today
-        )
-        db.session.add(log)
 
-        # Update last interest calculated date
-        account.last_interest_calculated_date = today
-        db.session.add(account)
+def calculate_fd_interest(target_date=None, chunk_size=DEFAULT_CHUNK_SIZE, id_range=None):
+    """
+    Accrue FD interest (logged only, balance unchanged) up to target_date.
+
+    Accounts are paged by primary key and each chunk is committed together with
+    the run checkpoint, so a crashed run resumes after the last committed
+    account. Accounts already accrued up to target_date are never picked up,
+    which lets missed days be backfilled by passing an earlier target_date.
+    id_range=(first_id, last_id) limits the run to one shard of accounts, with
+    its own checkpoint. A shard resumes after the accounts that this date's
+    checkpoints already cover from first_id on, so a restart with different
+    shard boundaries (more accounts, another worker count) still picks up
+    where the crashed run stopped.
+    """
+    target_date = target_date or date.today()
+    first_id, last_id = id_range or (1, MAX_ACCOUNT_ID)
 
+    resume_after = _resume_point(JOB_NAME, target_date, first_id)
+    checkpoint = _get_or_create_checkpoint(JOB_NAME, target_date, first_id, resume_after)
+    if checkpoint.last_account_id >= last_id:
+        if checkpoint.status != 'completed':
+            checkpoint.status = 'completed'
+            db.session.commit()
+        logger.info(f'FD interest for {target_date} accounts {first_id}-{last_id} already completed')
+        return checkpoint.to_dict()
+    checkpoint.status = 'running'
     db.session.commit()
+
+    if checkpoint.last_account_id >= first_id:
+        logger.info(f'Resuming FD interest run {checkpoint.run_id} after account {checkpoint.last_account_id}')
+
+    while True:
+        after_id = checkpoint.last_account_id
+        logs = []
+        accrued_ids = []
+        skipped = 0
+        chunk_interest = Decimal('0')
+        chunk_last_id = None
+
+        for row in _fetch_chunk(target_date, after_id, last_id, chunk_size):
+            chunk_last_id = row.id
+            principal = row.balance
+
+            if not principal or not row.rate:
+                skipped += 1
+                continue
+
+            # Determine start date based on last calculation
+            start_date = (row.last_interest_calculated_date + timedelta(days=1)) if row.last_interest_calculated_date else row.start_date
+            total_days = (target_date - start_date).days + 1
+            if total_days <= 0:
+                skipped += 1
+                continue
+
+            interest = round((principal * row.rate * total_days) / (100 * days_in_year(start_date.year)), 2)
+
+            logs.append({
+                'account_id': row.id,
+                'interest_amount': interest,
+                'balance_before': principal,
+                'balance_after': principal,
+                'calculated_date': target_date,
+                'kind': AccountInterestLog.KIND_FD_DAILY
+            })
+
+        if chunk_last_id is None:
+            break
+
+        try:
+            if logs:
+                # Logs already written for this date (re-run, concurrent run) are skipped
+                inserted = db.session.execute(
+                    insert(AccountInterestLog)
+                    .values(logs)
+                    .on_conflict_do_nothing(index_elements=['account_id', 'calculated_date', 'kind'])
+                    .returning(AccountInterestLog.account_id, AccountInterestLog.interest_amount)
+                ).all()
+                accrued_ids = [r.account_id for r in inserted]
+                skipped += len(logs) - len(inserted)
+                chunk_interest = sum((r.interest_amount for r in inserted), Decimal('0'))
+
+                if accrued_ids:
+                    db.session.execute(
+                        update(Account)
+                        .where(Account.id.in_(accrued_ids))
+                        .values(last_interest_calculated_date=target_date)
+                        .execution_options(synchronize_session=False)
+                    )
+
+            checkpoint.last_account_id = chunk_last_id
+            checkpoint.accounts_processed += len(accrued_ids)
+            checkpoint.accounts_skipped += skipped
+            checkpoint.total_interest = (checkpoint.total_interest or 0) + chunk_interest
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f'FD interest run failed after account {after_id}: {e}')
+            raise
+
+    # The whole range is done, including ids past the last account fetched
+    checkpoint.last_account_id = last_id
+    checkpoint.status = 'completed'
+    db.session.commit()
+
+    logger.info(
+        f'FD interest run {checkpoint.run_id} completed: {checkpoint.accounts_processed} accounts, '
+        f'total {checkpoint.total_interest}'
+    )
+    return checkpoint.to_dict()
@@ -26,6 +26,7 @@ def get_interest_logs_service(account_id=None, start_date=None, end_date=None):
             "balance_before": float(log.balance_before),
             "balance_after": float(log.balance_after),
             "calculated_date": log.calculated_date.isoformat(),
+            "kind": log.kind,
         })
 
     return result
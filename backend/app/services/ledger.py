@@ -0,0 +1,92 @@
+"""
+Account ledger primitives shared by the posting and edit flows.
+
+Every transaction stores the balance before and after it, so changing one
+transaction shifts the balances of every later transaction on the account.
+rebalance_after() recomputes that tail in a single UPDATE with a running
+SUM() window instead of loading and rewriting each row.
+
+Anything that reads account.balance to compute a new one must hold the
+account row lock (lock_account) until it commits; otherwise two concurrent
+postings both read the same balance and one update is lost.
+"""
+from sqlalchemy import text
+from app import db
+from app.models import Account
+
+CREDIT_TYPES = ('deposit', 'interest', 'loan_disbursal')
+DEBIT_TYPES = ('withdrawal', 'penalty', 'loan_repayment')
+
+# Deadlock, serialization failure and lock timeout: the whole posting can be retried
+RETRYABLE_PGCODES = ('40P01', '40001', '55P03')
+POSTING_ATTEMPTS = 3
+
+
+def _in_list(values):
+    return ', '.join(f"'{value}'" for value in values)
+
+
+# Effect of a transaction on the account balance
+SIGNED_AMOUNT_SQL = f"""
+    CASE
+        WHEN transaction_type IN ({_in_list(CREDIT_TYPES)}) THEN amount
+        WHEN transaction_type IN ({_in_list(DEBIT_TYPES)}) THEN -amount
+        ELSE 0
+    END
+"""
+
+REBALANCE_SQL = f"""
+    UPDATE transactions
+    SET balance_before = r.running_balance - r.signed_amount,
+        balance_after = r.running_balance,
+        updated_at = CURRENT_TIMESTAMP
+    FROM (
+        SELECT id,
+               {SIGNED_AMOUNT_SQL} AS signed_amount,
+               :opening_balance + SUM({SIGNED_AMOUNT_SQL}) OVER (ORDER BY id) AS running_balance
+        FROM transactions
+        WHERE account_id = :account_id AND id > :transaction_id
+    ) AS r
+    WHERE transactions.id = r.id
+"""
+
+CLOSING_BALANCE_SQL = f"""
+    SELECT :opening_balance + COALESCE(SUM({SIGNED_AMOUNT_SQL}), 0)
+    FROM transactions
+    WHERE account_id = :account_id AND id > :transaction_id
+"""
+
+
+def signed_amount(transaction_type, amount):
+    """Balance effect of a transaction: +amount for credits, -amount for debits"""
+    if transaction_type in CREDIT_TYPES:
+        return amount
+    if transaction_type in DEBIT_TYPES:
+        return -amount
+    return 0
+
+
+def is_retryable(error):
+    """True for database errors that only mean 'try the transaction again'"""
+    return getattr(getattr(error, 'orig', None), 'pgcode', None) in RETRYABLE_PGCODES
+
+
+def lock_account(account_id):
+    """Load the account with SELECT ... FOR UPDATE; held until the session commits or rolls back"""
+    return Account.query.filter_by(id=account_id).with_for_update().populate_existing().first()
+
+
+def rebalance_after(account_id, transaction_id, opening_balance):
+    """
+    Recompute balance_before/balance_after for every transaction on the account
+    after transaction_id, starting from opening_balance (the balance_after of
+    transaction_id). Returns the closing balance for account.balance.
+    Objects for those rows already in the session are not refreshed.
+    """
+    params = {
+        'account_id': account_id,
+        'transaction_id': transaction_id,
+        'opening_balance': opening_balance
+    }
+    db.session.execute(text(REBALANCE_SQL), params)
+    return db.session.execute(text(CLOSING_BALANCE_SQL), params).scalar()
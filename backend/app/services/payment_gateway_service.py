@@ -1,5 +1,6 @@
 from app import db
 from app.models import Transaction, Account, Customer, User
+from app.services.ledger import lock_account
 from datetime import datetime
 import razorpay
 import os
@@ -240,8 +241,8 @@ class PaymentGatewayService:
                     'data': None
                 }
             
-            # Get account
-            account = Account.query.get(account_id)
+            # Lock the account; this also serializes the idempotency check below
+            account = lock_account(account_id)
             if not account:
                 return {
                     'success': False,
@@ -1,6 +1,7 @@
 from app import db
 from app.models import Transaction, Account, AccountType, Customer, User
 from app.services.transaction_service import TransactionService
+from app.services.ledger import lock_account
 from datetime import datetime
 import logging
 import random
@@ -191,7 +192,8 @@ class PaymentSimulationService:
             
             # Simulate payment success (98% success rate for loan repayments)
             if random.random() < 0.98:
-                # Calculate balance changes (repayment reduces outstanding amount)
+                # Re-read the balance under the row lock (repayment reduces outstanding amount)
+                account = lock_account(account_id)
                 balance_before = account.balance
                 balance_after = balance_before + amount  # Adding amount reduces negative balance
                 
@@ -232,50 +234,13 @@ class PaymentSimulationService:
                 else:
                     logger.warning(f'Failed to mark EMI as paid for loan account {account_id}')
                 
-                db.session.commit()
-                
-                # Send transaction notification email (non-blocking background thread)
-                def send_transaction_email_async():
-                    try:
-                        # Get customer details
-                        customer = account.customer
-                        if customer and customer.email:
-                            from app.services.email_service import EmailService
-                            
-                            # Format account number
-                            account_number = f"ACC{account.id:06d}"
-                            
-                            # Format transaction date
-                            transaction_date = transaction.created_at.strftime('%B %d, %Y at %I:%M %p') if transaction.created_at else None
-                            
-                            # Get account type name
-                            account_type_name = account.account_type.name if account.account_type else 'Unknown'
-                            
-                            EmailService.send_transaction_notification_email(
-                                customer_email=customer.email,
-                                customer_name=customer.name,
-                                transaction_type='loan_repayment',
-                                amount=amount,
-                                account_type=account_type_name,
-                                account_number=account_number,
-                                balance_before=balance_before,
-                                balance_after=balance_after,
-                                reference_number=reference_number,
-                                description=description or f"Loan repayment of ₹{amount:,.2f}",
-                                transaction_date=transaction_date
-                            )
-                            logger.info(f'Transaction notification email sent to {customer.email} for transaction {transaction.id}')
-                        else:
-                            logger.warning(f'Customer email not found for account {account_id}, skipping email notification')
-                    except Exception as email_error:
-                        # Don't fail transaction if email fails
-                        logger.error(f'Error sending transaction notification email: {email_error}')
+                # Queue the notification with the repayment
+                TransactionService._queue_transaction_email(
+                    account, 'loan_repayment', amount, balance_before, balance_after,
+                    reference_number, description or f"Loan repayment of ₹{amount:,.2f}", transaction.created_at
+                )
                 
-                # Start email sending in background thread
-                import threading
-                email_thread = threading.Thread(target=send_transaction_email_async, daemon=True)
-                email_thread.start()
-                logger.info(f'Transaction notification email sending started in background thread for transaction {transaction.id}')
+                db.session.commit()
                 
                 return {
                     'success': True,
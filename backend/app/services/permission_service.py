@@ -0,0 +1,73 @@
+"""
+Manager permission checks.
+
+A manager's UserPermission rows are loaded as one module -> actions matrix
+(one query) and kept per process, stamped with Customer.permissions_version.
+update_manager_permissions() bumps the version, so a process holding an older
+matrix reloads it as soon as it sees the new version. The version itself is
+read from the database (one primary-key lookup, once per manager per request)
+rather than from the cached principal, so a revoked permission stops working
+in every process with the next request.
+"""
+import threading
+from flask import g, has_request_context
+from app import db
+from app.models import Customer, UserPermission
+from app.utils.identity import PRINCIPAL_CUSTOMER
+import logging
+
+logger = logging.getLogger(__name__)
+
+PERMISSION_ACTIONS = ('view', 'create', 'update', 'delete')
+
+
+class PermissionService:
+    # manager_id -> (permissions_version, {module: frozenset of actions})
+    _matrices = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _load_matrix(manager_id):
+        rows = db.session.query(
+            UserPermission.module, UserPermission.can_view, UserPermission.can_create,
+            UserPermission.can_update, UserPermission.can_delete
+        ).filter(
+            UserPermission.user_id == manager_id,
+            UserPermission.user_type == PRINCIPAL_CUSTOMER
+        ).all()
+        return {
+            module: frozenset(action for action, allowed in zip(PERMISSION_ACTIONS, flags) if allowed)
+            for module, *flags in rows
+        }
+
+    @staticmethod
+    def _current_version(manager_id):
+        versions = g.setdefault('permission_versions', {}) if has_request_context() else {}
+        if manager_id not in versions:
+            versions[manager_id] = db.session.query(Customer.permissions_version).filter(
+                Customer.id == manager_id
+            ).scalar()
+        return versions[manager_id]
+
+    @staticmethod
+    def get_matrix(manager_id, version=None):
+        """A manager's {module: actions} matrix, from the cache when its version is current"""
+        if version is None:
+            version = PermissionService._current_version(manager_id)
+        cached = PermissionService._matrices.get(manager_id)
+        if cached and cached[0] == version:
+            return cached[1]
+        matrix = PermissionService._load_matrix(manager_id)
+        with PermissionService._lock:
+            PermissionService._matrices[manager_id] = (version, matrix)
+        return matrix
+
+    @staticmethod
+    def manager_can(manager_id, module, action):
+        """True if the manager has `action` ('view', 'create', 'update', 'delete') on `module`"""
+        return action in PermissionService.get_matrix(manager_id).get(module, ())
+
+    @staticmethod
+    def invalidate(manager_id):
+        with PermissionService._lock:
+            PermissionService._matrices.pop(manager_id, None)
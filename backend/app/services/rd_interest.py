@@ -1,19 +1,89 @@
 from datetime import date
 from calendar import monthrange
+from sqlalchemy import text
 from app import db
-from app.models import Account, AccountType, RDInstallment, AccountInterestLog
+from app.models import AccountInterestLog
+from app.services.daily_interest import EFFECTIVE_RATE_SQL, MAX_ACCOUNT_ID
+import logging
+
+logger = logging.getLogger(__name__)
+
+# RD accounts handled (and committed) per statement
+DEFAULT_CHUNK_SIZE = 5000
 
 
 def days_in_year(year):
     return 366 if (year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)) else 365
 
 
-def calculate_rd_monthly_interest():
-    today = date.today()
+# One round trip per chunk: aggregate each account's interest-bearing
+# installment-days for the month in the database, write the interest logs and
+# stamp the accounts. An installment earns interest from its deposit date (or
+# the month start, whichever is later) up to the month end. A month that is
+# already logged for an account is left untouched.
+RD_ACCRUAL_CHUNK_SQL = text(f"""
+    WITH chunk AS (
+        SELECT a.id,
+               a.balance,
+               {EFFECTIVE_RATE_SQL} AS rate,
+               SUM(i.amount * ((:month_end - GREATEST(i.deposit_date, :month_start)) + 1)) AS amount_days
+        FROM accounts a
+        JOIN account_types t ON t.id = a.account_type_id
+        JOIN rd_installments i ON i.account_id = a.id AND i.deposit_date <= :month_end
+        WHERE a.status = 'active'
+          AND t.name ILIKE 'RD%'
+          AND a.id > :after_id
+          AND a.id <= :until_id
+        GROUP BY a.id, t.id
+        ORDER BY a.id
+        LIMIT :chunk_size
+    ),
+    accrued AS (
+        SELECT id,
+               balance,
+               ROUND((amount_days * (rate / 100.0) / :year_days)::numeric, 2) AS interest
+        FROM chunk
+        WHERE rate > 0
+    ),
+    logged AS (
+        INSERT INTO account_interest_logs
+            (account_id, interest_amount, balance_before, balance_after, calculated_date, kind)
+        SELECT id, interest, balance, balance, :month_end, :kind
+        FROM accrued
+        WHERE interest > 0
+        ON CONFLICT (account_id, calculated_date, kind) DO NOTHING
+        RETURNING account_id, interest_amount
+    ),
+    stamped AS (
+        UPDATE accounts a
+        SET last_interest_calculated_date = :month_end,
+            updated_at = (now() AT TIME ZONE 'utc')
+        FROM logged
+        WHERE a.id = logged.account_id
+        RETURNING a.id
+    )
+    SELECT (SELECT MAX(id) FROM chunk) AS last_id,
+           (SELECT COUNT(*) FROM chunk) AS scanned,
+           (SELECT COUNT(*) FROM stamped) AS processed,
+           (SELECT COALESCE(SUM(interest_amount), 0) FROM logged) AS total_interest
+""")
+
+
+def calculate_rd_monthly_interest(today=None, chunk_size=DEFAULT_CHUNK_SIZE, id_range=None):
+    """
+    Log the previous month's interest for every active RD account.
+
+    Installment-days are aggregated per account in the database, so each chunk
+    of accounts costs a single round trip instead of one installment query per
+    account. id_range=(first_id, last_id) limits the run to one shard of
+    accounts. Returns a report of the run (None when it is not the run day).
+    """
+    today = today or date.today()
+    first_id, last_id = id_range or (1, MAX_ACCOUNT_ID)
 
     # Only run safely on month start (extra protection)
     if today.day != 30:
-        return
+        return None
 
     # We calculate interest for the PREVIOUS month
     year = today.year
@@ -24,80 +94,48 @@ def calculate_rd_monthly_interest():
     month_start = date(year, month, 1)
     month_end = date(year, month, monthrange(year, month)[1])
 
-    accounts = (
-        db.session.query(Account)
-        .join(AccountType, Account.account_type)
-        .filter(
-            Account.status == 'active',
-            AccountType.name.ilike('RD%')
-        )
-        .all()
+    report = {
+        'month_start': month_start.isoformat(),
+        'month_end': month_end.isoformat(),
+        'accounts_processed': 0,
+        'accounts_skipped': 0,
+        'total_interest': 0.0,
+        'chunks': 0
+    }
+
+    after_id = first_id - 1
+    while True:
+        try:
+            row = db.session.execute(RD_ACCRUAL_CHUNK_SQL, {
+                'after_id': after_id,
+                'until_id': last_id,
+                'chunk_size': chunk_size,
+                'month_start': month_start,
+                'month_end': month_end,
+                'year_days': days_in_year(year),
+                'kind': AccountInterestLog.KIND_RD_MONTHLY
+            }).one()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f'RD interest accrual failed after account {after_id}: {e}')
+            raise
+
+        if not row.scanned:
+            break
+
+        report['chunks'] += 1
+        report['accounts_processed'] += row.processed
+        report['accounts_skipped'] += row.scanned - row.processed
+        report['total_interest'] += float(row.total_interest)
+        after_id = row.last_id
+
+    report['total_interest'] = round(report['total_interest'], 2)
+    logger.info(
+        f"RD interest for {month_start:%B %Y} logged for {report['accounts_processed']} accounts, "
+        f"total {report['total_interest']}"
     )
-
-    print(f"Processing RD interest for {len(accounts)} accounts")
-
-    for account in accounts:
-        interest_rate = account.get_effective_interest_rate()
-        print(interest_rate,'intrest_rate')
-        if not interest_rate or interest_rate <= 0:
-            continue
-
-        year_days = days_in_year(year)
-        daily_rate = (interest_rate / 100) / year_days
-
-        total_interest = 0
-
-        # Fetch installments deposited up to month end
-        installments = (
-            db.session.query(RDInstallment)
-            .filter(
-                RDInstallment.account_id == account.id,
-                # RDInstallment.deposit_date <= month_end
-            )
-            .all()
-        )
-        print('fgfdsdfghgfdsdfgh')
-        for inst in installments:
-            deposit_date = inst.deposit_date
-
-            # Interest starts from deposit date or month start
-            interest_start = max(deposit_date, month_start)
-
-            # Days the installment earned interest in that month
-            days = (month_end - interest_start).days + 1
-            print(days,'days')
-            if days <= 0:
-                continue
-
-            interest = inst.amount * daily_rate * days
-            total_interest += interest
-            print(total_interest,'total_intrest')
-        if total_interest <= 0:
-            continue
-
-        total_interest = round(total_interest, 2)
-        balance_before = account.balance
-
-        # RD interest credited once per month
-        # account.balance += total_interest
-        account.last_interest_calculated_date = month_end
-
-        log = AccountInterestLog(
-            account_id=account.id,
-            interest_amount=total_interest,
-            balance_before=balance_before,
-            balance_after=account.balance,
-            calculated_date=month_end
-        )
-
-        db.session.add(log)
-
-        print(
-            f"RD Account {account.id} | "
-            f"Interest Added: {total_interest}"
-        )
-
-    db.session.commit()
+    return report
 
 # app/services/rd_interest.py
 
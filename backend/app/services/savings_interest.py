@@ -0,0 +1,259 @@
+"""
+Bulk Savings interest.
+
+A run is requested through the API (request_run) and carried out by the job
+process (process_runs), so a large book never has to fit in one HTTP request.
+The run selects the accounts that are due for interest under their
+calculation frequency in SQL, one chunk of locked accounts at a time, computes
+the chunk's interest with NumPy, and then writes the interest transactions,
+the balance updates and the queued notification emails with one statement
+each. Each chunk is committed together with the run's progress, which the
+status endpoint reports, and an interrupted run resumes after its last
+committed account.
+
+The interest rules are those of TransactionService.calculate_interest for
+Savings accounts.
+"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import numpy as np
+from sqlalchemy import and_, case, func, insert, or_, select, update
+from app import db
+from app.models import Account, AccountType, Customer, InterestRun, Transaction
+from app.services.email_service import EmailService
+import logging
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = 'savings'
+# Accounts locked, credited and committed per chunk
+DEFAULT_CHUNK_SIZE = 1000
+# A running run with no progress for this long is taken over by another runner
+RUN_LEASE_SECONDS = 600
+
+# Minimum days between interest postings; any other frequency counts as daily
+FREQUENCY_DAYS = {'monthly': 30, 'quarterly': 90, 'yearly': 365}
+# Compounding: (days per period, periods per year)
+COMPOUNDING = {'monthly': (30.0, 12), 'quarterly': (90.0, 4), 'yearly': (365.25, 1)}
+DAILY_COMPOUNDING = (1.0, 365.25)
+
+
+def savings_interest(balance, annual_rate, method, frequency, days):
+    """
+    Interest for a batch of accounts over `days` days each (1-d arrays).
+
+    Simple interest accrues on the balance over days / 365.25 years; compound
+    interest compounds per calculation period (30, 90 or 365.25 days, or
+    daily), as in TransactionService.calculate_interest.
+    """
+    balance = np.asarray(balance, dtype=float)
+    rate = np.asarray(annual_rate, dtype=float) / 100
+    days = np.asarray(days, dtype=float)
+    frequency = np.asarray(frequency, dtype=object)
+
+    period_days = np.full(days.shape, DAILY_COMPOUNDING[0])
+    periods_per_year = np.full(days.shape, DAILY_COMPOUNDING[1])
+    for name, (length, per_year) in COMPOUNDING.items():
+        matches = frequency == name
+        period_days[matches] = length
+        periods_per_year[matches] = per_year
+
+    simple = balance * rate * (days / 365.25)
+    compound = balance * ((1 + rate / periods_per_year) ** (days / period_days) - 1)
+    return np.where(np.asarray(method, dtype=object) == 'simple', simple, compound)
+
+
+def _due_accounts(today):
+    """Active Savings accounts due for interest on `today`, with what is needed to credit them"""
+    frequency = func.coalesce(
+        Account.snapshot_interest_calculation_frequency, AccountType.interest_calculation_frequency, 'yearly'
+    )
+    method = func.coalesce(Account.snapshot_interest_calculation_method, AccountType.interest_calculation_method, 'simple')
+    # Mirrors Account.get_effective_interest_rate(): custom -> snapshot -> account type
+    rate = func.coalesce(
+        case((Account.use_custom_parameters, Account.custom_interest_rate)),
+        Account.snapshot_interest_rate,
+        AccountType.interest_rate,
+        0
+    )
+    # Latest last-calculation date that makes an account due again today
+    due_after = case(
+        *((frequency == name, today - timedelta(days=days)) for name, days in FREQUENCY_DAYS.items()),
+        else_=today - timedelta(days=1)
+    )
+    period_start = func.coalesce(Account.last_interest_calculated_date, Account.start_date)
+
+    return select(
+        Account.id,
+        Account.balance,
+        period_start.label('period_start'),
+        rate.label('rate'),
+        method.label('method'),
+        frequency.label('frequency'),
+        Customer.name.label('customer_name'),
+        Customer.email.label('customer_email')
+    ).join(AccountType, Account.account_type_id == AccountType.id).join(
+        Customer, Account.customer_id == Customer.id
+    ).where(
+        Account.status == 'active',
+        AccountType.name == 'Savings',
+        or_(Account.last_interest_calculated_date.is_(None), Account.last_interest_calculated_date <= due_after),
+        period_start < today
+    )
+
+
+def request_run(requested_by, requested_by_type='user'):
+    """Queue a Savings interest run for today, or return the one already queued or running. Returns (run, created)."""
+    active = InterestRun.query.filter(
+        InterestRun.job_name == JOB_NAME,
+        InterestRun.status.in_(('queued', 'running'))
+    ).order_by(InterestRun.id).first()
+    if active:
+        return active, False
+
+    run = InterestRun(
+        job_name=JOB_NAME,
+        status='queued',
+        run_date=date.today(),
+        requested_by=requested_by,
+        requested_by_type=requested_by_type
+    )
+    db.session.add(run)
+    db.session.commit()
+    logger.info(f'Savings interest run {run.id} queued by {requested_by_type} {requested_by}')
+    return run, True
+
+
+def claim_run():
+    """Mark the oldest queued (or abandoned) run as running and return it, or None (committed)"""
+    now = datetime.utcnow()
+    run = InterestRun.query.filter(
+        InterestRun.job_name == JOB_NAME,
+        or_(
+            InterestRun.status == 'queued',
+            and_(InterestRun.status == 'running', InterestRun.updated_at < now - timedelta(seconds=RUN_LEASE_SECONDS))
+        )
+    ).order_by(InterestRun.id).with_for_update(skip_locked=True).first()
+    if run is None:
+        db.session.commit()
+        return None
+    if run.status == 'running':
+        logger.warning(f'Savings interest run {run.id} was abandoned, resuming after account {run.last_account_id}')
+    run.status = 'running'
+    run.started_at = run.started_at or now
+    run.updated_at = now
+    db.session.commit()
+    return run
+
+
+def _credit_chunk(run, rows, now):
+    """Post interest for one chunk of locked due accounts; returns (accounts credited, interest)"""
+    interest = np.round(savings_interest(
+        [row.balance for row in rows],
+        [row.rate for row in rows],
+        [row.method for row in rows],
+        [row.frequency for row in rows],
+        [(run.run_date - row.period_start).days for row in rows]
+    ), 2).tolist()
+    credited = [(row, amount) for row, amount in zip(rows, interest) if amount > 0]
+    if not credited:
+        return 0, 0.0
+
+    transactions = [{
+        'account_id': row.id,
+        'transaction_type': 'interest',
+        'amount': amount,
+        'balance_before': row.balance,
+        'balance_after': row.balance + amount,
+        'description': f'Interest calculated for Savings account ({row.frequency})',
+        'reference_number': Transaction.generate_reference_number(),
+        'status': 'completed',
+        'created_by': run.requested_by,
+        'creator_type': run.requested_by_type,
+        'created_at': now,
+        'updated_at': now
+    } for row, amount in credited]
+    db.session.execute(insert(Transaction), transactions)
+    db.session.execute(update(Account), [{
+        'id': row.id,
+        'balance': row.balance + amount,
+        'last_interest_calculated_date': run.run_date,
+        'updated_at': now
+    } for row, amount in credited])
+
+    # Delivered by the outbox worker once the chunk commits
+    transaction_date = now.strftime('%B %d, %Y at %I:%M %p')
+    emails = []
+    for transaction, (row, _) in zip(transactions, credited):
+        if not row.customer_email:
+            continue
+        subject, html_body, text_body = EmailService.build_transaction_notification(
+            customer_name=row.customer_name,
+            transaction_type='interest',
+            amount=transaction['amount'],
+            account_type='Savings',
+            account_number=f"ACC{row.id:06d}",
+            balance_before=transaction['balance_before'],
+            balance_after=transaction['balance_after'],
+            reference_number=transaction['reference_number'],
+            description=transaction['description'],
+            transaction_date=transaction_date
+        )
+        emails.append({'to_email': row.customer_email, 'subject': subject, 'html_body': html_body, 'text_body': text_body})
+    EmailService.queue_emails(emails)
+    return len(credited), sum(amount for _, amount in credited)
+
+
+def execute_run(run, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Credit every due Savings account for a claimed run, committing chunk by chunk"""
+    try:
+        due = _due_accounts(run.run_date)
+        if run.accounts_total is None:
+            run.accounts_total = db.session.execute(
+                select(func.count()).select_from(due.subquery())
+            ).scalar()
+            db.session.commit()
+
+        while True:
+            rows = db.session.execute(
+                due.where(Account.id > run.last_account_id)
+                .order_by(Account.id)
+                .limit(chunk_size)
+                .with_for_update(of=Account)
+            ).all()
+            if not rows:
+                break
+
+            credited, interest = _credit_chunk(run, rows, datetime.utcnow())
+            run.last_account_id = rows[-1].id
+            run.accounts_processed += credited
+            run.accounts_skipped += len(rows) - credited
+            run.total_interest = Decimal(run.total_interest or 0) + Decimal(str(round(interest, 2)))
+            db.session.commit()
+
+        run.status = 'completed'
+        run.finished_at = datetime.utcnow()
+        db.session.commit()
+        logger.info(
+            f'Savings interest run {run.id}: {run.accounts_processed} accounts credited '
+            f'({run.accounts_skipped} skipped), total {run.total_interest}'
+        )
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f'Savings interest run {run.id} failed after account {run.last_account_id}: {e}')
+        run.status = 'failed'
+        run.error = str(e)
+        run.finished_at = datetime.utcnow()
+        db.session.commit()
+    return run
+
+
+def process_runs(chunk_size=DEFAULT_CHUNK_SIZE):
+    """Carry out queued runs until there are none left; returns how many ran"""
+    executed = 0
+    while True:
+        run = claim_run()
+        if run is None:
+            return executed
+        execute_run(run, chunk_size=chunk_size)
+        executed += 1
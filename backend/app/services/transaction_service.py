@@ -1,25 +1,41 @@
 from app import db
-from app.models import Transaction, Account, AccountType, Customer, User, TransactionEditRequest
+from app.models import Transaction, Account, Customer, User, TransactionEditRequest, InterestRun
+from app.utils.serializers import serialize_transactions
+from app.utils.pagination import keyset_page, cursor_pagination
+from app.services.email_service import EmailService
+from app.services.account_type_catalog import AccountTypeCatalog
+from app.services import savings_interest
+from app.services.ledger import (
+    CREDIT_TYPES, DEBIT_TYPES, POSTING_ATTEMPTS, is_retryable, lock_account, rebalance_after, signed_amount
+)
+from sqlalchemy import case, func, insert
 from datetime import datetime, timedelta
 import logging
-import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+SUMMARY_PERIODS = ('day', 'month')
+BATCH_TRANSACTION_TYPES = ('deposit', 'withdrawal')
+BATCH_MAX_POSTINGS = 1000
+
 class TransactionService:
     @staticmethod
-    def create_transaction(account_id, transaction_type, amount, description, created_by, reference_number=None, payment_type=None):
+    def create_transaction(account_id, transaction_type, amount, description, created_by, reference_number=None, payment_type=None, _attempt=1):
         """Create a new transaction and update account balance"""
         try:
-            # Get account
-            account = Account.query.get(account_id)
+            # Lock the account row until commit so concurrent postings queue up
+            # instead of computing from the same balance
+            account = lock_account(account_id)
             if not account:
                 return {
                     'success': False,
                     'message': 'Account not found',
                     'data': None
                 }
-            
+            # account.account_type below then resolves from the identity map
+            AccountTypeCatalog.get(account.account_type_id)
+
             # Validate account is active
             if account.status != 'active':
                 return {
@@ -63,17 +79,7 @@ class TransactionService:
                 }
             
             # Special handling for RD accounts: Set start_date on first deposit
-            if account.account_type and account.account_type.name == 'RD' and transaction_type == 'deposit':
-                # Check if this is the first deposit (balance was 0 before this transaction)
-                if balance_before == 0:
-                    today = datetime.now().date()
-                    account.start_date = today
-                    logger.info(f'Setting RD account {account_id} start_date to {today} (first deposit)')
-                    
-                    # Recalculate maturity date based on term_in_days
-                    if account.account_type.term_in_days:
-                        account.maturity_date = today + timedelta(days=account.account_type.term_in_days)
-                        logger.info(f'RD account {account_id} maturity_date set to {account.maturity_date}')
+            TransactionService._start_rd_on_first_deposit(account, transaction_type, balance_before)
             
             # Special handling for Loan accounts: Update last_payment_date on repayment
             if account.account_type and account.account_type.name == 'Loan' and transaction_type == 'loan_repayment':
@@ -129,47 +135,13 @@ class TransactionService:
                 else:
                     logger.warning(f'Failed to mark EMI as paid for loan account {account_id}')
             
-            db.session.commit()
-            
-            # Store values needed for email before starting thread (to avoid session issues)
-            customer_email = account.customer.email if account.customer and account.customer.email else None
-            customer_name = account.customer.name if account.customer else None
-            account_type_name = account.account_type.name if account.account_type else 'Unknown'
-            account_number = f"ACC{account.id:06d}"
-            transaction_date = transaction.created_at.strftime('%B %d, %Y at %I:%M %p') if transaction.created_at else None
+            # Queue the notification with the posting; the outbox worker sends it after commit
+            TransactionService._queue_transaction_email(
+                account, transaction_type, amount, balance_before, balance_after,
+                reference_number, description, transaction.created_at
+            )
             
-            # Send transaction notification email (non-blocking background thread)
-            def send_transaction_email_async():
-                try:
-                    if customer_email and customer_name:
-                        from app.services.email_service import EmailService
-                        
-                        EmailService.send_transaction_notification_email(
-                            customer_email=customer_email,
-                            customer_name=customer_name,
-                            transaction_type=transaction_type,
-                            amount=amount,
-                            account_type=account_type_name,
-                            account_number=account_number,
-                            balance_before=balance_before,
-                            balance_after=balance_after,
-                            reference_number=reference_number,
-                            description=description,
-                            transaction_date=transaction_date
-                        )
-                        logger.info(f'Transaction notification email sent to {customer_email} for transaction {transaction.id}')
-                    else:
-                        logger.warning(f'Customer email not found for account {account_id}, skipping email notification')
-                except Exception as email_error:
-                    # Don't fail transaction if email fails
-                    logger.error(f'Error sending transaction notification email: {email_error}')
-                    import traceback
-                    logger.error(f'Email error traceback: {traceback.format_exc()}')
-            
-            # Start email sending in background thread
-            email_thread = threading.Thread(target=send_transaction_email_async, daemon=True)
-            email_thread.start()
-            logger.info(f'Transaction notification email sending started in background thread for transaction {transaction.id}')
+            db.session.commit()
             
             return {
                 'success': True,
@@ -179,6 +151,13 @@ class TransactionService:
             
         except Exception as e:
             db.session.rollback()
+            if is_retryable(e) and _attempt < POSTING_ATTEMPTS:
+                logger.warning(f'Retrying transaction on account {account_id} (attempt {_attempt + 1}): {e}')
+                time.sleep(0.05 * _attempt)
+                return TransactionService.create_transaction(
+                    account_id, transaction_type, amount, description, created_by,
+                    reference_number=reference_number, payment_type=payment_type, _attempt=_attempt + 1
+                )
             logger.error(f'Error creating transaction: {e}')
             return {
                 'success': False,
@@ -186,6 +165,204 @@ class TransactionService:
                 'data': None
             }
     
+    @staticmethod
+    def _start_rd_on_first_deposit(account, transaction_type, balance_before):
+        """RD accounts start (and get their maturity date) on the first deposit"""
+        if not (account.account_type and account.account_type.name == 'RD' and transaction_type == 'deposit'):
+            return
+        # Check if this is the first deposit (balance was 0 before this transaction)
+        if balance_before == 0:
+            today = datetime.now().date()
+            account.start_date = today
+            logger.info(f'Setting RD account {account.id} start_date to {today} (first deposit)')
+            
+            # Recalculate maturity date based on term_in_days
+            if account.account_type.term_in_days:
+                account.maturity_date = today + timedelta(days=account.account_type.term_in_days)
+                logger.info(f'RD account {account.id} maturity_date set to {account.maturity_date}')
+    
+    @staticmethod
+    def create_transactions_batch(postings, created_by, user_role=None, user_id=None, atomic=False):
+        """
+        Post many deposits/withdrawals in one database transaction.
+
+        postings: list of {'account_id', 'transaction_type', 'amount', 'description',
+        'reference_number', 'payment_type'} dicts. All referenced accounts are
+        locked and validated in one pass, in posting order, and the valid
+        postings are written with a single bulk INSERT. Returns per-item
+        results; with atomic=True nothing is posted unless every item is valid.
+        Managers may only post to their assigned customers' accounts.
+        """
+        try:
+            if not postings:
+                return {
+                    'success': False,
+                    'message': 'No postings supplied',
+                    'data': None
+                }
+            if len(postings) > BATCH_MAX_POSTINGS:
+                return {
+                    'success': False,
+                    'message': f'A batch can hold at most {BATCH_MAX_POSTINGS} postings',
+                    'data': None
+                }
+            
+            # Lock every referenced account, in id order so concurrent batches cannot deadlock
+            account_ids = set()
+            for posting in postings:
+                try:
+                    account_ids.add(int(posting.get('account_id')))
+                except (TypeError, ValueError, AttributeError):
+                    pass
+            accounts = {
+                account.id: account
+                for account in Account.query.filter(Account.id.in_(account_ids)).order_by(Account.id)
+                .with_for_update().populate_existing().all()
+            } if account_ids else {}
+            customers = {
+                customer.id: customer
+                for customer in Customer.query.filter(Customer.id.in_({a.customer_id for a in accounts.values()})).all()
+            } if accounts else {}
+            # Puts the account types in the identity map for validate_transaction
+            for account_type_id in {a.account_type_id for a in accounts.values()}:
+                AccountTypeCatalog.get(account_type_id)
+            
+            # Reference numbers must be new, both against the table and within the batch
+            supplied_references = [p.get('reference_number') for p in postings if isinstance(p, dict) and p.get('reference_number')]
+            taken_references = {
+                reference for (reference,) in db.session.query(Transaction.reference_number)
+                .filter(Transaction.reference_number.in_(supplied_references))
+            } if supplied_references else set()
+            
+            creator_type = 'customer' if Customer.query.get(created_by) else 'user'
+            now = datetime.utcnow()
+            
+            results = []
+            rows = []
+            for index, posting in enumerate(postings):
+                error = None
+                account = None
+                try:
+                    account = accounts.get(int(posting.get('account_id')))
+                    amount = float(posting.get('amount'))
+                except (TypeError, ValueError, AttributeError):
+                    amount = None
+                transaction_type = posting.get('transaction_type') if isinstance(posting, dict) else None
+                reference_number = posting.get('reference_number') if isinstance(posting, dict) else None
+                
+                if not isinstance(posting, dict):
+                    error = 'Invalid posting'
+                elif amount is None or amount <= 0:
+                    error = 'Amount must be a positive number'
+                elif transaction_type not in BATCH_TRANSACTION_TYPES:
+                    error = f"transaction_type must be one of: {', '.join(BATCH_TRANSACTION_TYPES)}"
+                elif not account:
+                    error = 'Account not found'
+                elif user_role == 'manager' and customers[account.customer_id].assigned_manager_id != user_id:
+                    error = 'Access denied. Account does not belong to your customers.'
+                elif account.status != 'active':
+                    error = 'Account is not active'
+                elif reference_number and reference_number in taken_references:
+                    error = 'Duplicate reference number'
+                else:
+                    # Validated against the balance left by the earlier postings in this batch
+                    is_valid, validation_message = account.validate_transaction(transaction_type, amount)
+                    if not is_valid:
+                        error = validation_message
+                
+                if error:
+                    results.append({'index': index, 'success': False, 'message': error, 'data': None})
+                    continue
+                
+                balance_before = account.balance
+                balance_after = balance_before + signed_amount(transaction_type, amount)
+                TransactionService._start_rd_on_first_deposit(account, transaction_type, balance_before)
+                account.balance = balance_after
+                account.updated_at = now
+                
+                reference_number = reference_number or Transaction.generate_reference_number()
+                taken_references.add(reference_number)
+                description = posting.get('description') or ''
+                rows.append({
+                    'account_id': account.id,
+                    'transaction_type': transaction_type,
+                    'amount': amount,
+                    'balance_before': balance_before,
+                    'balance_after': balance_after,
+                    'description': description,
+                    'reference_number': reference_number,
+                    'status': 'completed',
+                    'created_by': created_by,
+                    'creator_type': creator_type,
+                    'payment_type': posting.get('payment_type'),
+                    'created_at': now,
+                    'updated_at': now
+                })
+                results.append({'index': index, 'success': True, 'message': 'Transaction completed successfully', 'data': None})
+                TransactionService._queue_transaction_email(
+                    account, transaction_type, amount, balance_before, balance_after,
+                    reference_number, description, now
+                )
+            
+            failed = sum(1 for result in results if not result['success'])
+            if atomic and failed:
+                db.session.rollback()
+                for result in results:
+                    if result['success']:
+                        result.update(success=False, message='Not posted: batch rejected')
+                return {
+                    'success': False,
+                    'message': f'Batch rejected: {failed} of {len(postings)} postings are invalid',
+                    'data': {'posted': 0, 'failed': len(postings), 'results': results}
+                }
+            
+            if rows:
+                transactions = db.session.scalars(insert(Transaction).returning(Transaction, sort_by_parameter_order=True), rows).all()
+                posted = iter(transactions)
+                for result in results:
+                    if result['success']:
+                        result['data'] = next(posted).to_dict()
+            db.session.commit()
+            
+            logger.info(f'Batch posting by {created_by}: {len(rows)} posted, {failed} failed')
+            
+            return {
+                'success': True,
+                'message': f'{len(rows)} of {len(postings)} postings completed',
+                'data': {'posted': len(rows), 'failed': failed, 'results': results}
+            }
+            
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f'Error in batch posting: {e}')
+            return {
+                'success': False,
+                'message': 'Failed to post transaction batch',
+                'data': None
+            }
+    
+    @staticmethod
+    def _queue_transaction_email(account, transaction_type, amount, balance_before, balance_after, reference_number, description, transaction_time):
+        """Queue the customer's transaction notification in the current DB transaction"""
+        customer = account.customer
+        if not customer or not customer.email:
+            logger.warning(f'Customer email not found for account {account.id}, skipping email notification')
+            return
+        EmailService.send_transaction_notification_email(
+            customer_email=customer.email,
+            customer_name=customer.name,
+            transaction_type=transaction_type,
+            amount=amount,
+            account_type=account.account_type.name if account.account_type else 'Unknown',
+            account_number=f"ACC{account.id:06d}",
+            balance_before=balance_before,
+            balance_after=balance_after,
+            reference_number=reference_number,
+            description=description,
+            transaction_date=transaction_time.strftime('%B %d, %Y at %I:%M %p') if transaction_time else None,
+            queue=True
+        )
+    
     @staticmethod
     def create_edit_request(transaction_id, new_amount, reason, requested_by, user_role=None):
         """Create a transaction edit request"""
@@ -350,132 +527,53 @@ class TransactionService:
                     'data': None
                 }
             
-            # Get account
-            account = Account.query.get(transaction.account_id)
+            # Lock the account so postings and other edits on it wait for this one
+            account = lock_account(transaction.account_id)
             if not account:
                 return {
                     'success': False,
                     'message': 'Account not found',
                     'data': None
                 }
+            db.session.refresh(transaction)
             
-            # Calculate the difference
             old_amount = transaction.amount
             new_amount = edit_request.requested_amount
-            amount_difference = new_amount - old_amount
             
-            # Recalculate balance_before and balance_after
-            # We need to reverse the old transaction effect and apply the new one
-            # Get the balance that was before this transaction
-            # We can get this from the transaction's balance_before field
+            # Swap the old amount's effect for the new one; balance_before is unchanged
             balance_before = transaction.balance_before
-            
-            # Calculate what the balance_after should be with the new amount
-            # First, reverse the old transaction effect
-            if transaction.transaction_type in ['deposit', 'interest', 'loan_disbursal']:
-                # These add to balance, so reverse by subtracting old amount
-                temp_balance = transaction.balance_after - old_amount
-            elif transaction.transaction_type in ['withdrawal', 'penalty', 'loan_repayment']:
-                # These subtract from balance, so reverse by adding old amount
-                temp_balance = transaction.balance_after + old_amount
-            else:
-                temp_balance = transaction.balance_after
-            
-            # Now apply the new amount
-            if transaction.transaction_type in ['deposit', 'interest', 'loan_disbursal']:
-                balance_after = temp_balance + new_amount
-            elif transaction.transaction_type in ['withdrawal', 'penalty', 'loan_repayment']:
-                balance_after = temp_balance - new_amount
-            else:
-                balance_after = temp_balance
+            balance_after = (
+                transaction.balance_after
+                - signed_amount(transaction.transaction_type, old_amount)
+                + signed_amount(transaction.transaction_type, new_amount)
+            )
             
             # Update transaction
             transaction.amount = new_amount
-            transaction.balance_before = balance_before
             transaction.balance_after = balance_after
             transaction.updated_at = datetime.utcnow()
             
-            # Update account balance to match the new balance_after
-            # We need to recalculate all subsequent transactions' balances
-            # For now, let's update the account balance directly
-            # Get all transactions after this one for the same account
-            subsequent_transactions = Transaction.query.filter(
-                Transaction.account_id == account.id,
-                Transaction.id > transaction.id
-            ).order_by(Transaction.id.asc()).all()
-            
-            # Update account balance
-            account.balance = balance_after
+            # Shift every later transaction on the account and take the closing balance
+            account.balance = rebalance_after(account.id, transaction.id, balance_after)
             account.updated_at = datetime.utcnow()
             
-            # Recalculate balances for subsequent transactions
-            current_balance = balance_after
-            for subsequent_txn in subsequent_transactions:
-                if subsequent_txn.transaction_type in ['deposit', 'interest', 'loan_disbursal']:
-                    subsequent_txn.balance_before = current_balance
-                    current_balance = current_balance + subsequent_txn.amount
-                    subsequent_txn.balance_after = current_balance
-                elif subsequent_txn.transaction_type in ['withdrawal', 'penalty', 'loan_repayment']:
-                    subsequent_txn.balance_before = current_balance
-                    current_balance = current_balance - subsequent_txn.amount
-                    subsequent_txn.balance_after = current_balance
-                subsequent_txn.updated_at = datetime.utcnow()
-            
-            # Update account balance to final calculated balance
-            account.balance = current_balance
-            
             # Mark edit request as approved and store old_amount
             edit_request.status = 'approved'
             edit_request.approved_by = approved_by
             edit_request.old_amount = old_amount  # Store the old amount before this edit
             edit_request.updated_at = datetime.utcnow()
             
+            # Queue the update notification in the same transaction
+            update_description = f"Transaction amount updated from ₹{old_amount:,.2f} to ₹{new_amount:,.2f}. {edit_request.reason or 'Transaction updated by admin.'}"
+            TransactionService._queue_transaction_email(
+                account, transaction.transaction_type, new_amount, balance_before, account.balance,
+                transaction.reference_number, update_description, transaction.updated_at
+            )
+            
             db.session.commit()
             
             logger.info(f'Edit request {request_id} approved. Transaction {transaction.id} updated from {old_amount} to {new_amount}')
             
-            # Store values needed for email before starting thread (to avoid session issues)
-            customer_email = account.customer.email if account.customer and account.customer.email else None
-            customer_name = account.customer.name if account.customer else None
-            account_type_name = account.account_type.name if account.account_type else 'Unknown'
-            account_number = f"ACC{account.id:06d}"
-            transaction_date = transaction.updated_at.strftime('%B %d, %Y at %I:%M %p') if transaction.updated_at else None
-            final_balance = account.balance  # Use final account balance after all recalculations
-            update_description = f"Transaction amount updated from ₹{old_amount:,.2f} to ₹{new_amount:,.2f}. {edit_request.reason or 'Transaction updated by admin.'}"
-            
-            # Send transaction update notification email (non-blocking background thread)
-            def send_transaction_update_email_async():
-                try:
-                    if customer_email and customer_name:
-                        from app.services.email_service import EmailService
-                        
-                        EmailService.send_transaction_notification_email(
-                            customer_email=customer_email,
-                            customer_name=customer_name,
-                            transaction_type=transaction.transaction_type,
-                            amount=new_amount,
-                            account_type=account_type_name,
-                            account_number=account_number,
-                            balance_before=balance_before,
-                            balance_after=final_balance,
-                            reference_number=transaction.reference_number,
-                            description=update_description,
-                            transaction_date=transaction_date
-                        )
-                        logger.info(f'Transaction update notification email sent to {customer_email} for transaction {transaction.id}')
-                    else:
-                        logger.warning(f'Customer email not found for account {account.id}, skipping email notification')
-                except Exception as email_error:
-                    # Don't fail transaction update if email fails
-                    logger.error(f'Error sending transaction update notification email: {email_error}')
-                    import traceback
-                    logger.error(f'Email error traceback: {traceback.format_exc()}')
-            
-            # Start email sending in background thread
-            email_thread = threading.Thread(target=send_transaction_update_email_async, daemon=True)
-            email_thread.start()
-            logger.info(f'Transaction update notification email sending started in background thread for transaction {transaction.id}')
-            
             return {
                 'success': True,
                 'message': 'Edit request approved and transaction updated successfully',
@@ -518,19 +616,18 @@ class TransactionService:
                     'data': None
                 }
             
-            # Get account
-            account = Account.query.get(transaction.account_id)
+            # Lock the account so postings and other edits on it wait for this one
+            account = lock_account(transaction.account_id)
             if not account:
                 return {
                     'success': False,
                     'message': 'Account not found',
                     'data': None
                 }
+            db.session.refresh(transaction)
             
-            # Calculate the difference
             old_amount = transaction.amount
             new_amount = float(new_amount)
-            amount_difference = new_amount - old_amount
             
             if old_amount == new_amount:
                 return {
@@ -539,58 +636,23 @@ class TransactionService:
                     'data': None
                 }
             
-            # Recalculate balance_before and balance_after
+            # Swap the old amount's effect for the new one; balance_before is unchanged
             balance_before = transaction.balance_before
-            
-            # First, reverse the old transaction effect
-            if transaction.transaction_type in ['deposit', 'interest', 'loan_disbursal']:
-                temp_balance = transaction.balance_after - old_amount
-            elif transaction.transaction_type in ['withdrawal', 'penalty', 'loan_repayment']:
-                temp_balance = transaction.balance_after + old_amount
-            else:
-                temp_balance = transaction.balance_after
-            
-            # Now apply the new amount
-            if transaction.transaction_type in ['deposit', 'interest', 'loan_disbursal']:
-                balance_after = temp_balance + new_amount
-            elif transaction.transaction_type in ['withdrawal', 'penalty', 'loan_repayment']:
-                balance_after = temp_balance - new_amount
-            else:
-                balance_after = temp_balance
+            balance_after = (
+                transaction.balance_after
+                - signed_amount(transaction.transaction_type, old_amount)
+                + signed_amount(transaction.transaction_type, new_amount)
+            )
             
             # Update transaction
             transaction.amount = new_amount
-            transaction.balance_before = balance_before
             transaction.balance_after = balance_after
             transaction.updated_at = datetime.utcnow()
             
-            # Update account balance to match the new balance_after
-            # Recalculate all subsequent transactions' balances
-            subsequent_transactions = Transaction.query.filter(
-                Transaction.account_id == account.id,
-                Transaction.id > transaction.id
-            ).order_by(Transaction.id.asc()).all()
-            
-            # Update account balance
-            account.balance = balance_after
+            # Shift every later transaction on the account and take the closing balance
+            account.balance = rebalance_after(account.id, transaction.id, balance_after)
             account.updated_at = datetime.utcnow()
             
-            # Recalculate balances for subsequent transactions
-            current_balance = balance_after
-            for subsequent_txn in subsequent_transactions:
-                if subsequent_txn.transaction_type in ['deposit', 'interest', 'loan_disbursal']:
-                    subsequent_txn.balance_before = current_balance
-                    current_balance = current_balance + subsequent_txn.amount
-                    subsequent_txn.balance_after = current_balance
-                elif subsequent_txn.transaction_type in ['withdrawal', 'penalty', 'loan_repayment']:
-                    subsequent_txn.balance_before = current_balance
-                    current_balance = current_balance - subsequent_txn.amount
-                    subsequent_txn.balance_after = current_balance
-                subsequent_txn.updated_at = datetime.utcnow()
-            
-            # Update account balance to final calculated balance
-            account.balance = current_balance
-            
             # Create edit request record for audit trail (auto-approved)
             edit_request = TransactionEditRequest(
                 transaction_id=transaction_id,
@@ -604,52 +666,17 @@ class TransactionService:
             )
             db.session.add(edit_request)
             
+            # Queue the update notification in the same transaction
+            update_description = f"Transaction amount updated from ₹{old_amount:,.2f} to ₹{new_amount:,.2f}. {reason or 'Transaction updated by admin.'}"
+            TransactionService._queue_transaction_email(
+                account, transaction.transaction_type, new_amount, balance_before, account.balance,
+                transaction.reference_number, update_description, transaction.updated_at
+            )
+            
             db.session.commit()
             
             logger.info(f'Direct edit by admin {edited_by}. Transaction {transaction.id} updated from {old_amount} to {new_amount}')
             
-            # Store values needed for email before starting thread (to avoid session issues)
-            customer_email = account.customer.email if account.customer and account.customer.email else None
-            customer_name = account.customer.name if account.customer else None
-            account_type_name = account.account_type.name if account.account_type else 'Unknown'
-            account_number = f"ACC{account.id:06d}"
-            transaction_date = transaction.updated_at.strftime('%B %d, %Y at %I:%M %p') if transaction.updated_at else None
-            final_balance = account.balance
-            update_description = f"Transaction amount updated from ₹{old_amount:,.2f} to ₹{new_amount:,.2f}. {reason or 'Transaction updated by admin.'}"
-            
-            # Send transaction update notification email (non-blocking background thread)
-            def send_transaction_update_email_async():
-                try:
-                    if customer_email and customer_name:
-                        from app.services.email_service import EmailService
-                        
-                        EmailService.send_transaction_notification_email(
-                            customer_email=customer_email,
-                            customer_name=customer_name,
-                            transaction_type=transaction.transaction_type,
-                            amount=new_amount,
-                            account_type=account_type_name,
-                            account_number=account_number,
-                            balance_before=balance_before,
-                            balance_after=final_balance,
-                            reference_number=transaction.reference_number,
-                            description=update_description,
-                            transaction_date=transaction_date
-                        )
-                        logger.info(f'Transaction update notification email sent to {customer_email} for transaction {transaction.id}')
-                    else:
-                        logger.warning(f'Customer email not found for account {account.id}, skipping email notification')
-                except Exception as email_error:
-                    # Don't fail transaction update if email fails
-                    logger.error(f'Error sending transaction update notification email: {email_error}')
-                    import traceback
-                    logger.error(f'Email error traceback: {traceback.format_exc()}')
-            
-            # Start email sending in background thread
-            email_thread = threading.Thread(target=send_transaction_update_email_async, daemon=True)
-            email_thread.start()
-            logger.info(f'Transaction update notification email sending started in background thread for transaction {transaction.id}')
-            
             return {
                 'success': True,
                 'message': 'Transaction updated successfully',
@@ -803,8 +830,8 @@ class TransactionService:
                 'data': None
             }
     @staticmethod
-    def get_account_transactions(account_id, page=1, limit=10, transaction_type=None, start_date=None, end_date=None):
-        """Get transactions for a specific account with pagination and filters"""
+    def get_account_transactions(account_id, page=1, limit=10, transaction_type=None, start_date=None, end_date=None, cursor=None, approximate_total=False):
+        """Get transactions for a specific account with pagination and filters (cursor mode when cursor is not None)"""
         try:
             query = Transaction.query.filter_by(account_id=account_id)
             
@@ -821,6 +848,16 @@ class TransactionService:
             # Order by created_at descending
             query = query.order_by(Transaction.created_at.desc())
             
+            # Cursor mode: seek past the last row seen instead of counting and offsetting
+            if cursor is not None:
+                transactions, next_cursor = keyset_page(query, Transaction, cursor, limit)
+                return {
+                    'success': True,
+                    'message': 'Transactions retrieved successfully',
+                    'data': serialize_transactions(transactions),
+                    'pagination': cursor_pagination(query, next_cursor, limit, approximate_total)
+                }
+            
             # Get total count
             total_count = query.count()
             
@@ -836,7 +873,7 @@ class TransactionService:
             return {
                 'success': True,
                 'message': 'Transactions retrieved successfully',
-                'data': [transaction.to_dict() for transaction in transactions],
+                'data': serialize_transactions(transactions),
                 'pagination': {
                     'current_page': page,
                     'total_pages': total_pages,
@@ -847,6 +884,8 @@ class TransactionService:
                 }
             }
             
+        except ValueError as e:
+            return {'success': False, 'message': str(e), 'data': None}
         except Exception as e:
             logger.error(f'Error getting account transactions: {e}')
             return {
@@ -856,8 +895,8 @@ class TransactionService:
             }
     
     @staticmethod
-    def get_all_transactions(page=1, limit=10, transaction_type=None, account_id=None, customer_id=None, start_date=None, end_date=None, search=None, user_role=None, user_id=None):
-        """Get all transactions with pagination and filters (Admin/Manager only)"""
+    def get_all_transactions(page=1, limit=10, transaction_type=None, account_id=None, customer_id=None, start_date=None, end_date=None, search=None, user_role=None, user_id=None, cursor=None, approximate_total=False):
+        """Get all transactions with pagination and filters (Admin/Manager only; cursor mode when cursor is not None)"""
         try:
             query = Transaction.query.join(Account).join(Customer)
             
@@ -894,6 +933,16 @@ class TransactionService:
             # Order by created_at descending
             query = query.order_by(Transaction.created_at.desc())
             
+            # Cursor mode: seek past the last row seen instead of counting and offsetting
+            if cursor is not None:
+                transactions, next_cursor = keyset_page(query, Transaction, cursor, limit)
+                return {
+                    'success': True,
+                    'message': 'Transactions retrieved successfully',
+                    'data': serialize_transactions(transactions),
+                    'pagination': cursor_pagination(query, next_cursor, limit, approximate_total)
+                }
+            
             # Get total count
             total_count = query.count()
             
@@ -909,7 +958,7 @@ class TransactionService:
             return {
                 'success': True,
                 'message': 'Transactions retrieved successfully',
-                'data': [transaction.to_dict() for transaction in transactions],
+                'data': serialize_transactions(transactions),
                 'pagination': {
                     'current_page': page,
                     'total_pages': total_pages,
@@ -920,6 +969,8 @@ class TransactionService:
                 }
             }
             
+        except ValueError as e:
+            return {'success': False, 'message': str(e), 'data': None}
         except Exception as e:
             logger.error(f'Error getting all transactions: {e}')
             return {
@@ -929,47 +980,80 @@ class TransactionService:
             }
     
     @staticmethod
-    def get_transaction_summary(account_id=None, start_date=None, end_date=None):
-        """Get transaction summary statistics"""
+    def get_transaction_summary(account_id=None, start_date=None, end_date=None, period=None):
+        """
+        Get transaction summary statistics, aggregated in the database.
+        period ('day' or 'month') adds a per-period breakdown.
+        """
         try:
-            query = Transaction.query
-            
+            if period and period not in SUMMARY_PERIODS:
+                return {
+                    'success': False,
+                    'message': f"period must be one of: {', '.join(SUMMARY_PERIODS)}",
+                    'data': None
+                }
+
+            filters = []
             if account_id:
-                query = query.filter_by(account_id=account_id)
-            
+                filters.append(Transaction.account_id == account_id)
             if start_date:
-                query = query.filter(Transaction.created_at >= start_date)
-            
+                filters.append(Transaction.created_at >= start_date)
             if end_date:
-                query = query.filter(Transaction.created_at <= end_date)
-            
-            # Get all transactions
-            transactions = query.all()
-            
-            # Calculate summary
-            total_deposits = sum(t.amount for t in transactions if t.transaction_type in ['deposit', 'interest', 'loan_disbursal'])
-            total_withdrawals = sum(t.amount for t in transactions if t.transaction_type in ['withdrawal', 'penalty', 'loan_repayment'])
-            total_transactions = len(transactions)
-            
-            # Group by transaction type
+                filters.append(Transaction.created_at <= end_date)
+
+            # One row per transaction type
+            type_rows = db.session.query(
+                Transaction.transaction_type,
+                func.count(Transaction.id),
+                func.coalesce(func.sum(Transaction.amount), 0)
+            ).filter(*filters).group_by(Transaction.transaction_type).all()
+
             type_summary = {}
-            for transaction in transactions:
-                t_type = transaction.transaction_type
-                if t_type not in type_summary:
-                    type_summary[t_type] = {'count': 0, 'amount': 0}
-                type_summary[t_type]['count'] += 1
-                type_summary[t_type]['amount'] += transaction.amount
-            
+            total_deposits = 0
+            total_withdrawals = 0
+            total_transactions = 0
+            for t_type, count, amount in type_rows:
+                type_summary[t_type] = {'count': count, 'amount': float(amount)}
+                total_transactions += count
+                if t_type in CREDIT_TYPES:
+                    total_deposits += float(amount)
+                elif t_type in DEBIT_TYPES:
+                    total_withdrawals += float(amount)
+
+            data = {
+                'total_deposits': total_deposits,
+                'total_withdrawals': total_withdrawals,
+                'net_amount': total_deposits - total_withdrawals,
+                'total_transactions': total_transactions,
+                'type_summary': type_summary
+            }
+
+            if period:
+                bucket = func.date_trunc(period, Transaction.created_at).label('bucket')
+                period_rows = db.session.query(
+                    bucket,
+                    func.count(Transaction.id),
+                    func.coalesce(func.sum(case((Transaction.transaction_type.in_(CREDIT_TYPES), Transaction.amount))), 0),
+                    func.coalesce(func.sum(case((Transaction.transaction_type.in_(DEBIT_TYPES), Transaction.amount))), 0)
+                ).filter(*filters).group_by(bucket).order_by(bucket).all()
+
+                data['period'] = period
+                # Legacy rows without created_at fall in one bucket with period_start None (sorted last)
+                data['breakdown'] = [
+                    {
+                        'period_start': period_start.date().isoformat() if period_start else None,
+                        'total_transactions': count,
+                        'total_deposits': float(deposits),
+                        'total_withdrawals': float(withdrawals),
+                        'net_amount': float(deposits) - float(withdrawals)
+                    }
+                    for period_start, count, deposits, withdrawals in period_rows
+                ]
+
             return {
                 'success': True,
                 'message': 'Transaction summary retrieved successfully',
-                'data': {
-                    'total_deposits': total_deposits,
-                    'total_withdrawals': total_withdrawals,
-                    'net_amount': total_deposits - total_withdrawals,
-                    'total_transactions': total_transactions,
-                    'type_summary': type_summary
-                }
+                'data': data
             }
             
         except Exception as e:
@@ -1171,92 +1255,48 @@ class TransactionService:
             }
     
     @staticmethod
-    def bulk_calculate_interest_for_savings(created_by):
-        """Calculate interest for all active Savings accounts that are due"""
+    def bulk_calculate_interest_for_savings(created_by, creator_type='user'):
+        """Queue interest for all active Savings accounts that are due; the job process credits them"""
         try:
-            from app.models import AccountType
+            run, created = savings_interest.request_run(created_by, creator_type)
+            return {
+                'success': True,
+                'message': 'Savings interest run queued' if created else 'A Savings interest run is already in progress',
+                'data': run.to_dict()
+            }
             
-            # Get Savings account type
-            savings_type = AccountType.query.filter_by(name='Savings').first()
-            if not savings_type:
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f'Error in bulk_calculate_interest_for_savings: {e}')
+            return {
+                'success': False,
+                'message': 'Failed to bulk calculate interest',
+                'data': None
+            }
+    
+    @staticmethod
+    def get_savings_interest_run(run_id=None):
+        """Progress and outcome of a Savings interest run (the latest one if run_id is None)"""
+        try:
+            query = InterestRun.query.filter_by(job_name=savings_interest.JOB_NAME)
+            run = query.filter_by(id=run_id).first() if run_id is not None else query.order_by(InterestRun.id.desc()).first()
+            if not run:
                 return {
                     'success': False,
-                    'message': 'Savings account type not found',
+                    'message': 'Interest run not found',
                     'data': None
                 }
             
-            # Get all active Savings accounts
-            savings_accounts = Account.query.filter_by(
-                account_type_id=savings_type.id,
-                status='active'
-            ).all()
-            
-            if not savings_accounts:
-                return {
-                    'success': True,
-                    'message': 'No active Savings accounts found',
-                    'data': {
-                        'total_accounts': 0,
-                        'calculated': 0,
-                        'skipped': 0,
-                        'failed': 0
-                    }
-                }
-            
-            calculated = 0
-            skipped = 0
-            failed = 0
-            results = []
-            
-            for account in savings_accounts:
-                try:
-                    result = TransactionService.calculate_interest(
-                        account_id=account.id,
-                        created_by=created_by,
-                        force=False  # Don't force, respect frequency
-                    )
-                    
-                    if result.get('success'):
-                        calculated += 1
-                    else:
-                        # Check if it was skipped due to frequency
-                        if 'already calculated' in result.get('message', '').lower():
-                            skipped += 1
-                        else:
-                            failed += 1
-                    
-                    results.append({
-                        'account_id': account.id,
-                        'customer_id': account.customer_id,
-                        'success': result.get('success'),
-                        'message': result.get('message')
-                    })
-                except Exception as e:
-                    logger.error(f'Error calculating interest for account {account.id}: {e}')
-                    failed += 1
-                    results.append({
-                        'account_id': account.id,
-                        'customer_id': account.customer_id,
-                        'success': False,
-                        'message': str(e)
-                    })
-            
             return {
                 'success': True,
-                'message': f'Interest calculation completed. Calculated: {calculated}, Skipped: {skipped}, Failed: {failed}',
-                'data': {
-                    'total_accounts': len(savings_accounts),
-                    'calculated': calculated,
-                    'skipped': skipped,
-                    'failed': failed,
-                    'results': results
-                }
+                'message': 'Interest run retrieved successfully',
+                'data': run.to_dict()
             }
             
         except Exception as e:
-            logger.error(f'Error in bulk_calculate_interest_for_savings: {e}')
+            logger.error(f'Error getting Savings interest run {run_id}: {e}')
             return {
                 'success': False,
-                'message': 'Failed to bulk calculate interest',
+                'message': 'Failed to get interest run',
                 'data': None
             }
@@ -2,9 +2,10 @@ from app import db
 from app.models import User, Customer, UserPermission
 from werkzeug.security import generate_password_hash
 from sqlalchemy.orm import joinedload
+from app.utils.identity import invalidate_principal, PRINCIPAL_CUSTOMER
+from app.services.permission_service import PermissionService
 import logging
 import os
-import threading
 
 logger = logging.getLogger(__name__)
 
@@ -12,22 +13,9 @@ class UserManagementService:
     
     @staticmethod
     def get_user_role_and_id(user_id):
-        """Get user role and ID from both users and customers tables"""
-        try:
-            # First check users table (for admin)
-            user = User.query.get(user_id)
-            if user:
-                return user.role, user.id
-            
-            # If not found in users table, check customers table (for staff/manager)
-            customer = Customer.query.get(user_id)
-            if customer:
-                return customer.role, customer.id
-            
-            return None, None
-        except Exception as e:
-            logger.error(f'Error getting user role and ID: {e}')
-            return None, None
+        """Get user role and ID (the request's principal, or users then customers table)"""
+        from app.services.customer_service import CustomerService
+        return CustomerService.get_user_role_and_id(user_id)
     
     @staticmethod
     def get_all_managers():
@@ -91,41 +79,23 @@ class UserManagementService:
             )
             
             db.session.add(manager)
-            db.session.commit()
+            db.session.flush()
             
-            # Send welcome email with credentials (non-blocking background thread)
-            # Import Flask app to create application context in thread
-            from flask import current_app
+            # Queue the welcome email with credentials in the same transaction
+            from app.services.email_service import EmailService
+            frontend_url = os.environ.get('FRONTEND_URL', 'https://mini-bank-project.vercel.app')
             
-            # Capture the app instance before starting the thread
-            app = current_app._get_current_object()
-            
-            def send_welcome_email_async():
-                # Push Flask application context for the thread
-                with app.app_context():
-                    try:
-                        from app.services.email_service import EmailService
-                        
-                        frontend_url = os.environ.get('FRONTEND_URL', 'https://mini-bank-project.vercel.app')
-                        login_url = f"{frontend_url}/login"
-                        
-                        EmailService.send_customer_welcome_email(
-                            customer_email=email,
-                            customer_name=name,
-                            customer_id=manager.id,
-                            password=password,  # Plain password - only sent once at creation
-                            role='manager',  # Manager role - will include credentials and login link
-                            login_url=login_url
-                        )
-                        logger.info(f'Welcome email sent to manager {email}')
-                    except Exception as email_error:
-                        # Don't fail manager creation if email fails
-                        logger.error(f'Error sending welcome email to manager {email}: {email_error}')
+            EmailService.send_customer_welcome_email(
+                customer_email=email,
+                customer_name=name,
+                customer_id=manager.id,
+                password=password,  # Plain password - only sent once at creation
+                role='manager',  # Manager role - will include credentials and login link
+                login_url=f"{frontend_url}/login",
+                queue=True
+            )
             
-            # Start email sending in background thread
-            email_thread = threading.Thread(target=send_welcome_email_async, daemon=True)
-            email_thread.start()
-            logger.info(f'Welcome email sending started in background thread for manager {email}')
+            db.session.commit()
             
             return {
                 'success': True,
@@ -228,8 +198,11 @@ class UserManagementService:
             
             # Also remove all permissions
             UserPermission.query.filter_by(user_id=manager_id).delete()
+            manager.permissions_version = Customer.permissions_version + 1
             
             db.session.commit()
+            invalidate_principal(PRINCIPAL_CUSTOMER, manager_id)
+            PermissionService.invalidate(manager_id)
             
             return {
                 'success': True,
@@ -267,6 +240,7 @@ class UserManagementService:
             manager.is_active = is_active
             manager.last_update_by = last_update_by
             db.session.commit()
+            invalidate_principal(PRINCIPAL_CUSTOMER, manager.id)
             
             status_text = 'activated' if is_active else 'deactivated'
             return {
@@ -323,7 +297,14 @@ class UserManagementService:
                 )
                 db.session.add(user_permission)
             
+            # Processes holding the old matrix reload it when they see the new version
+            Customer.query.filter_by(id=manager_id).update(
+                {Customer.permissions_version: Customer.permissions_version + 1}, synchronize_session=False
+            )
+            
             db.session.commit()
+            invalidate_principal(PRINCIPAL_CUSTOMER, manager_id)
+            PermissionService.invalidate(manager_id)
             
             return {
                 'success': True,
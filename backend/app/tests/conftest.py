@@ -0,0 +1,37 @@
+"""
+Shared fixtures for the PostgreSQL-backed suites.
+
+Those suites need an EMPTY scratch database in TEST_DATABASE_URL; each test
+module creates the schema from the models and drops it again afterwards.
+They skip themselves when TEST_DATABASE_URL is not set.
+"""
+import os
+
+import pytest
+from sqlalchemy import inspect
+
+TEST_DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
+
+
+@pytest.fixture(scope='module')
+def scratch_db():
+    """(app, db) on a fresh schema in TEST_DATABASE_URL, inside an app context"""
+    previous_url = os.environ.get('DATABASE_URL')
+    os.environ['DATABASE_URL'] = TEST_DATABASE_URL
+    try:
+        from app import create_app, db
+        app = create_app('development', start_scheduler=False)
+        with app.app_context():
+            if inspect(db.engine).get_table_names():
+                pytest.fail('TEST_DATABASE_URL must point at an empty scratch database')
+            db.create_all()
+            try:
+                yield app, db
+            finally:
+                db.session.remove()
+                db.drop_all()
+    finally:
+        if previous_url is None:
+            os.environ.pop('DATABASE_URL', None)
+        else:
+            os.environ['DATABASE_URL'] = previous_url
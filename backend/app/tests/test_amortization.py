@@ -0,0 +1,123 @@
+"""
+The NumPy amortization engine matches the month-by-month loop that
+EMIService.generate_emi_installments used before it. No database is needed.
+"""
+from calendar import monthrange
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.models import Account
+from app.services.amortization import amortize, due_dates
+
+
+def _next_due_date(base_date, frequency, due_day):
+    """EMIService._calculate_next_due_date as it was, for one period"""
+    if frequency == 'weekly':
+        return base_date + timedelta(days=7)
+    if frequency == 'daily':
+        return base_date + timedelta(days=1)
+    months = 3 if frequency == 'quarterly' else 1
+    year, month = divmod(base_date.year * 12 + base_date.month - 1 + months, 12)
+    month += 1
+    return date(year, month, min(due_day, monthrange(year, month)[1]))
+
+
+def _loop_schedule(principal, emi_amount, interest_rate, term_months, frequency, due_day, start_date):
+    """The original per-installment loop, returning plain tuples"""
+    monthly_rate = interest_rate / 100 / 12 if interest_rate else 0
+    installments = []
+    remaining_principal = principal
+    for emi_number in range(1, term_months + 1):
+        interest_component = remaining_principal * monthly_rate
+        principal_component = emi_amount - interest_component
+        if emi_number == term_months:
+            principal_component = remaining_principal
+            emi_amount_adjusted = principal_component + interest_component
+        else:
+            emi_amount_adjusted = emi_amount
+        previous = installments[-1][1] if installments else start_date
+        due_date = _next_due_date(previous, frequency, due_day)
+        remaining_principal_after = remaining_principal - principal_component
+        installments.append((
+            emi_number, due_date, emi_amount_adjusted, principal_component, interest_component,
+            remaining_principal, max(0, remaining_principal_after)
+        ))
+        remaining_principal = remaining_principal_after
+        if remaining_principal <= 0:
+            break
+    return installments
+
+
+LOANS = [
+    # principal, interest rate, term, frequency, due day, start date, EMI override
+    (100000, 12, 12, 'monthly', 5, date(2026, 1, 15), None),
+    (250000, 9.5, 60, 'monthly', 31, date(2025, 11, 30), None),
+    (50000, 0, 10, 'monthly', 28, date(2024, 2, 29), None),
+    (75000, 14, 8, 'quarterly', 31, date(2026, 10, 31), None),
+    (20000, 18, 26, 'weekly', 1, date(2026, 3, 3), None),
+    (12000, 10, 30, 'daily', 1, date(2026, 12, 20), None),
+    (300000, 11, 240, None, 15, date(2026, 6, 10), None),
+    # Overpaying EMI: the loan is cleared before the term ends
+    (100000, 12, 24, 'monthly', 10, date(2026, 4, 1), 30000),
+]
+
+
+def _emi(principal, interest_rate, term_months):
+    return Account().calculate_emi(principal=principal, interest_rate=interest_rate, term_months=term_months)
+
+
+def _expected(loans):
+    return [
+        _loop_schedule(principal, emi or _emi(principal, rate, term), rate, term, frequency or 'monthly', due_day, start)
+        for principal, rate, term, frequency, due_day, start, emi in loans
+    ]
+
+
+def _engine(loans):
+    principal, rate, term, frequency, due_day, start, emi = zip(*loans)
+    emi_amount = [e or _emi(p, r, t) for p, r, t, e in zip(principal, rate, term, emi)]
+    monthly_rate = [r / 100 / 12 if r else 0 for r in rate]
+    schedule = amortize(principal, emi_amount, monthly_rate, term)
+    dates = due_dates(start, [f or 'monthly' for f in frequency], due_day, max(term))
+    return [
+        [
+            (
+                k + 1, dates[i, k].tolist(), schedule.emi_amount[i, k], schedule.principal_component[i, k],
+                schedule.interest_component[i, k], schedule.remaining_principal_before[i, k],
+                schedule.remaining_principal_after[i, k]
+            )
+            for k in range(schedule.count[i])
+        ]
+        for i in range(len(loans))
+    ]
+
+
+def _assert_same(actual, expected):
+    assert len(actual) == len(expected)
+    for got, want in zip(actual, expected):
+        assert got[:2] == want[:2]
+        assert got[2:] == pytest.approx(want[2:], rel=1e-9, abs=1e-6)
+
+
+@pytest.mark.parametrize('loan', LOANS, ids=[f'{l[3]}-{l[2]}' for l in LOANS])
+def test_single_loan_matches_loop(loan):
+    _assert_same(_engine([loan])[0], _expected([loan])[0])
+
+
+def test_batch_matches_loop():
+    for actual, expected in zip(_engine(LOANS), _expected(LOANS)):
+        _assert_same(actual, expected)
+
+
+def test_overpaying_emi_stops_early():
+    schedule = amortize(100000, 30000, 0.01, 24)
+    assert schedule.count.tolist() == [4]
+    assert schedule.remaining_principal_after[0, 3] == 0
+
+
+def test_due_dates_clamp_to_month_end():
+    dates = due_dates(date(2026, 1, 31), 'monthly', 31, 4)[0].tolist()
+    assert dates == [date(2026, 2, 28), date(2026, 3, 31), date(2026, 4, 30), date(2026, 5, 31)]
+    assert due_dates(np.datetime64('2026-01-31'), 'quarterly', 30, 2)[0].tolist() == [date(2026, 4, 30), date(2026, 7, 30)]
@@ -0,0 +1,126 @@
+"""
+Concurrency stress test for transaction posting.
+
+Several threads, each with its own app context and database connection, post
+to the same account at once. Without the account row lock two postings read
+the same balance and one update is lost; with it every posting is applied and
+each transaction's balance_before equals the previous one's balance_after.
+
+Needs TEST_DATABASE_URL (see conftest.py):
+    TEST_DATABASE_URL=postgresql://... python -m pytest app/tests/test_concurrent_posting.py
+"""
+import os
+import random
+import threading
+from datetime import date
+
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get('TEST_DATABASE_URL'),
+    reason='TEST_DATABASE_URL (empty scratch PostgreSQL database) not set'
+)
+
+WORKERS = 8
+POSTINGS_PER_WORKER = 40
+
+
+@pytest.fixture(scope='module')
+def ledger(scratch_db):
+    from app.models import User, AccountType, Customer
+    app, db = scratch_db
+
+    admin = User(name='Stress Admin', email='stress-admin@example.com', password_hash='x', role='admin')
+    db.session.add(admin)
+    db.session.flush()
+    savings = AccountType(name='Savings', display_name='Stress Savings', interest_rate=4.0, created_by=admin.id)
+    customer = Customer(name='Stress Customer', phone='stress-1', password_hash='x', created_by=admin.id)
+    db.session.add_all([savings, customer])
+    db.session.commit()
+    return app, db, admin.id, customer.id, savings.id
+
+
+def _new_account(db, customer_id, account_type_id, created_by):
+    from app.models import Account
+    account = Account(
+        customer_id=customer_id,
+        account_type_id=account_type_id,
+        start_date=date.today(),
+        created_by=created_by,
+        snapshot_minimum_balance=0.0
+    )
+    db.session.add(account)
+    db.session.commit()
+    return account.id
+
+
+def _post_concurrently(app, account_id, created_by, postings):
+    """Split postings across WORKERS threads that all start together; return failure messages"""
+    from app.services.transaction_service import TransactionService
+    barrier = threading.Barrier(WORKERS)
+    failures = []
+
+    def worker(items):
+        with app.app_context():
+            barrier.wait()
+            for transaction_type, amount in items:
+                result = TransactionService.create_transaction(
+                    account_id, transaction_type, amount, 'stress test', created_by
+                )
+                if not result['success']:
+                    failures.append(result['message'])
+
+    threads = [
+        threading.Thread(target=worker, args=(postings[i::WORKERS],))
+        for i in range(WORKERS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return failures
+
+
+def _assert_consistent_chain(db, account_id):
+    """Balances chain in id order and the account balance matches the last one"""
+    from app.models import Account, Transaction
+    db.session.expire_all()
+    transactions = Transaction.query.filter_by(account_id=account_id).order_by(Transaction.id).all()
+    running = 0.0
+    for transaction in transactions:
+        assert transaction.balance_before == pytest.approx(running), f'broken chain at transaction {transaction.id}'
+        running += transaction.amount if transaction.transaction_type == 'deposit' else -transaction.amount
+        assert transaction.balance_after == pytest.approx(running), f'broken chain at transaction {transaction.id}'
+        assert transaction.balance_after >= 0, f'overdraft at transaction {transaction.id}'
+    assert db.session.get(Account, account_id).balance == pytest.approx(running)
+    return transactions
+
+
+def test_concurrent_deposits_are_not_lost(ledger):
+    app, db, admin_id, customer_id, savings_id = ledger
+    account_id = _new_account(db, customer_id, savings_id, admin_id)
+    postings = [('deposit', 10.0)] * (WORKERS * POSTINGS_PER_WORKER)
+
+    failures = _post_concurrently(app, account_id, admin_id, postings)
+
+    assert failures == []
+    transactions = _assert_consistent_chain(db, account_id)
+    assert len(transactions) == len(postings)
+    assert transactions[-1].balance_after == pytest.approx(10.0 * len(postings))
+
+
+def test_concurrent_mixed_postings_never_overdraw(ledger):
+    app, db, admin_id, customer_id, savings_id = ledger
+    account_id = _new_account(db, customer_id, savings_id, admin_id)
+    rng = random.Random(15)
+    postings = [
+        (rng.choice(['deposit', 'withdrawal']), float(rng.randint(1, 50)))
+        for _ in range(WORKERS * POSTINGS_PER_WORKER)
+    ]
+
+    failures = _post_concurrently(app, account_id, admin_id, postings)
+
+    # Withdrawals may be refused for lack of funds, but only ever for that reason
+    assert all('minimum' in message for message in failures), failures
+    transactions = _assert_consistent_chain(db, account_id)
+    assert len(transactions) + len(failures) == len(postings)
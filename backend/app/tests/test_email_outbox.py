@@ -0,0 +1,87 @@
+"""
+Outbox delivery against a local SMTP server (aiosmtpd, no AUTH).
+
+Checks that the worker pool sends every message, reuses its connections
+instead of opening one per message, and reports refused recipients as
+permanent failures. No database is needed.
+"""
+import pytest
+
+aiosmtpd_controller = pytest.importorskip('aiosmtpd.controller')
+
+from app.services.email_outbox import SMTPConnectionPool, deliver
+
+WORKERS = 3
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.messages = []
+        self.connections = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.connections += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith('refused@'):
+            return '550 No such user'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return '250 Message accepted'
+
+
+@pytest.fixture
+def smtp_server():
+    handler = RecordingHandler()
+    controller = aiosmtpd_controller.Controller(handler, hostname='127.0.0.1', port=0)
+    controller.start()
+    config = {
+        'smtp_server': '127.0.0.1',
+        'smtp_port': controller.server.sockets[0].getsockname()[1],
+        'smtp_username': 'outbox',
+        'smtp_password': 'outbox',
+        'from_email': 'noreply@minibank.com',
+        'from_name': 'Mahadev Welfare Society',
+        'use_tls': False,
+        'use_ssl': False
+    }
+    yield handler, config
+    controller.stop()
+
+
+def _messages(count, to_email='customer@example.com'):
+    return [
+        {'id': i, 'to_email': to_email, 'subject': f'Test {i}', 'html_body': f'<p>{i}</p>', 'text_body': str(i)}
+        for i in range(count)
+    ]
+
+
+def test_deliver_reuses_pooled_connections(smtp_server):
+    handler, config = smtp_server
+    pool = SMTPConnectionPool(config, WORKERS)
+    try:
+        outcomes = deliver(_messages(30), pool, config, WORKERS)
+        outcomes.update({k + 30: v for k, v in deliver(_messages(30), pool, config, WORKERS).items()})
+    finally:
+        pool.close()
+
+    assert all(error is None for error, _ in outcomes.values())
+    assert len(handler.messages) == 60
+    assert handler.connections <= WORKERS
+
+
+def test_refused_recipient_is_permanent(smtp_server):
+    _, config = smtp_server
+    pool = SMTPConnectionPool(config, 1)
+    try:
+        outcomes = deliver(_messages(1, to_email='refused@example.com'), pool, config, 1)
+    finally:
+        pool.close()
+
+    error, permanent = outcomes[0]
+    assert error and permanent
@@ -0,0 +1,65 @@
+"""
+Email templates compile and render from the EmailService send_* helpers.
+No database or SMTP server is needed.
+"""
+import pytest
+
+from app.services import email_templates
+from app.services.email_service import EmailService
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Capture what the send_* helpers would deliver"""
+    messages = []
+    monkeypatch.setattr(
+        EmailService, '_deliver',
+        staticmethod(lambda to_email, subject, html_body, text_body, queue: messages.append(
+            {'to_email': to_email, 'subject': subject, 'html': html_body, 'text': text_body}
+        ) or True)
+    )
+    return messages
+
+
+def test_all_templates_compile():
+    compiled = email_templates.load_templates()
+    assert set(compiled) == set(email_templates.EMAIL_TEMPLATES)
+
+
+def test_transaction_email(sent):
+    EmailService.send_transaction_notification_email(
+        customer_email='asha@example.com',
+        customer_name='Asha <Patil>',
+        transaction_type='withdrawal',
+        amount=1234.5,
+        account_type='Savings',
+        account_number='ACC000042',
+        balance_before=5000.0,
+        balance_after=3765.5,
+        reference_number='TXN42',
+        description='Balance transfer to Savings'
+    )
+    message = sent[0]
+    assert message['subject'] == 'Transaction Alert: Withdrawal - Mahadev Welfare Society'
+    # HTML is escaped, the text variant is not
+    assert 'Asha &lt;Patil&gt;' in message['html']
+    assert 'Dear Asha <Patil>,' in message['text']
+    assert '-₹1,234.50' in message['text']
+    assert 'Account Balance: ₹3,765.50' in message['html']
+    assert 'Note: Balance transfer to Savings' in message['text']
+
+
+def test_account_creation_email_without_details(sent):
+    EmailService.send_account_creation_email('asha@example.com', 'Asha', 'FD', 42)
+    message = sent[0]
+    assert message['subject'] == 'New Fixed Deposit (FD) Account Created - Mahadev Welfare Society'
+    assert 'Account details will be available after activation.' in message['text']
+
+
+def test_manager_welcome_email_has_credentials(sent):
+    EmailService.send_customer_welcome_email(
+        'manager@example.com', 'Manager', 7, 's3cret', role='manager', login_url='https://bank.test/login'
+    )
+    message = sent[0]
+    assert 'Password: s3cret' in message['text']
+    assert 'href="https://bank.test/login?email=manager%40example.com"' in message['html']
@@ -0,0 +1,45 @@
+"""
+IdentityCache behaviour (TTL expiry, LRU eviction, invalidation). No database needed.
+"""
+from app.utils import identity
+from app.utils.identity import IdentityCache, Principal
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(identity.time, 'monotonic', lambda: now[0])
+    cache = IdentityCache(ttl=60, maxsize=10)
+    cache.put(('customer', 1), Principal(1, 'customer', 'manager'))
+
+    now[0] += 59
+    assert cache.get(('customer', 1)).role == 'manager'
+    now[0] += 2
+    assert cache.get(('customer', 1)) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = IdentityCache(ttl=60, maxsize=2)
+    cache.put(('user', 1), Principal(1, 'user', 'admin'))
+    cache.put(('customer', 1), Principal(1, 'customer', 'manager'))
+    cache.get(('user', 1))
+    cache.put(('customer', 2), Principal(2, 'customer', 'manager'))
+
+    assert cache.get(('customer', 1)) is None
+    assert cache.get(('user', 1)) is not None
+    assert cache.get(('customer', 2)) is not None
+
+
+def test_invalidate_and_disabled_cache():
+    cache = IdentityCache(ttl=60, maxsize=10)
+    cache.put(('customer', 3), Principal(3, 'customer', 'manager'))
+    cache.invalidate(('customer', 3))
+    assert cache.get(('customer', 3)) is None
+
+    disabled = IdentityCache(ttl=0, maxsize=10)
+    disabled.put(('customer', 3), Principal(3, 'customer', 'manager'))
+    assert disabled.get(('customer', 3)) is None
+
+
+def test_inactive_principal_has_no_role():
+    assert Principal(4, 'customer', 'manager').has_role(['manager'])
+    assert not Principal(4, 'customer', 'manager', is_active=False).has_role(['manager'])
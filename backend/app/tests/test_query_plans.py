@@ -0,0 +1,230 @@
+"""
+Query-plan regression suite.
+
+Runs the hot service paths against a seeded PostgreSQL database, captures
+every statement they issue and EXPLAINs it with sequential scans disabled.
+With enable_seqscan off the planner only falls back to a Seq Scan when no
+index can serve the query at all, so a Seq Scan on one of the large tables
+means a missing (or unusable) index - whatever the seed size or statistics.
+
+Needs TEST_DATABASE_URL (see conftest.py):
+    TEST_DATABASE_URL=postgresql://... python -m pytest app/tests/test_query_plans.py
+"""
+import os
+from contextlib import contextmanager
+from datetime import date
+
+import pytest
+from sqlalchemy import event, text
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get('TEST_DATABASE_URL'),
+    reason='TEST_DATABASE_URL (empty scratch PostgreSQL database) not set'
+)
+
+# Tables that grow with the book; a full scan of any of them is a regression
+LARGE_TABLES = {
+    'transactions', 'accounts', 'customers', 'emi_installments',
+    'rd_installments', 'account_interest_logs'
+}
+
+EXPLAINED_STATEMENTS = ('SELECT', 'WITH', 'UPDATE', 'DELETE', 'INSERT')
+
+MANAGERS = 20
+STAFF = 4000
+
+
+def _seed(db):
+    from app.models import User, AccountType, Customer, UserPermission
+
+    admin = User(name='Plan Admin', email='plan-admin@example.com', password_hash='x', role='admin')
+    db.session.add(admin)
+    db.session.flush()
+
+    for name in ('Savings', 'RD', 'FD', 'DDS', 'Loan'):
+        db.session.add(AccountType(
+            name=name, display_name=f'Plan {name}', interest_rate=6.0, created_by=admin.id
+        ))
+    db.session.flush()
+
+    params = {'admin_id': admin.id, 'managers': MANAGERS, 'staff': STAFF}
+    db.session.execute(text("""
+        INSERT INTO customers (name, phone, role, password_hash, is_active, created_by, created_at, updated_at)
+        SELECT 'Plan Manager ' || g, 'plan-mgr-' || g, 'manager', 'x', true, :admin_id, now(), now()
+        FROM generate_series(1, :managers) g
+    """), params)
+    db.session.execute(text("""
+        INSERT INTO customers
+            (name, phone, role, password_hash, is_active, created_by, assigned_manager_id, created_at, updated_at)
+        SELECT 'Plan Customer ' || g, 'plan-' || g, 'staff', 'x', true, :admin_id, m.id,
+               TIMESTAMP '2024-01-01' + g * interval '1 hour', now()
+        FROM generate_series(1, :staff) g
+        JOIN (SELECT id, row_number() OVER (ORDER BY id) - 1 AS k
+              FROM customers WHERE role = 'manager') m ON m.k = g % :managers
+    """), params)
+    db.session.execute(text("""
+        INSERT INTO accounts
+            (customer_id, account_type_id, balance, start_date, maturity_date, status, created_by,
+             use_custom_parameters, snapshot_interest_rate, snapshot_repayment_frequency,
+             created_at, updated_at)
+        SELECT c.id, t.id, 10000, DATE '2024-01-01',
+               CASE WHEN t.name IN ('FD', 'RD', 'DDS') THEN DATE '2026-01-01' + (c.id % 1000) END,
+               CASE WHEN c.id % 10 = 0 THEN 'closed' ELSE 'active' END,
+               :admin_id, false, 6.0, CASE WHEN t.name = 'Loan' THEN 'monthly' END,
+               c.created_at + t.id * interval '1 minute', now()
+        FROM customers c
+        CROSS JOIN account_types t
+        WHERE c.role = 'staff'
+    """), params)
+    db.session.execute(text("""
+        INSERT INTO transactions
+            (account_id, transaction_type, amount, balance_before, balance_after, status,
+             created_by, creator_type, created_at, updated_at)
+        SELECT a.id,
+               CASE WHEN g % 3 = 0 THEN 'withdrawal' ELSE 'deposit' END,
+               100, 10000, 10100,
+               CASE WHEN g % 25 = 0 THEN 'pending' ELSE 'completed' END,
+               :admin_id, 'user',
+               a.created_at + g * interval '1 day', now()
+        FROM accounts a
+        CROSS JOIN generate_series(1, 10) g
+    """), params)
+    db.session.execute(text("""
+        INSERT INTO emi_installments
+            (account_id, emi_number, due_date, emi_amount, principal_component, interest_component,
+             remaining_principal_before, remaining_principal_after, is_paid, is_overdue,
+             created_at, updated_at)
+        SELECT a.id, g, DATE '2025-01-05' + g * 30, 500, 450, 50, 6000, 5500, g <= 6, false, now(), now()
+        FROM accounts a
+        JOIN account_types t ON t.id = a.account_type_id
+        CROSS JOIN generate_series(1, 12) g
+        WHERE t.name = 'Loan'
+    """))
+    db.session.execute(text("""
+        INSERT INTO rd_installments (account_id, amount, deposit_date)
+        SELECT a.id, 1000, DATE '2024-01-10' + g * 30
+        FROM accounts a
+        JOIN account_types t ON t.id = a.account_type_id
+        CROSS JOIN generate_series(0, 11) g
+        WHERE t.name = 'RD'
+    """))
+    db.session.execute(text("""
+        INSERT INTO account_interest_logs
+            (account_id, interest_amount, balance_before, balance_after, calculated_date, kind)
+        SELECT a.id, 1.5, 10000, 10001.5, DATE '2025-01-01' + g, 'dds_daily'
+        FROM accounts a
+        JOIN account_types t ON t.id = a.account_type_id
+        CROSS JOIN generate_series(1, 10) g
+        WHERE t.name = 'DDS'
+    """))
+
+    manager = Customer.query.filter_by(role='manager').order_by(Customer.id).first()
+    db.session.add(UserPermission(
+        user_id=manager.id, user_type='customer', module='customers_management',
+        can_view=True, created_by=admin.id
+    ))
+    db.session.commit()
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
+
+    staff = Customer.query.filter_by(role='staff', assigned_manager_id=manager.id).order_by(Customer.id).first()
+    account_id = db.session.execute(
+        text("SELECT id FROM accounts WHERE customer_id = :customer_id ORDER BY id LIMIT 1"),
+        {'customer_id': staff.id}
+    ).scalar()
+    return {'admin_id': admin.id, 'manager_id': manager.id, 'staff_id': staff.id, 'account_id': account_id}
+
+
+@pytest.fixture(scope='module')
+def seeded(scratch_db):
+    _, db = scratch_db
+    return db, _seed(db)
+
+
+@contextmanager
+def captured_statements(db):
+    """Collect (statement, parameters) for everything executed inside the block"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().split(None, 1)[0].upper() in EXPLAINED_STATEMENTS:
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+
+
+def _seq_scans(node):
+    found = []
+    if node.get('Node Type') == 'Seq Scan' and node.get('Relation Name') in LARGE_TABLES:
+        found.append(node['Relation Name'])
+    for child in node.get('Plans', []):
+        found.extend(_seq_scans(child))
+    return found
+
+
+def assert_no_seq_scans(db, statements):
+    assert statements, 'no statements were captured'
+    problems = []
+    with db.engine.connect() as conn:
+        conn.exec_driver_sql('SET enable_seqscan = off')
+        for statement, parameters in statements:
+            plan = conn.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {statement}', parameters).scalar()
+            scans = _seq_scans(plan[0]['Plan'])
+            if scans:
+                problems.append(f"Seq Scan on {', '.join(sorted(set(scans)))}:\n{statement}")
+        conn.rollback()
+    assert not problems, '\n\n'.join(problems)
+
+
+def test_transaction_service_plans(seeded):
+    from app.services.transaction_service import TransactionService
+    db, ids = seeded
+
+    with captured_statements(db) as statements:
+        assert TransactionService.get_account_transactions(ids['account_id'], page=2, limit=5)['success']
+        assert TransactionService.get_account_transactions(ids['account_id'], limit=5, cursor='')['success']
+        assert TransactionService.get_all_transactions(limit=20, cursor='')['success']
+        assert TransactionService.get_all_transactions(
+            limit=20, user_role='manager', user_id=ids['manager_id'], cursor=''
+        )['success']
+        assert TransactionService.get_all_transactions(page=1, limit=20, account_id=ids['account_id'])['success']
+        assert TransactionService.get_transaction_summary(account_id=ids['account_id'])['success']
+    assert_no_seq_scans(db, statements)
+
+
+def test_dashboard_service_plans(seeded):
+    from app.services.dashboard_service import DashboardService
+    db, ids = seeded
+
+    with captured_statements(db) as statements:
+        assert DashboardService.get_admin_dashboard_data()['success']
+        assert DashboardService.get_manager_dashboard_data(ids['manager_id'])['success']
+        assert DashboardService.get_staff_dashboard_data(ids['staff_id'])['success']
+    assert_no_seq_scans(db, statements)
+
+
+def test_customer_listing_plans(seeded):
+    from app.services.customer_service import CustomerService
+    db, ids = seeded
+
+    with captured_statements(db) as statements:
+        assert CustomerService.get_customers('admin', ids['admin_id'], limit=20, sort_order='desc', cursor='')['success']
+        assert CustomerService.get_customers('manager', ids['manager_id'], page=2, limit=20)['success']
+    assert_no_seq_scans(db, statements)
+
+
+def test_interest_job_plans(seeded):
+    from app.services.daily_interest import calculate_dds_daily_interest
+    from app.services.fd_interest import calculate_fd_interest
+    from app.services.rd_interest import calculate_rd_monthly_interest
+    db, _ = seeded
+
+    with captured_statements(db) as statements:
+        calculate_dds_daily_interest(today=date(2025, 10, 30), chunk_size=1000)
+        calculate_fd_interest(target_date=date(2025, 10, 30), chunk_size=1000)
+        calculate_rd_monthly_interest(today=date(2025, 10, 30), chunk_size=1000)
+    assert_no_seq_scans(db, statements)
@@ -0,0 +1,39 @@
+"""
+The vectorized Savings interest formula matches the per-account arithmetic
+of TransactionService.calculate_interest. No database is needed.
+"""
+import pytest
+
+from app.services.savings_interest import savings_interest
+
+
+def _per_account(balance, interest_rate, method, frequency, days):
+    """TransactionService.calculate_interest for a due Savings account"""
+    years = days / 365.25
+    if method == 'simple':
+        return balance * (interest_rate / 100) * years
+    if frequency == 'monthly':
+        return balance * ((1 + interest_rate / 100 / 12) ** (days / 30.0) - 1)
+    if frequency == 'quarterly':
+        return balance * ((1 + interest_rate / 100 / 4) ** (days / 90.0) - 1)
+    if frequency == 'yearly':
+        return balance * ((1 + interest_rate / 100) ** years - 1)
+    return balance * ((1 + interest_rate / 100 / 365.25) ** days - 1)
+
+
+ACCOUNTS = [
+    (1000.0, 4.0, 'simple', 'monthly', 100),
+    (25000.0, 3.5, 'compound', 'monthly', 31),
+    (25000.0, 3.5, 'compound', 'quarterly', 92),
+    (100000.0, 6.0, 'compound', 'yearly', 400),
+    (5000.0, 5.0, 'compound', 'daily', 1),
+    (5000.0, 5.0, 'compound', None, 45),
+    (0.0, 4.0, 'simple', 'yearly', 365),
+    (-250.0, 4.0, 'simple', 'monthly', 30),
+]
+
+
+def test_matches_per_account_formula():
+    balance, rate, method, frequency, days = zip(*ACCOUNTS)
+    interest = savings_interest(balance, rate, method, frequency, days).tolist()
+    assert interest == pytest.approx([_per_account(*account) for account in ACCOUNTS], rel=1e-12, abs=1e-9)
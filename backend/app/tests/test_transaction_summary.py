@@ -0,0 +1,71 @@
+"""
+Transaction summary period breakdown with legacy rows that have no created_at.
+
+Needs TEST_DATABASE_URL (see conftest.py), since the breakdown buckets with
+PostgreSQL's date_trunc:
+    TEST_DATABASE_URL=postgresql://... python -m pytest app/tests/test_transaction_summary.py
+"""
+import os
+from datetime import date, datetime
+
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get('TEST_DATABASE_URL'),
+    reason='TEST_DATABASE_URL (empty scratch PostgreSQL database) not set'
+)
+
+
+@pytest.fixture(scope='module')
+def account_id(scratch_db):
+    from sqlalchemy import update
+    from app.models import User, AccountType, Customer, Account, Transaction
+    _, db = scratch_db
+
+    admin = User(name='Summary Admin', email='summary-admin@example.com', password_hash='x', role='admin')
+    db.session.add(admin)
+    db.session.flush()
+    savings = AccountType(name='Savings', display_name='Summary Savings', interest_rate=4.0, created_by=admin.id)
+    customer = Customer(name='Summary Customer', phone='summary-1', password_hash='x', created_by=admin.id)
+    db.session.add_all([savings, customer])
+    db.session.flush()
+    account = Account(
+        customer_id=customer.id, account_type_id=savings.id, start_date=date(2025, 1, 1),
+        created_by=admin.id, balance=0
+    )
+    db.session.add(account)
+    db.session.flush()
+
+    postings = [
+        ('deposit', 100, datetime(2025, 1, 5, 10, 0)),
+        ('withdrawal', 30, datetime(2025, 1, 20, 10, 0)),
+        ('deposit', 50, datetime(2025, 2, 3, 10, 0)),
+        ('deposit', 20, None),
+    ]
+    for transaction_type, amount, created_at in postings:
+        transaction = Transaction(
+            account_id=account.id, transaction_type=transaction_type, amount=amount,
+            balance_before=0, balance_after=0, description='summary test',
+            reference_number=Transaction.generate_reference_number(),
+            status='completed', created_by=admin.id, created_at=created_at
+        )
+        db.session.add(transaction)
+        db.session.flush()
+        if created_at is None:
+            # The column default would fill it in; legacy rows have none
+            db.session.execute(update(Transaction).where(Transaction.id == transaction.id).values(created_at=None))
+    db.session.commit()
+    return account.id
+
+
+def test_monthly_breakdown_keeps_rows_without_created_at(account_id):
+    from app.services.transaction_service import TransactionService
+
+    result = TransactionService.get_transaction_summary(account_id=account_id, period='month')
+
+    assert result['success'], result['message']
+    breakdown = result['data']['breakdown']
+    assert [row['period_start'] for row in breakdown] == ['2025-01-01', '2025-02-01', None]
+    assert [row['total_transactions'] for row in breakdown] == [2, 1, 1]
+    assert breakdown[-1]['total_deposits'] == 20.0
+    assert sum(row['total_transactions'] for row in breakdown) == result['data']['total_transactions']
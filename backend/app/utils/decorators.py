@@ -1,27 +1,23 @@
 from functools import wraps
 from flask import jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import User, Customer
+from flask_jwt_extended import jwt_required
+from app.utils.identity import current_principal
 
 def role_required(required_roles):
-    """Decorator to check if user has required role - checks both users and customers tables"""
+    """
+    Decorator to check if user has required role. The principal is resolved
+    from the token claims through the identity cache (see app.utils.identity)
+    and left on g.principal for the view and services.
+    """
     def decorator(f):
         @wraps(f)
         @jwt_required()
         def decorated_function(*args, **kwargs):
-            current_user_id = get_jwt_identity()
-            
-            # First check users table (for admin)
-            user = User.query.get(current_user_id)
-            if user and user.role in required_roles:
-                return f(*args, **kwargs)
-            
-            # If not found in users table, check customers table (for staff/manager)
-            customer = Customer.query.get(current_user_id)
-            if customer and customer.role in required_roles:
+            principal = current_principal()
+            if principal and principal.has_role(required_roles):
                 return f(*args, **kwargs)
             
-            # If neither found or role doesn't match
+            # Unknown, deactivated, or role doesn't match
             return jsonify({
                 'success': False,
                 'message': 'Insufficient permissions',
@@ -0,0 +1,164 @@
+"""
+Request identity.
+
+Access tokens carry the principal type ('user' for the users table, admins;
+'customer' for the customers table, managers) and role as additional claims,
+so the right table is known without probing both. The role and active flag
+are still confirmed against the database, because tokens do not expire
+(JWT_ACCESS_TOKEN_EXPIRES is off) and a manager can be deactivated or
+deleted while holding one. That confirmation goes through a small per-process
+TTL/LRU cache, so the common path costs no queries; services that change a
+principal's role, active flag or permissions call invalidate_principal().
+
+The resolved principal is stored on g.principal for the rest of the request.
+"""
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, g, has_request_context
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from app.models import User, Customer
+
+PRINCIPAL_USER = 'user'
+PRINCIPAL_CUSTOMER = 'customer'
+
+
+class Principal:
+    """The authenticated user or customer behind the current request"""
+    __slots__ = ('id', 'type', 'role', 'is_active')
+
+    def __init__(self, id, type, role, is_active=True):
+        self.id = id
+        self.type = type
+        self.role = role
+        self.is_active = is_active
+
+    def has_role(self, roles):
+        return self.is_active and self.role in roles
+
+    def __repr__(self):
+        return f'<Principal {self.type}:{self.id} {self.role}>'
+
+
+def identity_claims(principal_type, record):
+    """Additional JWT claims for a user or customer at login"""
+    return {'ptype': principal_type, 'role': record.role}
+
+
+class IdentityCache:
+    """Thread-safe LRU cache whose entries expire after `ttl` seconds"""
+
+    def __init__(self, ttl, maxsize):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = IdentityCache(
+                    current_app.config['IDENTITY_CACHE_TTL_SECONDS'],
+                    current_app.config['IDENTITY_CACHE_SIZE']
+                )
+    return _cache
+
+
+def invalidate_principal(principal_type, principal_id):
+    """Drop a cached principal after its role or active flag changed"""
+    if _cache is not None:
+        _cache.invalidate((principal_type, int(principal_id)))
+        # Also the entry for pre-claims tokens with the same id
+        _cache.invalidate((None, int(principal_id)))
+
+
+def _load(principal_type, principal_id):
+    """Read a principal's current role and active flag from its table"""
+    if principal_type == PRINCIPAL_USER:
+        user = User.query.get(principal_id)
+        return Principal(user.id, PRINCIPAL_USER, user.role) if user else None
+    customer = Customer.query.get(principal_id)
+    if customer:
+        return Principal(customer.id, PRINCIPAL_CUSTOMER, customer.role, customer.is_active)
+    return None
+
+
+def _load_legacy(principal_id):
+    """Tokens issued before the claims existed: users table first, then customers"""
+    return _load(PRINCIPAL_USER, principal_id) or _load(PRINCIPAL_CUSTOMER, principal_id)
+
+
+def resolve_principal(principal_id, principal_type=None):
+    """Principal for an id (and type, if known), through the identity cache"""
+    cache = _get_cache()
+    key = (principal_type, principal_id)
+    principal = cache.get(key)
+    if principal is None:
+        if principal_type is None:
+            principal = _load_legacy(principal_id)
+        else:
+            principal = _load(principal_type, principal_id)
+        if principal is not None:
+            cache.put(key, principal)
+    return principal
+
+
+def current_principal():
+    """
+    Principal for the current request's access token, resolved once and kept
+    on g.principal. None outside a request, without a verified token, or if
+    the token's principal no longer exists.
+    """
+    if not has_request_context():
+        return None
+    if 'principal' in g:
+        return g.principal
+    try:
+        claims = get_jwt()
+    except RuntimeError:
+        # No token verified for this request
+        return None
+    try:
+        principal_id = int(get_jwt_identity())
+    except (TypeError, ValueError):
+        principal = None
+    else:
+        principal = resolve_principal(principal_id, claims.get('ptype'))
+    g.principal = principal
+    return principal
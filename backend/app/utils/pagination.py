@@ -0,0 +1,104 @@
+"""
+Keyset (cursor) pagination on (created_at, id).
+
+Page-number listings pay for an OFFSET scan plus a COUNT(*) on every request.
+In cursor mode a listing instead seeks straight past the last row the client
+saw and fetches one extra row to know whether there is a next page. The
+cursor is opaque to clients: they pass back the next_cursor of the previous
+response. Send an empty cursor to get the first page.
+
+created_at is nullable and some legacy rows have none, so the key is
+coalesce(created_at, CURSOR_EPOCH): those rows sort as the oldest instead of
+dropping out of the order. The idx_*_cursor indexes are on that same
+expression.
+"""
+import base64
+from datetime import datetime
+from flask import request
+from sqlalchemy import func, literal_column, tuple_
+from app import db
+
+TRUE_VALUES = ('1', 'true', 'yes')
+
+# Stands in for a NULL created_at; written as SQL text so that queries match
+# the expression indexes exactly
+CURSOR_EPOCH = datetime(1970, 1, 1)
+CURSOR_EPOCH_SQL = "'1970-01-01 00:00:00.000000'"
+
+
+def cursor_key(model):
+    """The created_at half of the cursor key, with NULLs as CURSOR_EPOCH"""
+    return func.coalesce(model.created_at, literal_column(CURSOR_EPOCH_SQL))
+
+
+def get_cursor_params(data):
+    """
+    Read (cursor, approximate_total) from a JSON body, falling back to the query
+    string. cursor is None when the client uses page numbers.
+    """
+    cursor = data.get('cursor', request.args.get('cursor'))
+    approximate_total = data.get('approximate_total', request.args.get('approximate_total', ''))
+    return cursor, str(approximate_total).lower() in TRUE_VALUES
+
+
+def encode_cursor(row):
+    created_at = row.created_at or CURSOR_EPOCH
+    raw = f'{created_at.isoformat()}|{row.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return (created_at, id) from a cursor; raises ValueError if it is malformed"""
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def keyset_page(query, model, cursor, limit, descending=True):
+    """
+    Fetch one page of `query` ordered by (created_at, id) after `cursor`.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    sort_key = cursor_key(model)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        key = tuple_(sort_key, model.id)
+        query = query.filter(key < tuple_(created_at, row_id) if descending else key > tuple_(created_at, row_id))
+
+    if descending:
+        order = (sort_key.desc(), model.id.desc())
+    else:
+        order = (sort_key.asc(), model.id.asc())
+    rows = query.order_by(None).order_by(*order).limit(limit + 1).all()
+
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def approximate_count(query):
+    """Planner row estimate for a query, without scanning it (exact count off PostgreSQL)"""
+    if db.engine.dialect.name != 'postgresql':
+        return query.order_by(None).count()
+    compiled = query.order_by(None).statement.compile(
+        dialect=db.engine.dialect,
+        compile_kwargs={'render_postcompile': True}
+    )
+    plan = db.session.connection().exec_driver_sql(
+        f'EXPLAIN (FORMAT JSON) {compiled}', compiled.params
+    ).scalar()
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def cursor_pagination(query, next_cursor, limit, approximate_total=False):
+    """The 'pagination' block of a cursor-mode response"""
+    pagination = {
+        'mode': 'cursor',
+        'limit': limit,
+        'next_cursor': next_cursor,
+        'has_next': next_cursor is not None
+    }
+    if approximate_total:
+        pagination['approximate_total'] = approximate_count(query)
+    return pagination
@@ -0,0 +1,106 @@
+"""
+Batch serializers for list endpoints.
+
+Model to_dict() methods follow relationships and run lookups row by row, so a
+page of N rows costs several queries per row. These helpers load everything a
+page refers to up front, with one IN query per related table, and then call
+the same to_dict() methods. The related rows are loaded into the session
+identity map, where many-to-one lazy loads and Query.get() find them without
+going back to the database.
+"""
+from sqlalchemy import case, func
+from app import db
+from app.models import Account, AccountType, Customer, EMIInstallment, Transaction, User
+
+
+def _load(model, ids):
+    """Load rows by primary key; the returned list keeps them alive in the identity map"""
+    ids = {i for i in ids if i is not None}
+    if not ids:
+        return []
+    return model.query.filter(model.id.in_(ids)).all()
+
+
+def _loan_stats(accounts):
+    """Paid EMI count and next unpaid due date per loan account, in two grouped queries"""
+    loan_ids = [
+        acc.id for acc in accounts
+        if acc.account_type and acc.account_type.name == 'Loan'
+    ]
+    if not loan_ids:
+        return {}
+
+    stats = {
+        account_id: {'paid_emis_count': 0, 'next_emi_due_date': None}
+        for account_id in loan_ids
+    }
+    emi_rows = db.session.query(
+        EMIInstallment.account_id,
+        func.count(case((EMIInstallment.is_paid.is_(True), 1))),
+        func.min(case((EMIInstallment.is_paid.is_(False), EMIInstallment.due_date)))
+    ).filter(
+        EMIInstallment.account_id.in_(loan_ids)
+    ).group_by(EMIInstallment.account_id)
+    for account_id, paid_count, next_due in emi_rows:
+        stats[account_id]['paid_emis_count'] = paid_count
+        stats[account_id]['next_emi_due_date'] = next_due
+
+    # Loans without paid installments fall back to counting repayments (see get_paid_emis_count)
+    unpaid_ids = [account_id for account_id, s in stats.items() if not s['paid_emis_count']]
+    if unpaid_ids:
+        repayment_rows = db.session.query(
+            Transaction.account_id,
+            func.count(Transaction.id)
+        ).filter(
+            Transaction.account_id.in_(unpaid_ids),
+            Transaction.transaction_type == 'loan_repayment'
+        ).group_by(Transaction.account_id)
+        for account_id, repayments in repayment_rows:
+            stats[account_id]['paid_emis_count'] = repayments
+
+    return stats
+
+
+def serialize_transactions(transactions):
+    """to_dict() for a page of transactions in a constant number of queries"""
+    accounts = _load(Account, (t.account_id for t in transactions))
+    customer_ids = {acc.customer_id for acc in accounts}
+    customer_ids.update(t.created_by for t in transactions if t.creator_type != 'user')
+    loaded = [
+        accounts,
+        _load(Customer, customer_ids),
+        _load(AccountType, (acc.account_type_id for acc in accounts)),
+        _load(User, (t.created_by for t in transactions if t.creator_type == 'user'))
+    ]
+    data = [transaction.to_dict() for transaction in transactions]
+    del loaded
+    return data
+
+
+def serialize_accounts(accounts):
+    """to_dict() for a list of accounts in a constant number of queries"""
+    loaded = [
+        _load(Customer, (acc.customer_id for acc in accounts)),
+        _load(AccountType, (acc.account_type_id for acc in accounts)),
+        _load(User, (acc.created_by for acc in accounts))
+    ]
+    loan_stats = _loan_stats(accounts)
+    data = [account.to_dict(loan_stats=loan_stats.get(account.id, {})) for account in accounts]
+    del loaded
+    return data
+
+
+def serialize_customers(customers):
+    """to_dict() for a list of customers in a constant number of queries"""
+    loaded = [
+        _load(User, (
+            user_id for c in customers for user_id in (c.created_by, c.last_update_by)
+        )),
+        _load(Customer, (
+            customer_id for c in customers
+            for customer_id in (c.assigned_manager_id, c.last_update_by_manager_id)
+        ))
+    ]
+    data = [customer.to_dict() for customer in customers]
+    del loaded
+    return data
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-message cost of building notification emails.
+
+Times the one-off template compile, then renders each email template N times
+from a typical context and reports the cost per message. Also compares the
+cached SMTP configuration with re-reading (and logging) it for every message,
+which is what each send used to do. No database or SMTP server is needed.
+
+Run from the backend directory:
+    python benchmark_email_render.py [messages]
+Default: 20,000 messages per template.
+"""
+
+import sys
+import os
+import time
+import logging
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+TRANSACTION_CONTEXT = {
+    'customer_name': 'Asha Patil',
+    'account_display_name': 'Savings Account',
+    'transaction_display_name': 'Deposit',
+    'is_credit': True,
+    'amount': 2500.0,
+    'account_number': 'ACC000042',
+    'reference_number': 'TXN20261017000042',
+    'transaction_date': 'October 17, 2026 at 10:30 AM',
+    'description': 'Monthly deposit',
+    'show_note': False,
+    'balance_before': 10250.0,
+    'balance_text': 'Account Balance: ₹12,750.00'
+}
+
+ACCOUNT_CONTEXT = {
+    'customer_name': 'Asha Patil',
+    'account_display_name': 'Recurring Deposit (RD) Account',
+    'account_id': 42,
+    'details': [
+        ('Balance: ₹1,000.00', True),
+        ('Interest Rate: 7.0% per annum', False),
+        ('Monthly Contribution: ₹1,000.00', False),
+        ('Contribution Day: 10 of each month', False)
+    ]
+}
+
+WELCOME_CONTEXT = {
+    'customer_name': 'Asha Patil',
+    'customer_email': 'asha@example.com',
+    'password': 'x7Kp2mQ9aZ4r',
+    'login_url': 'https://mini-bank-project.vercel.app/login?email=asha%40example.com'
+}
+
+
+def time_per_call(func, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return (time.perf_counter() - start) / count
+
+
+def run_benchmark(messages=20000):
+    from app.services import email_templates
+    from app.services.email_service import EmailService
+
+    start = time.perf_counter()
+    email_templates.load_templates()
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    cases = [
+        ('transaction', TRANSACTION_CONTEXT),
+        ('account_created', ACCOUNT_CONTEXT),
+        ('welcome_manager', WELCOME_CONTEXT),
+        ('welcome_staff', {'customer_name': 'Asha Patil'})
+    ]
+
+    print(f"Rendering {messages:,} messages per template...")
+    results = []
+    for name, context in cases:
+        per_message = time_per_call(lambda: email_templates.render(name, **context), messages)
+        results.append((name, per_message))
+
+    # The log handler is what made per-message config reads expensive in production
+    logging.basicConfig(level=logging.INFO, stream=open(os.devnull, 'w'))
+    config_count = max(messages // 10, 1)
+    uncached = time_per_call(lambda: EmailService.get_smtp_config(reload=True), config_count)
+    cached = time_per_call(EmailService.get_smtp_config, config_count)
+
+    print("=" * 50)
+    print(f"Template compile (once):  {compile_ms:8.2f}ms")
+    for name, per_message in results:
+        print(f"{name + ':':<25} {per_message * 1e6:8.1f}µs/message  ({1 / per_message:,.0f}/s)")
+    print(f"SMTP config, re-read:     {uncached * 1e6:8.1f}µs/message")
+    print(f"SMTP config, cached:      {cached * 1e6:8.3f}µs/message")
+    print("=" * 50)
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:2]]
+    run_benchmark(*args)
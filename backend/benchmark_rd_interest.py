@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Benchmark: monthly RD interest, per-account loop vs. aggregated chunk query.
+
+Seeds N RD accounts with M installments each, then times the old
+one-query-per-account loop against calculate_rd_monthly_interest().
+Both runs write interest logs; everything seeded is removed afterwards.
+
+Run this ONLY against a scratch database, from the backend directory:
+    BENCHMARK_DATABASE_URL=postgresql://... python benchmark_rd_interest.py [accounts] [installments]
+Defaults: 50,000 accounts x 24 installments.
+"""
+
+import sys
+import os
+import time
+from datetime import date
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+BENCH_TYPE_NAME = 'RD Benchmark'
+# calculate_rd_monthly_interest() only runs on the 30th and accrues the previous month
+RUN_DATE = date(2026, 10, 30)
+
+
+def legacy_rd_monthly_interest(today):
+    """The pre-aggregation implementation: one RDInstallment query per account"""
+    from calendar import monthrange
+    from app import db
+    from app.models import Account, AccountType, RDInstallment, AccountInterestLog
+    from app.services.rd_interest import days_in_year
+
+    year = today.year
+    month = today.month - 1 or 12
+    if month == 12:
+        year -= 1
+    month_start = date(year, month, 1)
+    month_end = date(year, month, monthrange(year, month)[1])
+
+    accounts = (
+        db.session.query(Account)
+        .join(AccountType, Account.account_type)
+        .filter(Account.status == 'active', AccountType.name.ilike('RD%'))
+        .all()
+    )
+    for account in accounts:
+        interest_rate = account.get_effective_interest_rate()
+        if not interest_rate or interest_rate <= 0:
+            continue
+        daily_rate = (interest_rate / 100) / days_in_year(year)
+
+        total_interest = 0
+        installments = db.session.query(RDInstallment).filter(RDInstallment.account_id == account.id).all()
+        for inst in installments:
+            days = (month_end - max(inst.deposit_date, month_start)).days + 1
+            if days <= 0:
+                continue
+            total_interest += inst.amount * daily_rate * days
+        if total_interest <= 0:
+            continue
+
+        account.last_interest_calculated_date = month_end
+        db.session.add(AccountInterestLog(
+            account_id=account.id,
+            interest_amount=round(total_interest, 2),
+            balance_before=account.balance,
+            balance_after=account.balance,
+            calculated_date=month_end,
+            kind=AccountInterestLog.KIND_RD_MONTHLY
+        ))
+    db.session.commit()
+
+
+def seed(db, accounts, installments):
+    """Create a benchmark account type with `accounts` RD accounts of `installments` deposits each"""
+    from sqlalchemy import text
+
+    admin_id = db.session.execute(text("SELECT id FROM users ORDER BY id LIMIT 1")).scalar()
+    if admin_id is None:
+        raise SystemExit("❌ Error: No user found. Please create an admin user first.")
+
+    type_id = db.session.execute(text("""
+        INSERT INTO account_types
+            (name, display_name, interest_rate, min_deposit, min_withdrawal, minimum_balance,
+             low_balance_penalty, interest_calculation_method, early_withdrawal_penalty_rate,
+             created_by, is_active, version)
+        VALUES ('RD', :display_name, 7.0, 0, 0, 0, 0, 'simple', 0, :admin_id, true, 1)
+        RETURNING id
+    """), {'display_name': BENCH_TYPE_NAME, 'admin_id': admin_id}).scalar()
+
+    db.session.execute(text("""
+        INSERT INTO customers (name, phone, role, password_hash, is_active, created_by)
+        SELECT 'RD Bench ' || g, 'rdbench-' || g, 'staff', 'x', true, :admin_id
+        FROM generate_series(1, :accounts) g
+    """), {'accounts': accounts, 'admin_id': admin_id})
+
+    db.session.execute(text("""
+        INSERT INTO accounts
+            (customer_id, account_type_id, balance, start_date, status, created_by,
+             snapshot_interest_rate, use_custom_parameters)
+        SELECT c.id, :type_id, 1000.0 * :installments, :start_date, 'active', :admin_id, 7.0, false
+        FROM customers c
+        WHERE c.phone LIKE 'rdbench-%'
+    """), {'type_id': type_id, 'installments': installments, 'admin_id': admin_id,
+           'start_date': date(RUN_DATE.year - 2, RUN_DATE.month, 1)})
+
+    # One deposit per month, the most recent one in the month being accrued
+    db.session.execute(text("""
+        INSERT INTO rd_installments (account_id, amount, deposit_date)
+        SELECT a.id, 1000.0, (:last_deposit - make_interval(months => m))::date
+        FROM accounts a
+        CROSS JOIN generate_series(0, :installments - 1) m
+        WHERE a.account_type_id = :type_id
+    """), {'type_id': type_id, 'installments': installments,
+           'last_deposit': date(RUN_DATE.year, RUN_DATE.month - 1, 10)})
+
+    db.session.commit()
+    return type_id
+
+
+def reset(db, type_id):
+    """Undo the effect of one accrual run on the benchmark accounts"""
+    from sqlalchemy import text
+    db.session.execute(text("""
+        DELETE FROM account_interest_logs
+        WHERE account_id IN (SELECT id FROM accounts WHERE account_type_id = :type_id)
+    """), {'type_id': type_id})
+    db.session.execute(text("""
+        UPDATE accounts SET last_interest_calculated_date = NULL WHERE account_type_id = :type_id
+    """), {'type_id': type_id})
+    db.session.commit()
+
+
+def cleanup(db, type_id):
+    from sqlalchemy import text
+    reset(db, type_id)
+    db.session.execute(text("""
+        DELETE FROM rd_installments
+        WHERE account_id IN (SELECT id FROM accounts WHERE account_type_id = :type_id)
+    """), {'type_id': type_id})
+    db.session.execute(text("DELETE FROM accounts WHERE account_type_id = :type_id"), {'type_id': type_id})
+    db.session.execute(text("DELETE FROM customers WHERE phone LIKE 'rdbench-%'"))
+    db.session.execute(text("DELETE FROM account_types WHERE id = :type_id"), {'type_id': type_id})
+    db.session.commit()
+
+
+def run_benchmark(accounts=50000, installments=24):
+    bench_url = os.environ.get('BENCHMARK_DATABASE_URL')
+    if not bench_url:
+        raise SystemExit("❌ Set BENCHMARK_DATABASE_URL to a scratch database (it must not hold real RD accounts).")
+    os.environ['DATABASE_URL'] = bench_url
+
+    from app import create_app, db
+    from app.services.rd_interest import calculate_rd_monthly_interest
+
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+    with app.app_context():
+        print(f"Seeding {accounts:,} RD accounts x {installments} installments...")
+        type_id = seed(db, accounts, installments)
+        try:
+            start = time.perf_counter()
+            legacy_rd_monthly_interest(RUN_DATE)
+            legacy_seconds = time.perf_counter() - start
+            reset(db, type_id)
+
+            start = time.perf_counter()
+            report = calculate_rd_monthly_interest(today=RUN_DATE)
+            aggregated_seconds = time.perf_counter() - start
+        finally:
+            cleanup(db, type_id)
+
+    print("=" * 50)
+    print(f"Per-account loop:      {legacy_seconds:8.2f}s")
+    print(f"Aggregated chunks:     {aggregated_seconds:8.2f}s  ({report['chunks']} chunks)")
+    print(f"Speed-up:              {legacy_seconds / aggregated_seconds:8.1f}x")
+    print(f"Accounts processed:    {report['accounts_processed']:,}")
+    print(f"Total interest:        ₹{report['total_interest']:,.2f}")
+    print("=" * 50)
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:3]]
+    run_benchmark(*args)
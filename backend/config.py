@@ -26,6 +26,25 @@ class Config:
     RAZORPAY_KEY_SECRET = os.environ.get('RAZORPAY_KEY_SECRET', '')
     RAZORPAY_TEST_MODE = os.environ.get('RAZORPAY_TEST_MODE', 'true').lower() == 'true'
     
+    # Interest accrual worker pool (1 = run in the scheduler thread, no pool)
+    INTEREST_ACCRUAL_WORKERS = int(os.environ.get('INTEREST_ACCRUAL_WORKERS', '1'))
+    # How often the job process picks up bulk interest runs requested through the API
+    INTEREST_RUN_POLL_SECONDS = int(os.environ.get('INTEREST_RUN_POLL_SECONDS', '15'))
+    # Run the job scheduler inside the web process too (single-process deployments only;
+    # otherwise run `flask run-jobs` as its own process)
+    SCHEDULER_IN_WEB = os.environ.get('SCHEDULER_IN_WEB', 'false').lower() == 'true'
+    # Email outbox delivery (runs with the scheduled jobs)
+    EMAIL_OUTBOX_WORKERS = int(os.environ.get('EMAIL_OUTBOX_WORKERS', '2'))
+    EMAIL_OUTBOX_POLL_SECONDS = int(os.environ.get('EMAIL_OUTBOX_POLL_SECONDS', '10'))
+    # Per-process cache of token principals (role, active flag); 0 checks the database on every request.
+    # Manager permissions are not covered by it: their version is read on each request.
+    IDENTITY_CACHE_TTL_SECONDS = int(os.environ.get('IDENTITY_CACHE_TTL_SECONDS', '60'))
+    IDENTITY_CACHE_SIZE = int(os.environ.get('IDENTITY_CACHE_SIZE', '1024'))
+    # How often the job process folds the dashboard summary deltas written by postings
+    DASHBOARD_FOLD_SECONDS = int(os.environ.get('DASHBOARD_FOLD_SECONDS', '30'))
+    # How often each process checks account_types for changes made by other processes
+    ACCOUNT_TYPE_CATALOG_POLL_SECONDS = int(os.environ.get('ACCOUNT_TYPE_CATALOG_POLL_SECONDS', '30'))
+    
     @staticmethod
     def init_app(app):
         # Debug database connection in production
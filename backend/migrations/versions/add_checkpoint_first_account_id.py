@@ -0,0 +1,73 @@
+"""Key interest accrual checkpoints on (job, date, range start) instead of per-shard job names
+
+Revision ID: add_checkpoint_first_account_id
+Revises: add_dashboard_summary_deltas
+Create Date: 2026-10-18 02:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_checkpoint_first_account_id'
+down_revision = 'add_dashboard_summary_deltas'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('interest_accrual_checkpoints',
+                  sa.Column('first_account_id', sa.Integer(), nullable=False, server_default='1'))
+
+    # A completed unsharded run covered every account id
+    op.execute("""
+        UPDATE interest_accrual_checkpoints
+        SET last_account_id = 2147483647
+        WHERE job_name NOT LIKE '%:%' AND status = 'completed'
+    """)
+    # Shard checkpoints were named '<job>:<first>-<last>'; completed ones covered their whole range
+    op.execute("""
+        UPDATE interest_accrual_checkpoints
+        SET first_account_id = split_part(split_part(job_name, ':', 2), '-', 1)::integer,
+            last_account_id = CASE WHEN status = 'completed'
+                                   THEN split_part(split_part(job_name, ':', 2), '-', 2)::integer
+                                   ELSE last_account_id END,
+            job_name = split_part(job_name, ':', 1)
+        WHERE job_name LIKE '%:%-%'
+    """)
+
+    # An unsharded run and a shard starting at account 1 can now share a key;
+    # keep the one that got further
+    op.execute("""
+        DELETE FROM interest_accrual_checkpoints c
+        USING interest_accrual_checkpoints other
+        WHERE other.job_name = c.job_name
+          AND other.run_date = c.run_date
+          AND other.first_account_id = c.first_account_id
+          AND (other.last_account_id, other.id) > (c.last_account_id, c.id)
+    """)
+
+    op.drop_constraint('uq_accrual_checkpoint_job_date', 'interest_accrual_checkpoints', type_='unique')
+    op.create_unique_constraint(
+        'uq_accrual_checkpoint_job_date_first',
+        'interest_accrual_checkpoints',
+        ['job_name', 'run_date', 'first_account_id']
+    )
+
+
+def downgrade():
+    op.drop_constraint('uq_accrual_checkpoint_job_date_first', 'interest_accrual_checkpoints', type_='unique')
+    # Checkpoints other than completed whole-book runs get per-range job names
+    # again (the range end of an unfinished one is only known as far as it got)
+    op.execute("""
+        UPDATE interest_accrual_checkpoints
+        SET job_name = job_name || ':' || first_account_id || '-' || last_account_id
+        WHERE NOT (first_account_id = 1 AND last_account_id = 2147483647)
+    """)
+    op.create_unique_constraint(
+        'uq_accrual_checkpoint_job_date',
+        'interest_accrual_checkpoints',
+        ['job_name', 'run_date']
+    )
+    op.drop_column('interest_accrual_checkpoints', 'first_account_id')
@@ -0,0 +1,24 @@
+"""Add permissions_version to customers for the manager permission cache
+
+Revision ID: add_customer_permissions_version
+Revises: add_email_outbox
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_customer_permissions_version'
+down_revision = 'add_email_outbox'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('customers', sa.Column('permissions_version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    op.drop_column('customers', 'permissions_version')
@@ -0,0 +1,31 @@
+"""Add indexes for the upcoming-maturity and overdue-EMI dashboard feeds
+
+Revision ID: add_dashboard_feed_indexes
+Revises: add_dashboard_summaries
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_dashboard_feed_indexes'
+down_revision = 'add_dashboard_summaries'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'idx_accounts_active_maturity',
+        'accounts',
+        ['maturity_date'],
+        postgresql_where=sa.text("status = 'active' AND maturity_date IS NOT NULL")
+    )
+    op.create_index('idx_emi_paid_due_date', 'emi_installments', ['is_paid', 'due_date'])
+
+
+def downgrade():
+    op.drop_index('idx_emi_paid_due_date', table_name='emi_installments')
+    op.drop_index('idx_accounts_active_maturity', table_name='accounts')
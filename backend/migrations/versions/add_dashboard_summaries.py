@@ -0,0 +1,251 @@
+"""Add dashboard_summaries, maintained incrementally by triggers
+
+Revision ID: add_dashboard_summaries
+Revises: add_interest_log_kind
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_dashboard_summaries'
+down_revision = 'add_interest_log_kind'
+branch_labels = None
+depends_on = None
+
+
+# A row's contribution to its (account type, manager) summary, scaled by sign.
+# Inner joins drop rows whose parent is already gone: deleting a parent
+# subtracts its whole subtree first, so cascaded child deletes must not
+# subtract again.
+
+def _account_rows(accounts, customers, sign, where='TRUE'):
+    return f"""
+        SELECT a.account_type_id,
+               COALESCE(c.assigned_manager_id, 0) AS manager_id,
+               {sign} * CASE WHEN a.status = 'active' THEN 1 ELSE 0 END AS active,
+               {sign} * CASE WHEN a.status = 'active' THEN a.balance::numeric ELSE 0 END AS balance,
+               0::numeric AS deposits,
+               0::numeric AS withdrawals,
+               0 AS pending
+        FROM {accounts} a
+        JOIN {customers} c ON c.id = a.customer_id
+        WHERE {where}
+    """
+
+
+def _transaction_rows(transactions, accounts, customers, sign, where='TRUE'):
+    return f"""
+        SELECT a.account_type_id,
+               COALESCE(c.assigned_manager_id, 0) AS manager_id,
+               0 AS active,
+               0::numeric AS balance,
+               {sign} * CASE WHEN t.status = 'completed'
+                              AND t.transaction_type IN ('deposit', 'interest', 'loan_disbursal')
+                             THEN t.amount::numeric ELSE 0 END AS deposits,
+               {sign} * CASE WHEN t.status = 'completed'
+                              AND t.transaction_type IN ('withdrawal', 'penalty', 'loan_repayment')
+                             THEN t.amount::numeric ELSE 0 END AS withdrawals,
+               {sign} * CASE WHEN t.status = 'pending' THEN 1 ELSE 0 END AS pending
+        FROM {transactions} t
+        JOIN {accounts} a ON a.id = t.account_id
+        JOIN {customers} c ON c.id = a.customer_id
+        WHERE {where}
+    """
+
+
+def _apply(*contributions):
+    """PL/pgSQL statement adding the grouped contributions to the summaries (in key order, to avoid deadlocks)"""
+    rows = ' UNION ALL '.join(contributions)
+    return f"""
+        PERFORM dashboard_summary_add(d.account_type_id, d.manager_id, d.active, d.balance,
+                                      d.deposits, d.withdrawals, d.pending)
+        FROM (
+            SELECT account_type_id, manager_id,
+                   SUM(active) AS active, SUM(balance) AS balance, SUM(deposits) AS deposits,
+                   SUM(withdrawals) AS withdrawals, SUM(pending) AS pending
+            FROM ({rows}) contribution
+            GROUP BY account_type_id, manager_id
+            ORDER BY account_type_id, manager_id
+        ) d;
+    """
+
+
+# Accounts whose type or owner changed in this statement carry their transactions along
+ACCOUNT_MOVED = """
+    EXISTS (
+        SELECT 1 FROM old_rows o JOIN new_rows n ON n.id = o.id
+        WHERE o.id = a.id
+          AND (o.account_type_id, o.customer_id) IS DISTINCT FROM (n.account_type_id, n.customer_id)
+    )
+"""
+
+MANAGER_CHANGED = """
+    EXISTS (
+        SELECT 1 FROM old_rows o JOIN new_rows n ON n.id = o.id
+        WHERE o.id = c.id
+          AND o.assigned_manager_id IS DISTINCT FROM n.assigned_manager_id
+    )
+"""
+
+DELETED_ACCOUNT = '(SELECT * FROM accounts WHERE id = OLD.id)'
+DELETED_CUSTOMER = '(SELECT * FROM customers WHERE id = OLD.id)'
+
+
+def upgrade():
+    op.create_table(
+        'dashboard_summaries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('account_type_id', sa.Integer(), nullable=False),
+        sa.Column('manager_id', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('active_accounts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_balance', sa.Numeric(), nullable=False, server_default='0'),
+        sa.Column('total_deposits', sa.Numeric(), nullable=False, server_default='0'),
+        sa.Column('total_withdrawals', sa.Numeric(), nullable=False, server_default='0'),
+        sa.Column('pending_transactions', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['account_type_id'], ['account_types.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('account_type_id', 'manager_id', name='uq_dashboard_summary_type_manager')
+    )
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION dashboard_summary_add(
+            p_account_type_id integer, p_manager_id integer, p_active bigint, p_balance numeric,
+            p_deposits numeric, p_withdrawals numeric, p_pending bigint
+        ) RETURNS void AS $$
+        BEGIN
+            IF p_active = 0 AND p_balance = 0 AND p_deposits = 0
+               AND p_withdrawals = 0 AND p_pending = 0 THEN
+                RETURN;
+            END IF;
+            INSERT INTO dashboard_summaries AS s
+                (account_type_id, manager_id, active_accounts, total_balance,
+                 total_deposits, total_withdrawals, pending_transactions)
+            VALUES (p_account_type_id, p_manager_id, p_active, p_balance,
+                    p_deposits, p_withdrawals, p_pending)
+            ON CONFLICT (account_type_id, manager_id) DO UPDATE
+            SET active_accounts = s.active_accounts + EXCLUDED.active_accounts,
+                total_balance = s.total_balance + EXCLUDED.total_balance,
+                total_deposits = s.total_deposits + EXCLUDED.total_deposits,
+                total_withdrawals = s.total_withdrawals + EXCLUDED.total_withdrawals,
+                pending_transactions = s.pending_transactions + EXCLUDED.pending_transactions;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+    # Transactions: statement-level, so bulk inserts/updates cost one upsert per summary row
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION dashboard_summary_on_transactions() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                {_apply(_transaction_rows('new_rows', 'accounts', 'customers', 1))}
+            ELSIF TG_OP = 'UPDATE' THEN
+                {_apply(_transaction_rows('new_rows', 'accounts', 'customers', 1),
+                        _transaction_rows('old_rows', 'accounts', 'customers', -1))}
+            ELSE
+                {_apply(_transaction_rows('old_rows', 'accounts', 'customers', -1))}
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+    # Accounts: inserts/updates per statement (the interest jobs credit thousands of
+    # accounts in one UPDATE); deletes per row, before cascaded transactions disappear
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION dashboard_summary_on_accounts() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                {_apply(_account_rows('new_rows', 'customers', 1))}
+                RETURN NULL;
+            ELSIF TG_OP = 'UPDATE' THEN
+                {_apply(_account_rows('new_rows', 'customers', 1),
+                        _account_rows('old_rows', 'customers', -1),
+                        _transaction_rows('transactions', 'new_rows', 'customers', 1, ACCOUNT_MOVED),
+                        _transaction_rows('transactions', 'old_rows', 'customers', -1, ACCOUNT_MOVED))}
+                RETURN NULL;
+            END IF;
+            {_apply(_account_rows(DELETED_ACCOUNT, 'customers', -1),
+                    _transaction_rows('transactions', DELETED_ACCOUNT, 'customers', -1))}
+            RETURN OLD;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+    # Customers: reassigning a manager moves the customer's accounts and transactions
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION dashboard_summary_on_customers() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' THEN
+                {_apply(_account_rows('accounts', 'new_rows', 1, MANAGER_CHANGED),
+                        _account_rows('accounts', 'old_rows', -1, MANAGER_CHANGED),
+                        _transaction_rows('transactions', 'accounts', 'new_rows', 1, MANAGER_CHANGED),
+                        _transaction_rows('transactions', 'accounts', 'old_rows', -1, MANAGER_CHANGED))}
+                RETURN NULL;
+            END IF;
+            {_apply(_account_rows('accounts', DELETED_CUSTOMER, -1),
+                    _transaction_rows('transactions', 'accounts', DELETED_CUSTOMER, -1))}
+            RETURN OLD;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+    op.execute("""
+        CREATE TRIGGER dashboard_summary_transactions_insert AFTER INSERT ON transactions
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION dashboard_summary_on_transactions();
+        CREATE TRIGGER dashboard_summary_transactions_update AFTER UPDATE ON transactions
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION dashboard_summary_on_transactions();
+        CREATE TRIGGER dashboard_summary_transactions_delete AFTER DELETE ON transactions
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION dashboard_summary_on_transactions();
+
+        CREATE TRIGGER dashboard_summary_accounts_insert AFTER INSERT ON accounts
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION dashboard_summary_on_accounts();
+        CREATE TRIGGER dashboard_summary_accounts_update AFTER UPDATE ON accounts
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION dashboard_summary_on_accounts();
+        CREATE TRIGGER dashboard_summary_accounts_delete BEFORE DELETE ON accounts
+            FOR EACH ROW EXECUTE FUNCTION dashboard_summary_on_accounts();
+
+        CREATE TRIGGER dashboard_summary_customers_update AFTER UPDATE ON customers
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION dashboard_summary_on_customers();
+        CREATE TRIGGER dashboard_summary_customers_delete BEFORE DELETE ON customers
+            FOR EACH ROW EXECUTE FUNCTION dashboard_summary_on_customers();
+    """)
+
+    # Backfill from the current book
+    op.execute(f"""
+        INSERT INTO dashboard_summaries
+            (account_type_id, manager_id, active_accounts, total_balance,
+             total_deposits, total_withdrawals, pending_transactions)
+        SELECT account_type_id, manager_id, SUM(active), SUM(balance),
+               SUM(deposits), SUM(withdrawals), SUM(pending)
+        FROM ({_account_rows('accounts', 'customers', 1)}
+              UNION ALL
+              {_transaction_rows('transactions', 'accounts', 'customers', 1)}) contribution
+        GROUP BY account_type_id, manager_id
+    """)
+
+
+def downgrade():
+    op.execute("""
+        DROP TRIGGER IF EXISTS dashboard_summary_transactions_insert ON transactions;
+        DROP TRIGGER IF EXISTS dashboard_summary_transactions_update ON transactions;
+        DROP TRIGGER IF EXISTS dashboard_summary_transactions_delete ON transactions;
+        DROP TRIGGER IF EXISTS dashboard_summary_accounts_insert ON accounts;
+        DROP TRIGGER IF EXISTS dashboard_summary_accounts_update ON accounts;
+        DROP TRIGGER IF EXISTS dashboard_summary_accounts_delete ON accounts;
+        DROP TRIGGER IF EXISTS dashboard_summary_customers_update ON customers;
+        DROP TRIGGER IF EXISTS dashboard_summary_customers_delete ON customers;
+        DROP FUNCTION IF EXISTS dashboard_summary_on_transactions();
+        DROP FUNCTION IF EXISTS dashboard_summary_on_accounts();
+        DROP FUNCTION IF EXISTS dashboard_summary_on_customers();
+        DROP FUNCTION IF EXISTS dashboard_summary_add(integer, integer, bigint, numeric, numeric, numeric, bigint);
+    """)
+    op.drop_table('dashboard_summaries')
@@ -0,0 +1,108 @@
+"""Queue dashboard summary changes as delta rows instead of updating the summaries in place
+
+Revision ID: add_dashboard_summary_deltas
+Revises: add_null_safe_cursor_indexes
+Create Date: 2026-10-18 01:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_dashboard_summary_deltas'
+down_revision = 'add_null_safe_cursor_indexes'
+branch_labels = None
+depends_on = None
+
+
+# Same statement as app.services.dashboard_service.FOLD_SUMMARY_DELTAS_SQL
+FOLD_DELTAS = """
+    WITH folded AS (
+        DELETE FROM dashboard_summary_deltas
+        RETURNING account_type_id, manager_id, active_accounts, total_balance,
+                  total_deposits, total_withdrawals, pending_transactions
+    )
+    INSERT INTO dashboard_summaries AS s
+        (account_type_id, manager_id, active_accounts, total_balance,
+         total_deposits, total_withdrawals, pending_transactions)
+    SELECT account_type_id, manager_id, SUM(active_accounts), SUM(total_balance),
+           SUM(total_deposits), SUM(total_withdrawals), SUM(pending_transactions)
+    FROM folded
+    GROUP BY account_type_id, manager_id
+    ORDER BY account_type_id, manager_id
+    ON CONFLICT (account_type_id, manager_id) DO UPDATE
+    SET active_accounts = s.active_accounts + EXCLUDED.active_accounts,
+        total_balance = s.total_balance + EXCLUDED.total_balance,
+        total_deposits = s.total_deposits + EXCLUDED.total_deposits,
+        total_withdrawals = s.total_withdrawals + EXCLUDED.total_withdrawals,
+        pending_transactions = s.pending_transactions + EXCLUDED.pending_transactions
+"""
+
+
+def upgrade():
+    op.create_table(
+        'dashboard_summary_deltas',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('account_type_id', sa.Integer(), nullable=False),
+        sa.Column('manager_id', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('active_accounts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_balance', sa.Numeric(), nullable=False, server_default='0'),
+        sa.Column('total_deposits', sa.Numeric(), nullable=False, server_default='0'),
+        sa.Column('total_withdrawals', sa.Numeric(), nullable=False, server_default='0'),
+        sa.Column('pending_transactions', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['account_type_id'], ['account_types.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    # The triggers keep calling dashboard_summary_add(); it now appends a delta
+    # row, which takes no lock on the shared summary row, and the job process
+    # folds the deltas into dashboard_summaries
+    op.execute("""
+        CREATE OR REPLACE FUNCTION dashboard_summary_add(
+            p_account_type_id integer, p_manager_id integer, p_active bigint, p_balance numeric,
+            p_deposits numeric, p_withdrawals numeric, p_pending bigint
+        ) RETURNS void AS $$
+        BEGIN
+            IF p_active = 0 AND p_balance = 0 AND p_deposits = 0
+               AND p_withdrawals = 0 AND p_pending = 0 THEN
+                RETURN;
+            END IF;
+            INSERT INTO dashboard_summary_deltas
+                (account_type_id, manager_id, active_accounts, total_balance,
+                 total_deposits, total_withdrawals, pending_transactions)
+            VALUES (p_account_type_id, p_manager_id, p_active, p_balance,
+                    p_deposits, p_withdrawals, p_pending);
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+
+def downgrade():
+    op.execute('LOCK TABLE dashboard_summary_deltas IN EXCLUSIVE MODE')
+    op.execute(FOLD_DELTAS)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION dashboard_summary_add(
+            p_account_type_id integer, p_manager_id integer, p_active bigint, p_balance numeric,
+            p_deposits numeric, p_withdrawals numeric, p_pending bigint
+        ) RETURNS void AS $$
+        BEGIN
+            IF p_active = 0 AND p_balance = 0 AND p_deposits = 0
+               AND p_withdrawals = 0 AND p_pending = 0 THEN
+                RETURN;
+            END IF;
+            INSERT INTO dashboard_summaries AS s
+                (account_type_id, manager_id, active_accounts, total_balance,
+                 total_deposits, total_withdrawals, pending_transactions)
+            VALUES (p_account_type_id, p_manager_id, p_active, p_balance,
+                    p_deposits, p_withdrawals, p_pending)
+            ON CONFLICT (account_type_id, manager_id) DO UPDATE
+            SET active_accounts = s.active_accounts + EXCLUDED.active_accounts,
+                total_balance = s.total_balance + EXCLUDED.total_balance,
+                total_deposits = s.total_deposits + EXCLUDED.total_deposits,
+                total_withdrawals = s.total_withdrawals + EXCLUDED.total_withdrawals,
+                pending_transactions = s.pending_transactions + EXCLUDED.pending_transactions;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.drop_table('dashboard_summary_deltas')
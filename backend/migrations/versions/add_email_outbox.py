@@ -0,0 +1,39 @@
+"""Add email_outbox table for transactional email delivery
+
+Revision ID: add_email_outbox
+Revises: add_hot_path_indexes
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_email_outbox'
+down_revision = 'add_hot_path_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('email_outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('to_email', sa.String(length=120), nullable=False),
+        sa.Column('subject', sa.String(length=255), nullable=False),
+        sa.Column('html_body', sa.Text(), nullable=True),
+        sa.Column('text_body', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_email_outbox_status_next_attempt', 'email_outbox', ['status', 'next_attempt_at'])
+
+
+def downgrade():
+    op.drop_index('idx_email_outbox_status_next_attempt', table_name='email_outbox')
+    op.drop_table('email_outbox')
@@ -0,0 +1,26 @@
+"""Add claim_token to email_outbox so a runner only records messages it still holds
+
+Revision ID: add_email_outbox_claim_token
+Revises: add_interest_runs
+Create Date: 2026-10-17 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_email_outbox_claim_token'
+down_revision = 'add_interest_runs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('email_outbox', sa.Column('claim_token', sa.String(length=32), nullable=True))
+    # Bodies of dead-lettered messages are no longer kept (they may hold credentials)
+    op.execute("UPDATE email_outbox SET html_body = NULL, text_body = NULL WHERE status = 'dead'")
+
+
+def downgrade():
+    op.drop_column('email_outbox', 'claim_token')
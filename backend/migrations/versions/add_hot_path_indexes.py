@@ -0,0 +1,46 @@
+"""Add secondary indexes for the hot query paths (built concurrently)
+
+Revision ID: add_hot_path_indexes
+Revises: add_dashboard_feed_indexes
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_hot_path_indexes'
+down_revision = 'add_dashboard_feed_indexes'
+branch_labels = None
+depends_on = None
+
+
+# account_interest_logs(account_id, calculated_date) is already served by the
+# leading columns of uq_interest_log_account_date_kind.
+INDEXES = [
+    ('idx_transactions_account_created', 'transactions', ['account_id', 'created_at']),
+    ('idx_transactions_status', 'transactions', ['status']),
+    ('idx_transactions_created_id', 'transactions', ['created_at', 'id']),
+    ('idx_accounts_status_type', 'accounts', ['status', 'account_type_id']),
+    ('idx_accounts_customer', 'accounts', ['customer_id']),
+    ('idx_accounts_created_id', 'accounts', ['created_at', 'id']),
+    ('idx_customers_manager_role', 'customers', ['assigned_manager_id', 'role']),
+    ('idx_customers_created_id', 'customers', ['created_at', 'id']),
+    ('idx_emi_account_paid_due_date', 'emi_installments', ['account_id', 'is_paid', 'due_date']),
+    ('idx_rd_installments_account_date', 'rd_installments', ['account_id', 'deposit_date']),
+    ('idx_user_permissions_user_module', 'user_permissions', ['user_id', 'user_type', 'module']),
+]
+
+
+def upgrade():
+    # CONCURRENTLY keeps the tables writable while the indexes build, but it
+    # cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,39 @@
+"""Add interest_accrual_checkpoints table for resumable interest accrual runs
+
+Revision ID: add_interest_accrual_checkpoints
+Revises: 5e1a1f9011bb
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_interest_accrual_checkpoints'
+down_revision = '5e1a1f9011bb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('interest_accrual_checkpoints',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('run_id', sa.String(length=36), nullable=False),
+        sa.Column('job_name', sa.String(length=30), nullable=False),
+        sa.Column('run_date', sa.Date(), nullable=False),
+        sa.Column('last_account_id', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('accounts_processed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('accounts_skipped', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_interest', sa.Numeric(precision=14, scale=2), nullable=False, server_default='0'),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='running'),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('run_id'),
+        sa.UniqueConstraint('job_name', 'run_date', name='uq_accrual_checkpoint_job_date')
+    )
+
+
+def downgrade():
+    op.drop_table('interest_accrual_checkpoints')
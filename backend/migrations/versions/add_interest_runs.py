@@ -0,0 +1,44 @@
+"""Add interest_runs table for background bulk interest runs
+
+Revision ID: add_interest_runs
+Revises: add_customer_permissions_version
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_interest_runs'
+down_revision = 'add_customer_permissions_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('interest_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_name', sa.String(length=30), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='queued'),
+        sa.Column('run_date', sa.Date(), nullable=False),
+        sa.Column('requested_by', sa.Integer(), nullable=False),
+        sa.Column('requested_by_type', sa.String(length=20), nullable=False, server_default='user'),
+        sa.Column('last_account_id', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('accounts_total', sa.Integer(), nullable=True),
+        sa.Column('accounts_processed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('accounts_skipped', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_interest', sa.Numeric(precision=14, scale=2), nullable=False, server_default='0'),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_interest_runs_status_created_at', 'interest_runs', ['status', 'created_at'])
+
+
+def downgrade():
+    op.drop_index('idx_interest_runs_status_created_at', table_name='interest_runs')
+    op.drop_table('interest_runs')
@@ -0,0 +1,118 @@
+"""Add accrual kind to account_interest_logs with a unique (account, date, kind) guard
+
+Revision ID: add_interest_log_kind
+Revises: add_interest_accrual_checkpoints
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import logging
+
+logger = logging.getLogger('alembic')
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_interest_log_kind'
+down_revision = 'add_interest_accrual_checkpoints'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('account_interest_logs', sa.Column('kind', sa.String(length=20), nullable=True))
+
+    # Existing logs get their kind from the account type that produced them
+    op.execute("""
+        UPDATE account_interest_logs l
+        SET kind = CASE
+            WHEN t.name ILIKE 'DDS%' THEN 'dds_daily'
+            WHEN t.name ILIKE 'FD%' THEN 'fd_daily'
+            WHEN t.name ILIKE 'RD%' THEN 'rd_monthly'
+            ELSE 'other'
+        END
+        FROM accounts a
+        JOIN account_types t ON t.id = a.account_type_id
+        WHERE a.id = l.account_id
+    """)
+
+    # Duplicate logs left by double runs record interest that was credited twice,
+    # so they are not deleted: every log after the first for an (account, date,
+    # kind) moves to account_interest_log_duplicates, where the inflated balances
+    # can be reconciled by hand, and the unique constraint is added on what is left
+    op.create_table('account_interest_log_duplicates',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('account_id', sa.Integer(), nullable=False),
+        sa.Column('interest_amount', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('balance_before', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('balance_after', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('calculated_date', sa.Date(), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('kept_log_id', sa.Integer(), nullable=False),  # The log left in account_interest_logs
+        sa.Column('quarantined_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("""
+        INSERT INTO account_interest_log_duplicates (
+            id, account_id, interest_amount, balance_before, balance_after,
+            calculated_date, kind, created_at, kept_log_id
+        )
+        SELECT l.id, l.account_id, l.interest_amount, l.balance_before, l.balance_after,
+               l.calculated_date, l.kind, l.created_at, kept.id
+        FROM account_interest_logs l
+        JOIN (
+            SELECT account_id, calculated_date, kind, MIN(id) AS id
+            FROM account_interest_logs
+            GROUP BY account_id, calculated_date, kind
+            HAVING COUNT(*) > 1
+        ) kept ON kept.account_id = l.account_id
+               AND kept.calculated_date = l.calculated_date
+               AND kept.kind = l.kind
+        WHERE l.id > kept.id
+    """)
+    op.execute("""
+        DELETE FROM account_interest_logs
+        WHERE id IN (SELECT id FROM account_interest_log_duplicates)
+    """)
+
+    duplicates = op.get_bind().execute(sa.text("""
+        SELECT account_id, calculated_date, kind, COUNT(*) AS extra, SUM(interest_amount) AS extra_interest
+        FROM account_interest_log_duplicates
+        GROUP BY account_id, calculated_date, kind
+        ORDER BY account_id, calculated_date, kind
+    """)).all()
+    if duplicates:
+        logger.warning(
+            f'{sum(row.extra for row in duplicates)} duplicate interest logs in {len(duplicates)} '
+            '(account, date, kind) groups moved to account_interest_log_duplicates; '
+            'the interest they record is still in the account balances and needs reconciling'
+        )
+        for row in duplicates:
+            logger.warning(
+                f'  account {row.account_id} {row.calculated_date} {row.kind}: '
+                f'{row.extra} extra log(s), {row.extra_interest} interest'
+            )
+
+    op.alter_column('account_interest_logs', 'kind', existing_type=sa.String(length=20), nullable=False)
+    op.create_unique_constraint(
+        'uq_interest_log_account_date_kind',
+        'account_interest_logs',
+        ['account_id', 'calculated_date', 'kind']
+    )
+
+
+def downgrade():
+    op.drop_constraint('uq_interest_log_account_date_kind', 'account_interest_logs', type_='unique')
+    # Quarantined duplicates go back where they came from
+    op.execute("""
+        INSERT INTO account_interest_logs (
+            id, account_id, interest_amount, balance_before, balance_after,
+            calculated_date, kind, created_at
+        )
+        SELECT id, account_id, interest_amount, balance_before, balance_after,
+               calculated_date, kind, created_at
+        FROM account_interest_log_duplicates
+    """)
+    op.drop_table('account_interest_log_duplicates')
+    op.drop_column('account_interest_logs', 'kind')
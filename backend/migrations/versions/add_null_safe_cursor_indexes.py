@@ -0,0 +1,41 @@
+"""Replace the (created_at, id) list indexes with NULL-safe cursor indexes
+
+Revision ID: add_null_safe_cursor_indexes
+Revises: add_email_outbox_claim_token
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_null_safe_cursor_indexes'
+down_revision = 'add_email_outbox_claim_token'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ('transactions', 'accounts', 'customers')
+# Must match app.utils.pagination.cursor_key
+CURSOR_KEY = "coalesce(created_at, '1970-01-01 00:00:00.000000')"
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.create_index(
+                f'idx_{table}_cursor', table, [sa.text(CURSOR_KEY), 'id'],
+                postgresql_concurrently=True, if_not_exists=True
+            )
+            op.drop_index(f'idx_{table}_created_id', table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for table in reversed(TABLES):
+            op.create_index(
+                f'idx_{table}_created_id', table, ['created_at', 'id'],
+                postgresql_concurrently=True, if_not_exists=True
+            )
+            op.drop_index(f'idx_{table}_cursor', table_name=table, postgresql_concurrently=True, if_exists=True)